@@ -140,3 +140,27 @@ SELECT
     COUNT(*) as count
 FROM roasts
 GROUP BY roast_type;
+
+-- ============================================
+-- Model Audit Column (model failover)
+-- ============================================
+-- Each roast records the Gemini model that served it.
+-- Run this BEFORE deploying the model failover backend.
+
+ALTER TABLE roasts ADD COLUMN IF NOT EXISTS model TEXT;
+CREATE INDEX IF NOT EXISTS idx_roasts_model ON roasts(model);
+
+-- Roast count per serving model
+SELECT 
+    COALESCE(model, 'unknown') as model,
+    COUNT(*) as count
+FROM roasts
+GROUP BY model
+ORDER BY count DESC;
+
+-- ============================================
+-- Roast History Index (/me/roasts keyset pagination)
+-- ============================================
+-- Serves "WHERE user_id = ? ORDER BY created_at DESC, id DESC" without a sort.
+
+CREATE INDEX IF NOT EXISTS idx_roasts_user_created_id ON roasts(user_id, created_at DESC, id DESC);
@@ -1,6 +1,6 @@
 import os
-from typing import Optional
-from pydantic_settings import BaseSettings
+from typing import List, Optional, Tuple
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -13,16 +13,135 @@ class Settings(BaseSettings):
     # Gemini API Configuration
     gemini_api_key: str
     gemini_model: str = "gemini-2.5-flash"  # Updated to use available model
+    gemini_fallback_models: str = "gemini-2.5-flash-lite"  # Comma-separated, tried in order
     
-    # Supabase Configuration
-    supabase_url: str
-    supabase_key: str
+    # API key pool Configuration (extra keys as "key" or "key:rpm", comma-separated)
+    gemini_api_keys: str = ""
+    gemini_key_rpm: int = 10  # Default per-key requests-per-minute quota
+    gemini_key_cooldown_seconds: float = 60.0  # How long a 429'd key stays out of rotation
+    gemini_key_max_wait_seconds: float = 10.0  # Longest wait for quota when every key is exhausted
+    
+    # Model failover Configuration
+    model_error_rate_threshold: float = 0.5  # Rolling error rate that takes a model out of rotation
+    model_latency_threshold_seconds: float = 30.0  # Rolling p90 latency that takes a model out of rotation
+    model_cooldown_seconds: float = 60.0  # How long an unhealthy model stays out of rotation
+    model_health_window: int = 20  # Number of recent calls used for the rolling stats
+    
+    # Request deadline Configuration (bounds every step of a roast, including retries)
+    roast_deadline_seconds: float = 60.0  # Default when the client sends no X-Request-Timeout
+    roast_max_deadline_seconds: float = 120.0  # Upper bound on client-requested deadlines
+    persist_reserve_seconds: float = 2.0  # Budget held back from the LLM for saving the roast
+    db_timeout_seconds: float = 5.0  # Per-call timeout for Supabase requests
+    
+    # Admission / batch Configuration
+    max_concurrent_generations: int = 16  # Gemini generations in flight per worker (all routes)
+    batch_concurrency: int = 8  # Items of one batch processed concurrently
+    
+    # Load shedding Configuration (503 + Retry-After for new generations while overloaded, 0 disables a signal)
+    shed_paths: str = "/roast,/roast/batch"  # POST routes that start Gemini generations
+    shed_loop_lag_ms: float = 250.0  # Event loop lag that trips shedding
+    shed_max_queued: int = 32  # Requests queued for a generation slot that trip shedding
+    shed_max_queue_wait_seconds: float = 10.0  # Longest admission wait that trips shedding
+    shed_retry_after_seconds: int = 5  # Retry-After is jittered between this and twice this
+    
+    # Async roast job Configuration
+    job_queue_backend: str = "sqlite"  # Queue backend (see JOB_QUEUE_BACKENDS)
+    job_queue_path: str = "roast_jobs.sqlite3"  # SQLite file for the local queue
+    job_workers: int = 4  # In-process workers executing roast jobs
+    job_ttl_seconds: float = 3600.0  # How long jobs and their results are kept
+    job_max_poll_seconds: float = 30.0  # Upper bound on a long-poll wait
+    job_poll_interval_seconds: float = 1.0  # Idle workers re-check the queue this often
+    job_lease_seconds: float = 60.0  # A running job whose worker stops renewing its lease this long is requeued
+    
+    # Idempotency-Key Configuration (/roast retry deduplication)
+    idempotency_backend: str = "memory"  # "memory" (per worker) or "sqlite" (shared by workers on a host)
+    idempotency_path: str = "idempotency.sqlite3"  # SQLite file for the shared store
+    idempotency_ttl_seconds: float = 86400.0  # How long a stored response can be replayed
+    idempotency_max_entries: int = 10000  # Bound on stored keys
+    
+    # Hedged request Configuration (tail latency mitigation)
+    hedge_enabled: bool = True
+    hedge_percentile: float = 95.0  # Fire a hedge once the primary exceeds this latency percentile
+    hedge_budget_ratio: float = 0.05  # At most 5% extra Gemini calls
+    hedge_min_samples: int = 20  # Latency samples required before hedging kicks in
+    
+    # Near-duplicate roast cache Configuration (serves cached roasts for near-identical ideas)
+    near_duplicate_enabled: bool = False
+    near_duplicate_threshold: float = 0.7  # Estimated Jaccard similarity of the normalized ideas needed for a hit
+    near_duplicate_max_entries: int = 5000  # Roasts kept per worker
+
+    # Gemini usage ledger Configuration (tokens, latency and retries per generation)
+    usage_ledger_enabled: bool = True
+    usage_ledger_path: str = "usage_ledger.sqlite3"  # Local SQLite ledger file
+    usage_ledger_retention_days: float = 90.0  # Older rows are swept
+    usage_ledger_count_prompt_tokens: bool = True  # Spend a count_tokens call (no generation quota) when a response omits prompt tokens
+
+    # Event loop monitor Configuration (lag metrics and blocking-call detection)
+    loop_monitor_tick_ms: float = 250.0  # Heartbeat period used to measure lag (0 disables)
+    loop_block_detection: bool = False  # Log the stack of any callback holding the loop too long
+    loop_block_threshold_ms: float = 100.0  # Loop stall reported as blocking
+
+    # Request tracing Configuration (OpenTelemetry-compatible spans for /roast)
+    tracing_exporter: str = ""  # "", "console", "file" or "otlp" (see TRACE_EXPORTERS); empty disables tracing
+    tracing_sample_ratio: float = 0.05  # Share of new traces recorded (an incoming traceparent's flag wins)
+    tracing_file_path: str = "traces.jsonl"  # OTLP/JSON lines written by the file exporter
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"  # OTLP/HTTP collector endpoint
+    tracing_service_name: str = "roastmystartup-api"
+
+    # Logging Configuration (queued, off the event loop; INFO/DEBUG sampled per call site)
+    log_level: str = "INFO"
+    log_format: str = "json"  # "json" (one object per line) or "text"
+    log_queue_size: int = 10000  # Records buffered for the writer thread (overflow is dropped and counted)
+    log_info_sample_rate: float = 1.0  # Share of INFO/DEBUG records kept per call site (warnings always kept)
+    log_sample_rates: str = ""  # Per-logger overrides as "logger:rate", comma-separated
+    log_payload_dumps_per_minute: float = 6.0  # Budget for large error payloads (raw model output)
+    log_payload_max_chars: int = 500  # Payload dumps are truncated to this many characters
+
+    # Upstream connection pooling Configuration
+    connection_pool_size: int = 10  # Supabase keep-alive connections opened at startup
+    connection_keepalive_interval_seconds: float = 30.0  # Idle connections are pinged this often (0 disables)
+    
+    # Storage Configuration
+    database_backend: str = "supabase"  # "supabase" or "sqlite" (see DATABASE_BACKENDS)
+    sqlite_database_path: str = "roastmystartup.sqlite3"  # SQLite file (":memory:" for single-connection tests)
+    
+    # Roast history Configuration (/me/roasts)
+    roast_history_page_size: int = 20  # Default page size (max 100)
+    roast_history_cache_ttl_seconds: float = 30.0  # Per-user page cache lifetime
+    roast_history_cache_max_users: int = 10000  # Users whose pages are cached per worker
+    
+    # Shared roast permalink Configuration (/r/{roast_id})
+    share_cache_max_entries: int = 1000  # Hot roasts kept rendered in memory per worker
+    share_cache_ttl_seconds: float = 600.0
+    share_missing_ttl_seconds: float = 30.0  # How long an unknown roast id is answered 404 from memory
+    share_cache_control: str = "public, max-age=300, s-maxage=3600, stale-while-revalidate=86400"
+    
+    # Roast search Configuration (/roasts/search)
+    search_index_enabled: bool = True
+    search_index_path: str = "roast_search.sqlite3"  # Local SQLite FTS5 index file
+    search_page_size: int = 20  # Default results per page (max 100)
+
+    # Trending themes Configuration (/stats/trending)
+    trending_top_k: int = 20  # Items served per list
+    trending_capacity: int = 500  # Space-Saving counters per window pane (bounds memory)
+    trending_refresh_seconds: float = 5.0  # How often the served top-K snapshot is recomputed
+
+    # Supabase Configuration (required when database_backend is "supabase")
+    supabase_url: str = ""
+    supabase_key: str = ""
     
     # Google OAuth Configuration (optional - only needed for auth endpoints)
     google_client_id: Optional[str] = None
     google_client_secret: Optional[str] = None
     google_redirect_uri: Optional[str] = None
     
+    # Admin API Configuration (admin endpoints are disabled unless a key is set)
+    admin_api_key: Optional[str] = None
+    export_page_size: int = 1000  # Rows fetched per keyset page by /admin/export
+    profile_dir: str = "profiles"  # Folded-stack profiles of requests sent with X-Profile
+    profile_sample_interval_ms: float = 5.0  # Stack sampling period while profiling
+    profile_max_files: int = 200  # Older profiles are deleted as new ones are saved
+    
     # JWT Configuration (optional - only needed for auth endpoints)
     jwt_secret_key: Optional[str] = None
     jwt_algorithm: str = "HS256"
@@ -35,9 +154,34 @@ class Settings(BaseSettings):
     app_name: str = "RoastMyStartup API"
     debug: bool = False
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    @property
+    def gemini_models(self) -> List[str]:
+        """Ordered model pool: the primary model followed by the fallbacks"""
+        models = [self.gemini_model]
+        for name in self.gemini_fallback_models.split(","):
+            name = name.strip()
+            if name and name not in models:
+                models.append(name)
+        return models
+    
+    @property
+    def gemini_key_quotas(self) -> List[Tuple[str, int]]:
+        """API key pool as (key, requests_per_minute): the primary key followed by the extras"""
+        quotas = [(self.gemini_api_key, self.gemini_key_rpm)]
+        seen = {self.gemini_api_key}
+        for entry in self.gemini_api_keys.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            key, _, rpm = entry.partition(":")
+            if key in seen:
+                continue
+            seen.add(key)
+            quotas.append((key, int(rpm) if rpm else self.gemini_key_rpm))
+        return quotas
+    
+    # MODEL_* settings are ours, not pydantic's protected model_ namespace
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, protected_namespaces=("settings_",))
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -49,7 +193,7 @@ class Settings(BaseSettings):
                 "Please set GEMINI_API_KEY in your .env file or environment."
             )
         
-        if not self.supabase_url or not self.supabase_key:
+        if self.database_backend == "supabase" and (not self.supabase_url or not self.supabase_key):
             raise ValueError(
                 "SUPABASE_URL and SUPABASE_KEY are required but not found in environment variables. "
                 "Please set SUPABASE_URL and SUPABASE_KEY in your .env file or environment."
@@ -1,17 +1,39 @@
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+import asyncio
+import hashlib
 import logging
-import jwt
+import math
 from typing import Optional
 
 from app.schemas.roast import RoastRequest, RoastResponse
-from app.services.roast_service import roast_service
-from app.services.db_service import db_service
+from app.services.roast_service import get_roast_service
+from app.services.db_service import get_db_service
+from app.services.metrics_service import metrics
+from app.services.connection_pool import connection_warmer, gemini_connections, supabase_connections
+from app.services.near_duplicates import near_duplicate_index
+from app.services.loop_monitor import loop_monitor
+from app.services.tracing import tracer
+from app.services.structured_logging import configure_logging, shutdown_logging
+from app.services.deadline import Deadline, DeadlineExceeded
 from app.config.settings import settings
-from app.routes.auth import router as auth_router
+from app.middleware.correlation import CorrelationIdMiddleware
+from app.middleware.load_shedding import LoadSheddingMiddleware, load_shedder
+from app.middleware.profiling import ProfilingMiddleware
+from app.routes.auth import router as auth_router, get_optional_user_id
+from app.routes.batch import router as batch_router
+from app.routes.jobs import router as jobs_router
+from app.routes.search import router as search_router
+from app.routes.history import router as history_router
+from app.routes.share import router as share_router
+from app.routes.admin import router as admin_router
+from app.routes.stats import router as stats_router
+from app.services.job_service import job_service
+from app.services.idempotency import idempotency_service
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queued JSON lines written off the event loop)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -21,6 +43,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Shed new generations while overloaded (added before CORS so 503s still carry CORS headers)
+app.add_middleware(LoadSheddingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -30,21 +55,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request profiling for admins (requests without X-Profile pass straight through)
+app.add_middleware(ProfilingMiddleware)
+
+# Correlation id for every request (outermost, so all other middleware logs carry it)
+app.add_middleware(CorrelationIdMiddleware)
+
 # Register routers
 app.include_router(auth_router)
+app.include_router(batch_router)
+app.include_router(jobs_router)
+app.include_router(search_router)  # Before history: /roasts/search must not match /roasts/{roast_id}
+app.include_router(history_router)
+app.include_router(share_router)
+app.include_router(admin_router)
+app.include_router(stats_router)
 
-@app.on_event("startup")
-async def startup_event():
-    """Startup event to validate configuration"""
-    logger.info(f"Starting {settings.app_name}")
-    logger.info(f"Using Gemini model: {settings.gemini_model}")
-    logger.info("✅ Gemini API key configured successfully")
+async def warm_up_services():
+    """Build the Gemini and Supabase clients without blocking the event loop, then open their connections"""
+    # Imports and configuration run on a thread; the per-key gRPC clients are created on the loop below
+    roast_service = await asyncio.to_thread(get_roast_service)
+    logger.info("✅ Gemini client initialized")
+    
+    db_service = await get_db_service()
     
     # Test database connection
-    if db_service.health_check():
+    if await db_service.health_check():
         logger.info("✅ Supabase database connection healthy")
     else:
         logger.warning("⚠️ Supabase database connection failed - roasts will not be persisted")
+    
+    # Pre-open pooled connections so the first roasts skip DNS/TLS setup, then keep them alive
+    await connection_warmer.warm_up(roast_service, db_service)
+    connection_warmer.start(roast_service, db_service)
+
+def warm_up_status() -> str:
+    """State of the background warm-up for /health"""
+    task = getattr(app.state, "warmup_task", None)
+    if task is None or not task.done():
+        return "in_progress"
+    if task.cancelled():
+        return "cancelled"
+    return "failed" if task.exception() is not None else "done"
+
+def _check_warm_up(task: asyncio.Task) -> None:
+    """Report a failed warm-up loudly: without it the first /roast pays for client setup and nothing is kept alive"""
+    if task.cancelled() or task.exception() is None:
+        return
+    error = task.exception()
+    metrics.increment("service_warmup_failures_total")
+    logger.critical(
+        f"❌ Service warm-up failed - Gemini/Supabase connections are not pre-warmed or kept alive: {str(error)}",
+        exc_info=error
+    )
+
+@app.on_event("startup")
+async def startup_event():
+    """Startup event to validate configuration"""
+    logger.info(f"Starting {settings.app_name}")
+    logger.info(f"Using Gemini models (in failover order): {', '.join(settings.gemini_models)}")
+    logger.info(f"✅ Gemini API key pool configured with {len(settings.gemini_key_quotas)} key(s)")
+    
+    # Measure event loop lag from the start so slow warm-up work shows up too
+    loop_monitor.start()
+    
+    # Warm up heavy clients in the background so the server starts accepting requests immediately
+    app.state.warmup_task = asyncio.create_task(warm_up_services())
+    app.state.warmup_task.add_done_callback(_check_warm_up)
+    
+    # Start the roast job workers (resumes jobs interrupted by a restart)
+    await job_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Shutdown event to stop background workers"""
+    await connection_warmer.stop()
+    await job_service.stop()
+    await loop_monitor.stop()
+    await asyncio.to_thread(tracer.shutdown)
+    shutdown_logging()
 
 @app.get("/")
 async def root():
@@ -54,17 +143,39 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint to verify the service is running"""
-    db_healthy = db_service.health_check()
+    try:
+        db_service = await get_db_service()
+        db_healthy = await db_service.health_check()
+    except Exception as e:
+        logger.error(f"❌ Database service unavailable for health check: {str(e)}")
+        db_healthy = False
+    roast_service = get_roast_service(create=False)
+    warm_up = warm_up_status()
     return {
-        "status": "alive", 
+        "status": "alive" if warm_up != "failed" else "degraded",
+        "warm_up": warm_up,
         "model": settings.gemini_model,
-        "database": "healthy" if db_healthy else "unavailable"
+        "models": roast_service.model_pool.status() if roast_service else "warming_up",
+        "api_keys": roast_service.key_pool.usage() if roast_service else "warming_up",
+        "database": "healthy" if db_healthy else "unavailable",
+        "connections": {
+            "gemini": gemini_connections.status(),
+            "supabase": supabase_connections.status()
+        },
+        "near_duplicates": near_duplicate_index.status() if settings.near_duplicate_enabled else "disabled",
+        "event_loop": loop_monitor.status(),
+        "load_shedding": load_shedder.status()
     }
 
 @app.get("/stats")
 async def get_stats():
     """Get roast statistics from the database"""
-    stats = db_service.get_roast_stats()
+    try:
+        db_service = await get_db_service()
+    except Exception as e:
+        logger.error(f"❌ Database service unavailable for stats: {str(e)}")
+        db_service = None
+    stats = await db_service.get_roast_stats() if db_service is not None else None
     if stats:
         return stats
     else:
@@ -73,8 +184,84 @@ async def get_stats():
             detail="Statistics unavailable - database connection issue"
         )
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Export in-process metrics (hedge rate, Gemini latency percentiles) in Prometheus format"""
+    return metrics.render_prometheus()
+
+# Smallest budget a client may ask for on top of the persistence reserve, so at least one Gemini call can run
+MIN_GENERATION_SECONDS = 5.0
+
+def resolve_deadline(x_request_timeout: Optional[str]) -> Deadline:
+    """
+    Create the request deadline from the client's X-Request-Timeout header (seconds) or the default
+    
+    Raises:
+        HTTPException: 400 if the header is not a finite number
+    """
+    timeout = settings.roast_deadline_seconds
+    if x_request_timeout:
+        try:
+            requested = float(x_request_timeout)
+        except ValueError:
+            logger.warning(f"Ignoring invalid X-Request-Timeout header: {x_request_timeout}")
+        else:
+            if not math.isfinite(requested):
+                raise HTTPException(status_code=400, detail="X-Request-Timeout must be a finite number of seconds")
+            minimum = settings.persist_reserve_seconds + MIN_GENERATION_SECONDS
+            timeout = min(max(requested, minimum), max(settings.roast_max_deadline_seconds, minimum))
+    return Deadline(timeout)
+
+async def generate_and_persist_roast(request: RoastRequest, user_id: Optional[str], deadline: Deadline) -> RoastResponse:
+    """
+    Generate a roast and save it to the database (fail-safe)
+    
+    Args:
+        request: The startup details to roast
+        user_id: UUID of the authenticated user (optional)
+        deadline: Request deadline shared by generation and persistence
+        
+    Returns:
+        RoastResponse: The generated roast
+    """
+    # Generate the roast using Gemini AI with retry logic, keeping budget back for the save
+    roast_response = await get_roast_service().analyze_startup(
+        request,
+        deadline=deadline.reserve(settings.persist_reserve_seconds),
+        user_id=user_id
+    )
+    
+    logger.info(f"Successfully generated roast for: {request.startup_name}")
+    
+    # Save to database in the background (fail-safe - don't block user response)
+    try:
+        db_service = await get_db_service()
+        db_result = await deadline.run(
+            "persist_roast",
+            db_service.save_roast(request, roast_response, user_id=user_id),
+            timeout=settings.db_timeout_seconds
+        )
+        if db_result:
+            logger.info(f"✅ Roast for {request.startup_name} saved to database")
+        else:
+            logger.warning(f"⚠️ Failed to save roast for {request.startup_name} to database")
+    except (DeadlineExceeded, asyncio.TimeoutError) as timeout_error:
+        logger.error(f"❌ Database save for {request.startup_name} timed out: {str(timeout_error) or 'db timeout'}")
+    except Exception as db_error:
+        # Log the database error but don't raise - user must get their roast
+        logger.error(f"❌ Database save error for {request.startup_name}: {str(db_error)}")
+    
+    return roast_response
+
 @app.post("/roast", response_model=RoastResponse)
-async def roast_startup(request: RoastRequest, authorization: Optional[str] = Header(None)):
+async def roast_startup(
+    request: RoastRequest,
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    x_request_timeout: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    traceparent: Optional[str] = Header(None)
+):
     """
     Roast a startup idea with brutal honesty and constructive feedback.
     
@@ -92,55 +279,67 @@ async def roast_startup(request: RoastRequest, authorization: Optional[str] = He
     
     If user is authenticated (JWT token in Authorization header), the roast
     will be linked to their user account.
+    
+    The whole request runs under one deadline, taken from the X-Request-Timeout
+    header (seconds) or the default. The LLM call, its retries and the database
+    save each use only the remaining budget; per-stage timings are reported in
+    the Server-Timing response header.
+    
+    Clients may send an Idempotency-Key header when retrying. The first request
+    with a key runs normally, concurrent duplicates wait for it, and later
+    duplicates within the TTL get the stored roast replayed (marked with an
+    Idempotent-Replayed header) without another Gemini call or database row.
+    
+    Sampled requests are traced (route, generation attempts, retry sleeps, JSON
+    cleaning, validation and database calls); a W3C traceparent header joins the
+    caller's trace, and traced responses echo their own traceparent.
     """
-    try:
-        logger.info(f"Processing roast request for: {request.startup_name}")
-        
-        # Extract user_id from JWT token if present
-        user_id = None
-        if authorization and authorization.startswith("Bearer "):
-            try:
-                token = authorization.replace("Bearer ", "")
-                payload = jwt.decode(
-                    token, 
-                    settings.jwt_secret_key or "dummy_key",  # Fallback for when JWT not configured
-                    algorithms=[settings.jwt_algorithm]
-                )
-                user_id = payload.get("user_id")
-                logger.info(f"Authenticated user_id: {user_id}")
-            except jwt.ExpiredSignatureError:
-                logger.warning("JWT token expired - proceeding as anonymous user")
-            except jwt.InvalidTokenError as e:
-                logger.warning(f"Invalid JWT token: {str(e)} - proceeding as anonymous user")
-            except Exception as e:
-                logger.warning(f"JWT decode error: {str(e)} - proceeding as anonymous user")
-        
-        # Generate the roast using Gemini AI with retry logic
-        roast_response = await roast_service.analyze_startup(request)
-        
-        logger.info(f"Successfully generated roast for: {request.startup_name}")
-        
-        # Save to database in the background (fail-safe - don't block user response)
+    deadline = resolve_deadline(x_request_timeout)
+    
+    with tracer.start_trace("roast_startup", traceparent, {"http.route": "/roast", "roast_level": request.roast_level}) as span:
         try:
-            db_result = db_service.save_roast(request, roast_response, user_id=user_id)
-            if db_result:
-                logger.info(f"✅ Roast for {request.startup_name} saved to database")
+            logger.info(f"Processing roast request for: {request.startup_name}")
+            
+            # Extract user_id from JWT token if present
+            user_id = get_optional_user_id(authorization)
+            span.set_attribute("user.authenticated", user_id is not None)
+            
+            if idempotency_key:
+                # Deduplicate client retries: run once, attach concurrent duplicates, replay later ones
+                async def execute() -> dict:
+                    return (await generate_and_persist_roast(request, user_id, deadline)).model_dump()
+                
+                fingerprint = hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+                response_data, replayed = await idempotency_service.run(
+                    f"{user_id or 'anonymous'}:{idempotency_key}",
+                    fingerprint,
+                    execute,
+                    max_wait=deadline.remaining()
+                )
+                roast_response = RoastResponse(**response_data)
+                span.set_attribute("idempotency.replayed", replayed)
+                if replayed:
+                    logger.info(f"Replaying stored roast for Idempotency-Key {idempotency_key}")
+                    response.headers["Idempotent-Replayed"] = "true"
             else:
-                logger.warning(f"⚠️ Failed to save roast for {request.startup_name} to database")
-        except Exception as db_error:
-            # Log the database error but don't raise - user must get their roast
-            logger.error(f"❌ Database save error for {request.startup_name}: {str(db_error)}")
-        
-        return roast_response
+                roast_response = await generate_and_persist_roast(request, user_id, deadline)
+            
+            response.headers["Server-Timing"] = deadline.server_timing()
+            if span.sampled:
+                response.headers["traceparent"] = span.traceparent
+            return roast_response
+            
+        except HTTPException as http_error:
+            # Re-raise HTTPExceptions from the service (they already have proper status codes)
+            span.set_attribute("http.status_code", http_error.status_code)
+            if http_error.status_code == 504:
+                logger.error(f"Deadline exceeded for {request.startup_name} after {deadline.elapsed():.1f}s - stage timings: {deadline.server_timing()}")
+            raise
         
-    except HTTPException:
-        # Re-raise HTTPExceptions from the service (they already have proper status codes)
-        raise
-    
-    except Exception as e:
-        # Handle any unexpected errors not caught by the service
-        logger.error(f"Unexpected error in roast endpoint for {request.startup_name}: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail="An unexpected error occurred while processing your roast request. Please try again."
-        )
\ No newline at end of file
+        except Exception as e:
+            # Handle any unexpected errors not caught by the service
+            logger.error(f"Unexpected error in roast endpoint for {request.startup_name}: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="An unexpected error occurred while processing your roast request. Please try again."
+            )
\ No newline at end of file
@@ -0,0 +1 @@
+# Middleware module
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+Request correlation ids
+
+Every HTTP request gets a correlation id: the caller's X-Request-ID when it is a
+short token, otherwise a fresh one. It is stored in a context variable, so every
+log line written while serving the request carries it, and it is echoed back in
+the X-Request-ID response header.
+"""
+
+import re
+import uuid
+
+from app.services.structured_logging import correlation_id
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Accepted caller-supplied ids (anything else is replaced so log lines stay clean)
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+
+class CorrelationIdMiddleware:
+    """ASGI middleware binding a correlation id to each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex[:16]
+        encoded = request_id.encode()
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER, encoded)]
+            await send(message)
+
+        token = correlation_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            correlation_id.reset(token)
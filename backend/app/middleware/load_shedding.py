@@ -0,0 +1,167 @@
+"""
+Adaptive load shedding for expensive routes
+
+When the worker is saturated, new roast requests would otherwise queue behind
+the generation admission limit and time out together. This middleware rejects
+them up front with 503 and a jittered Retry-After while any live overload
+signal is tripped:
+
+- event loop lag (from the loop monitor) over SHED_LOOP_LAG_MS
+- requests queued for a generation slot at or over SHED_MAX_QUEUED, i.e. every
+  slot has a Gemini call in flight and a backlog is forming
+- the longest admission wait over SHED_MAX_QUEUE_WAIT_SECONDS
+
+Only POST requests to SHED_PATHS are considered, so /health, /, history,
+search, shares and job polling always pass. An overloaded /roast is still let
+through when it can be answered from cache: an Idempotency-Key that is running
+or stored, or a near-duplicate idea already roasted.
+"""
+
+import json
+import logging
+import random
+from typing import Optional, Tuple
+
+from app.config.settings import settings
+from app.routes.auth import get_optional_user_id
+from app.schemas.roast import RoastRequest
+from app.services.idempotency import idempotency_service
+from app.services.loop_monitor import loop_monitor
+from app.services.metrics_service import metrics
+from app.services.near_duplicates import near_duplicate_index
+from app.services.roast_service import get_roast_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bodies larger than this are never peeked for a cached answer
+MAX_PEEK_BODY_BYTES = 64 * 1024
+
+
+def _header(scope: dict, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class LoadShedder:
+    """Reads the live overload signals and keeps shedding counts"""
+
+    def __init__(self):
+        self.shed = 0
+        self.served_from_cache = 0
+
+    def overload_reason(self) -> Optional[str]:
+        """Name of the first tripped overload signal, or None if there is headroom"""
+        if settings.shed_loop_lag_ms > 0 and loop_monitor.current_lag() * 1000 > settings.shed_loop_lag_ms:
+            return "loop_lag"
+
+        roast_service = get_roast_service(create=False)
+        if roast_service is None:
+            return None
+        _, queued, oldest_wait = roast_service.admission_status()
+        if settings.shed_max_queued > 0 and queued >= settings.shed_max_queued:
+            return "generations_saturated"
+        if settings.shed_max_queue_wait_seconds > 0 and oldest_wait > settings.shed_max_queue_wait_seconds:
+            return "queue_wait"
+        return None
+
+    def retry_after(self) -> int:
+        """Jittered so rejected clients do not all come back in the same second"""
+        base = settings.shed_retry_after_seconds
+        return random.randint(base, 2 * base)
+
+    def status(self) -> dict:
+        """Shedding state for /health"""
+        return {
+            "overloaded": self.overload_reason(),
+            "shed": self.shed,
+            "served_from_cache": self.served_from_cache,
+        }
+
+
+class LoadSheddingMiddleware:
+    """ASGI middleware answering 503 to expensive requests while the worker is overloaded"""
+
+    def __init__(self, app):
+        self.app = app
+        self.paths = frozenset(path.strip() for path in settings.shed_paths.split(",") if path.strip())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        reason = load_shedder.overload_reason()
+        if reason is None:
+            return await self.app(scope, receive, send)
+
+        if scope["path"] == "/roast":
+            cached, receive = await self._answerable_from_cache(scope, receive)
+            if cached:
+                load_shedder.served_from_cache += 1
+                metrics.increment("load_shed_cache_bypass_total")
+                return await self.app(scope, receive, send)
+
+        load_shedder.shed += 1
+        metrics.increment("requests_shed_total", labels={"path": scope["path"], "reason": reason})
+        retry_after = load_shedder.retry_after()
+        body = json.dumps({
+            "detail": f"The roaster is at capacity right now. Please retry in {retry_after} seconds."
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _answerable_from_cache(self, scope, receive) -> Tuple[bool, object]:
+        """
+        Check whether a /roast can be served without a new generation
+
+        Returns:
+            Tuple of (cached, receive) where receive replays any body read here
+        """
+        idempotency_key = _header(scope, b"idempotency-key")
+        if idempotency_key:
+            user_id = get_optional_user_id(_header(scope, b"authorization"))
+            if await idempotency_service.has_record(f"{user_id or 'anonymous'}:{idempotency_key}"):
+                return True, receive
+
+        if not settings.near_duplicate_enabled:
+            return False, receive
+
+        chunks, size, more_body = [], 0, True
+        while more_body and size <= MAX_PEEK_BODY_BYTES:
+            message = await receive()
+            if message["type"] != "http.request":
+                return False, receive  # Client went away
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": more_body}
+            return await receive()
+
+        if more_body:
+            return False, replay_receive
+        try:
+            request = RoastRequest.model_validate_json(body)
+        except Exception:
+            return False, replay_receive  # Invalid bodies are shed like any other
+        return near_duplicate_index.contains(request), replay_receive
+
+
+# Global load shedder instance
+load_shedder = LoadShedder()
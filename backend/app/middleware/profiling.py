@@ -0,0 +1,224 @@
+"""
+Opt-in per-request sampling profiler
+
+A request carrying `X-Profile: 1` and a valid X-Admin-Key runs while a sampler
+thread snapshots the event loop thread's Python stack every few milliseconds.
+The samples are saved as folded stacks (one "frame;frame;frame count" line per
+distinct stack), which flamegraph.pl, speedscope and inferno read directly, and
+the response carries the profile id in X-Profile-Id.
+
+The profile is loop-wide, not per-request: the sampler sees whatever the event
+loop thread runs while the request is open, including other concurrent requests
+and background tasks (the response says so with X-Profile-Scope: event-loop).
+Samples taken while the profiled request's own task was running are rooted at
+"request", everything else at "other_tasks", so the flamegraph still shows how
+much of the window belonged to the request. Below that, each stack is rooted at
+a category separating waiting in the event loop from JSON cleaning, pydantic
+validation, logging and other app code. Requests without the header only pay
+a scan of their header list.
+"""
+
+import asyncio
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from types import FrameType
+from typing import List, Optional
+
+from app.config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_KEY_HEADER = b"x-admin-key"
+
+# Profile ids are "<unix time>-<8 hex chars>"; anything else is rejected before touching the filesystem
+PROFILE_ID_PATTERN = re.compile(r"^\d{10}-[0-9a-f]{8}$")
+
+ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    if module == "__init__":
+        module = os.path.basename(os.path.dirname(code.co_filename))
+    return f"{module}:{code.co_name}".replace(";", ":").replace(" ", "_")
+
+
+def _category(frames: List[FrameType]) -> str:
+    """Classify a stack (root first) by the innermost frame that belongs to a known cost centre"""
+    for frame in reversed(frames):
+        filename, name = frame.f_code.co_filename, frame.f_code.co_name
+        if f"{os.sep}logging{os.sep}" in filename:
+            return "logging"
+        if "pydantic" in filename:
+            return "pydantic_validation"
+        if name == "_clean_json_response" or f"{os.sep}json{os.sep}" in filename:
+            return "json_cleaning"
+    return "app"
+
+
+def fold_stack(frame: FrameType) -> str:
+    """
+    Turn the loop thread's current frame into one folded-stack line (without the count)
+
+    Frames below the event loop's callback dispatch (interpreter start-up, uvicorn,
+    asyncio.run) are dropped, so stacks start at the running task or callback.
+    """
+    frames: List[FrameType] = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+
+    # Handle._run is where the loop hands control to a task step or callback
+    dispatch = None
+    for index, candidate in enumerate(frames):
+        if candidate.f_code.co_name == "_run" and candidate.f_code.co_filename.startswith(ASYNCIO_DIR):
+            dispatch = index
+    if dispatch is None:
+        leaf = frames[-1].f_code.co_filename if frames else ""
+        idle = leaf.endswith("selectors.py") or leaf.startswith(ASYNCIO_DIR)
+        return "event_loop_idle" if idle else "event_loop;" + ";".join(_frame_label(f) for f in frames[-8:])
+
+    task_frames = frames[dispatch + 1:]
+    if not task_frames:
+        return "event_loop"
+    return ";".join([_category(task_frames)] + [_frame_label(f) for f in task_frames])
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack at a fixed interval until stopped
+
+    With a loop and task given, busy samples are rooted at "request" when that
+    task was the one running and at "other_tasks" otherwise.
+    """
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval_seconds: float,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        task: Optional[asyncio.Task] = None,
+    ):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.loop = loop
+        self.task = task
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = fold_stack(frame)
+            if self.task is not None and not stack.startswith("event_loop"):
+                owner = "request" if asyncio.current_task(self.loop) is self.task else "other_tasks"
+                stack = f"{owner};{stack}"
+            self.samples[stack] += 1
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        return self.samples
+
+
+def _header(scope: dict, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a stored profile, or None if the id is malformed"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    return os.path.join(settings.profile_dir, f"{profile_id}.folded")
+
+
+def read_profile(path: str) -> str:
+    with open(path, encoding="utf-8") as profile:
+        return profile.read()
+
+
+def _write_profile(path: str, samples: Counter) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as profile:
+        for stack, count in samples.most_common():
+            profile.write(f"{stack} {count}\n")
+
+    # Keep the newest PROFILE_MAX_FILES (ids start with their epoch second, so names sort by age)
+    profiles = sorted(
+        name for name in os.listdir(directory)
+        if name.endswith(".folded") and PROFILE_ID_PATTERN.match(name[:-len(".folded")])
+    )
+    for name in profiles[:max(0, len(profiles) - settings.profile_max_files)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass  # Already pruned by another worker
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running admin-flagged requests under the stack sampler"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _header(scope, PROFILE_HEADER) not in (b"1", b"true"):
+            return await self.app(scope, receive, send)
+
+        admin_key = _header(scope, ADMIN_KEY_HEADER)
+        if not settings.admin_api_key or admin_key is None or not hmac.compare_digest(
+            admin_key, settings.admin_api_key.encode()
+        ):
+            # Not an admin: serve the request normally rather than reveal the flag exists
+            return await self.app(scope, receive, send)
+
+        profile_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode()),
+                    (b"x-profile-scope", b"event-loop"),
+                ]
+            await send(message)
+
+        sampler = StackSampler(
+            threading.get_ident(),
+            settings.profile_sample_interval_ms / 1000,
+            loop=asyncio.get_running_loop(),
+            task=asyncio.current_task(),
+        )
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            samples = sampler.stop()
+            elapsed = time.perf_counter() - started
+            path = profile_path(profile_id)
+            try:
+                await asyncio.to_thread(_write_profile, path, samples)
+                logger.info(
+                    f"✅ Profiled {scope['method']} {scope['path']} in {elapsed:.3f}s: "
+                    f"{sum(samples.values())} samples saved as {profile_id}"
+                )
+            except Exception as e:
+                logger.error(f"❌ Failed to save profile {profile_id}: {str(e)}")
@@ -0,0 +1,263 @@
+"""
+Admin routes for RoastMyStartup API
+
+Every route here requires the X-Admin-Key header to match ADMIN_API_KEY; with
+no key configured the admin API is disabled.
+
+/admin/export streams the roasts table as NDJSON or CSV. It walks the table in
+keyset pages and yields rows as it goes, so memory use stays flat regardless of
+table size. Every row carries the cursor to resume from after a disconnect.
+
+/admin/search/reindex rebuilds the local search index from the database.
+
+/admin/usage aggregates the Gemini usage ledger per user, roast level, model or day.
+
+/admin/profiles/{profile_id} serves a folded-stack profile recorded for a
+request sent with the X-Profile header (see app/middleware/profiling.py).
+"""
+
+import asyncio
+import csv
+import hmac
+import io
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Iterable, List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from app.config.settings import settings
+from app.middleware.profiling import profile_path, read_profile
+from app.services.db_service import get_db_service
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search_index import roast_search_index
+from app.services.usage_ledger import usage_ledger
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize router
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+# Column order of CSV exports
+EXPORT_COLUMNS = [
+    "id", "user_id", "created_at", "startup_name", "idea_description", "target_users", "budget",
+    "roast_level", "model", "brutal_roast", "honest_feedback", "competitor_reality_check",
+    "survival_tips", "pitch_rewrite", "cursor",
+]
+
+
+def require_admin(x_admin_key: Optional[str]) -> None:
+    """
+    Check the X-Admin-Key header against the configured admin key
+
+    Raises:
+        HTTPException: 404 if the admin API is disabled, 403 if the key is wrong
+    """
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, settings.admin_api_key):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+
+def _to_db_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """Roasts store naive UTC ISO timestamps; convert filters to the same form"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _ndjson_lines(rows: Iterable[dict]) -> str:
+    return "".join(json.dumps({**row, "cursor": encode_cursor(row)}) + "\n" for row in rows)
+
+
+def _csv_lines(rows: Iterable[dict], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        row = {**row, "survival_tips": json.dumps(row.get("survival_tips") or []), "cursor": encode_cursor(row)}
+        writer.writerow([row.get(column) for column in EXPORT_COLUMNS])
+    return buffer.getvalue()
+
+
+async def _export_rows(
+    export_format: str,
+    after: Optional[Tuple[str, str]],
+    filters: dict,
+    compress: bool,
+) -> AsyncIterator[bytes]:
+    """Yield the export one keyset page at a time (optionally as one gzip stream)"""
+    db_service = await get_db_service()
+    # wbits=31 writes a gzip container; each page is sync-flushed so partial downloads stay readable
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    exported = 0
+    write_header = after is None  # Resumed CSV exports append to the rows already received
+
+    while True:
+        rows: Optional[List[dict]] = await db_service.list_roasts(settings.export_page_size, after=after, **filters)
+        if rows is None:
+            # Abort the response so the client sees a truncated transfer and resumes from its last cursor
+            raise RuntimeError(f"Roast export failed after {exported} rows - database query failed")
+
+        if export_format == "csv":
+            chunk = _csv_lines(rows, header=write_header)
+        else:
+            chunk = _ndjson_lines(rows)
+        write_header = False
+
+        data = chunk.encode()
+        if compressor is not None:
+            data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+
+        exported += len(rows)
+        if len(rows) < settings.export_page_size:
+            break
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+    if compressor is not None:
+        yield compressor.flush()
+    logger.info(f"Roast export finished: {exported} rows ({export_format}{', gzip' if compress else ''})")
+
+
+@router.get("/export")
+async def export_roasts(
+    x_admin_key: Optional[str] = Header(None),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    since: Optional[datetime] = Query(None, description="Only roasts created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only roasts created before this time"),
+    roast_level: Optional[Literal["Soft", "Medium", "Nuclear"]] = Query(None),
+    user_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Resume after the row carrying this cursor"),
+    gzip: bool = Query(False, description="Compress the stream (Content-Encoding: gzip)"),
+):
+    """
+    Stream roasts oldest first as NDJSON or CSV (admin only).
+
+    Every row carries a cursor; after a disconnect, repeat the request with the
+    same filters and cursor=<last cursor received> to continue where it stopped.
+    """
+    require_admin(x_admin_key)
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    filters = {
+        "since": _to_db_timestamp(since),
+        "until": _to_db_timestamp(until),
+        "roast_level": roast_level,
+        "user_id": user_id,
+    }
+    logger.info(f"Starting roast export: format={export_format}, filters={filters}, resume={bool(cursor)}, gzip={gzip}")
+
+    headers = {"Content-Disposition": f'attachment; filename="roasts-export.{export_format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _export_rows(export_format, after, filters, gzip),
+        media_type="text/csv" if export_format == "csv" else "application/x-ndjson",
+        headers=headers
+    )
+
+
+async def _roast_pages() -> AsyncIterator[List[dict]]:
+    """Every roast, oldest first, one keyset page at a time"""
+    db_service = await get_db_service()
+    after: Optional[Tuple[str, str]] = None
+    while True:
+        rows = await db_service.list_roasts(settings.export_page_size, after=after)
+        if rows is None:
+            raise HTTPException(status_code=503, detail="Reindex aborted - database connection issue")
+        if rows:
+            yield rows
+        if len(rows) < settings.export_page_size:
+            return
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+@router.post("/search/reindex")
+async def reindex_search(
+    x_admin_key: Optional[str] = Header(None),
+    reset: bool = Query(False, description="Empty the index first instead of only adding missing roasts"),
+):
+    """
+    Bring the local search index up to date with the database (admin only).
+
+    Roasts already indexed are skipped, so this is safe to repeat.
+    """
+    require_admin(x_admin_key)
+    if not roast_search_index.enabled:
+        raise HTTPException(status_code=503, detail="Roast search is disabled")
+
+    logger.info(f"Reindexing roast search (reset={reset})")
+    added = await roast_search_index.reindex(_roast_pages(), reset=reset)
+    logger.info(f"✅ Roast search reindexed: {added} roasts added")
+    return {"indexed": added}
+
+
+@router.get("/usage")
+async def get_usage(
+    x_admin_key: Optional[str] = Header(None),
+    group_by: Literal["user", "roast_level", "model", "day"] = Query("user"),
+    since: Optional[datetime] = Query(None, description="Range start (default: 7 days ago)"),
+    until: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    Gemini token usage, latency and retries aggregated per group, most tokens first (admin only).
+
+    Group by user to find heavy users; by model or day to spot prompt changes
+    that drive tokens and latency up.
+    """
+    require_admin(x_admin_key)
+    if not usage_ledger.enabled:
+        raise HTTPException(status_code=503, detail="Usage ledger is disabled")
+
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(days=7)
+    if until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    groups = await usage_ledger.summary(group_by, since.timestamp(), until.timestamp(), limit)
+    if groups is None:
+        raise HTTPException(status_code=503, detail="Usage ledger unavailable")
+    return {
+        "group_by": group_by,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "groups": groups,
+    }
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_admin_key: Optional[str] = Header(None)):
+    """
+    Folded stacks of a profiled request, ready for flamegraph.pl, speedscope or inferno
+
+    Args:
+        profile_id: Value of the X-Profile-Id response header
+
+    Raises:
+        HTTPException: 404 if no such profile was saved
+    """
+    require_admin(x_admin_key)
+
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    try:
+        return PlainTextResponse(await asyncio.to_thread(read_profile, path))
+    except OSError:
+        raise HTTPException(status_code=404, detail="Profile not found")
@@ -11,11 +11,12 @@ import os
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
-import requests
 import jwt
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import RedirectResponse
 
+from app.services.db_service import get_db_service
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -91,6 +92,64 @@ def create_jwt_token(user_id: str, email: str, name: str, provider: str = "googl
     return token
 
 
+def get_optional_user_id(authorization: Optional[str]) -> Optional[str]:
+    """
+    Extract the user_id from a Bearer JWT, if present and valid
+    
+    Args:
+        authorization: Value of the Authorization header
+        
+    Returns:
+        The user's UUID, or None for anonymous / invalid tokens (and for every
+        token when JWT_SECRET_KEY is unset, since none can be verified)
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    
+    if not JWT_SECRET_KEY:
+        logger.warning("JWT_SECRET_KEY not configured - proceeding as anonymous user")
+        return None
+    
+    try:
+        token = authorization.replace("Bearer ", "")
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        user_id = payload.get("user_id")
+        logger.info(f"Authenticated user_id: {user_id}")
+        return user_id
+    except jwt.ExpiredSignatureError:
+        logger.warning("JWT token expired - proceeding as anonymous user")
+    except jwt.InvalidTokenError as e:
+        logger.warning(f"Invalid JWT token: {str(e)} - proceeding as anonymous user")
+    except Exception as e:
+        logger.warning(f"JWT decode error: {str(e)} - proceeding as anonymous user")
+    return None
+
+
+def get_required_user_id(authorization: Optional[str]) -> str:
+    """
+    Extract the user_id from a Bearer JWT, rejecting anonymous requests
+    
+    Args:
+        authorization: Value of the Authorization header
+        
+    Returns:
+        The user's UUID
+        
+    Raises:
+        HTTPException: 503 if JWT_SECRET_KEY is not configured, 401 if the token is missing, invalid or expired
+    """
+    if not JWT_SECRET_KEY:
+        raise HTTPException(status_code=503, detail="Authentication is not configured")
+    user_id = get_optional_user_id(authorization)
+    if not user_id:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user_id
+
+
 @router.get("/google")
 async def google_login():
     """
@@ -149,6 +208,9 @@ async def google_callback(request: Request, code: Optional[str] = None, error: O
         code: Authorization code from Google
         error: Error message if OAuth failed
     """
+    # Deferred: requests is only needed on the OAuth callback path
+    import requests
+    
     try:
         # Check if Google returned an error
         if error:
@@ -217,8 +279,8 @@ async def google_callback(request: Request, code: Optional[str] = None, error: O
         
         # Persist user to database (upsert to handle returning users)
         try:
-            from app.services.db_service import db_service
-            user_id = db_service.upsert_user(
+            db_service = await get_db_service()
+            user_id = await db_service.upsert_user(
                 email=email, 
                 name=name, 
                 provider_id=provider_id,
@@ -228,7 +290,7 @@ async def google_callback(request: Request, code: Optional[str] = None, error: O
             logger.info(f"User {email} persisted to database with ID: {user_id}")
             
             # Log the login event
-            db_service.log_login_event(
+            await db_service.log_login_event(
                 user_id=user_id,
                 provider="google",
                 ip_address=request.client.host if hasattr(request, 'client') else None,
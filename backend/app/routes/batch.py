@@ -0,0 +1,115 @@
+"""
+Batch roast routes for RoastMyStartup API
+
+/roast/batch roasts a whole cohort in one request. Items run through the shared
+RoastService admission limits with bounded per-batch concurrency, results are
+streamed back as NDJSON as each one finishes, and all successful roasts are
+persisted with a single bulk insert.
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.config.settings import settings
+from app.routes.auth import get_optional_user_id
+from app.schemas.roast import RoastBatchRequest, RoastRequest, RoastResponse
+from app.services.db_service import get_db_service
+from app.services.deadline import Deadline
+from app.services.roast_service import get_roast_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize router
+router = APIRouter(prefix="/roast", tags=["roast"])
+
+# Saves outliving their stream (referenced so they are not garbage collected mid-flight)
+_background_saves: Set[asyncio.Task] = set()
+
+
+async def _roast_item(index: int, item: RoastRequest, semaphore: asyncio.Semaphore, user_id: Optional[str]) -> Tuple[int, RoastRequest, dict, Optional[RoastResponse]]:
+    """
+    Roast a single batch item, turning failures into per-item error lines
+
+    Returns:
+        Tuple of (index, request, NDJSON line, response or None on failure)
+    """
+    async with semaphore:
+        # Each item gets its own deadline, started once it is actually scheduled
+        deadline = Deadline(settings.roast_deadline_seconds)
+        try:
+            result = await get_roast_service().analyze_startup(item, deadline=deadline, user_id=user_id)
+            return index, item, {"index": index, "status": "ok", "result": result.model_dump()}, result
+        except HTTPException as e:
+            return index, item, {"index": index, "status": "error", "status_code": e.status_code, "error": e.detail}, None
+        except Exception as e:
+            logger.error(f"Unexpected error roasting batch item {index} ({item.startup_name}): {str(e)}")
+            return index, item, {"index": index, "status": "error", "status_code": 500, "error": "Unexpected error"}, None
+
+
+async def _save_in_background(completed: List[Tuple[RoastRequest, RoastResponse]], user_id: Optional[str]) -> None:
+    """Persist roasts of a batch whose stream closed before the final bulk insert"""
+    db_service = await get_db_service()
+    await db_service.save_roasts_bulk(completed, user_id)
+
+
+async def _stream_batch(items: List[RoastRequest], user_id: Optional[str]) -> AsyncIterator[bytes]:
+    """Run the batch and yield one NDJSON line per item as it completes, then a summary line"""
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+    tasks = [asyncio.create_task(_roast_item(index, item, semaphore, user_id)) for index, item in enumerate(items)]
+    completed: List[Tuple[RoastRequest, RoastResponse]] = []
+    persisted = False
+    failed = 0
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, item, line, result = await next_done
+            if result is not None:
+                completed.append((item, result))
+            else:
+                failed += 1
+            yield (json.dumps(line) + "\n").encode()
+
+        # Persist every successful roast with one bulk insert
+        db_service = await get_db_service()
+        saved = await db_service.save_roasts_bulk(completed, user_id)
+        persisted = True
+
+        summary = {"total": len(items), "succeeded": len(completed), "failed": failed, "saved": saved}
+        logger.info(f"Batch roast finished: {summary}")
+        yield (json.dumps({"summary": summary}) + "\n").encode()
+
+    finally:
+        # Client went away: stop outstanding work but keep what was already generated
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if not persisted and completed:
+            logger.warning(f"Batch stream closed early - saving {len(completed)} completed roasts in background")
+            save_task = asyncio.get_running_loop().create_task(_save_in_background(completed, user_id))
+            _background_saves.add(save_task)
+            save_task.add_done_callback(_background_saves.discard)
+
+
+@router.post("/batch")
+async def roast_batch(batch: RoastBatchRequest, authorization: Optional[str] = Header(None)):
+    """
+    Roast many startups in one request and stream the results as NDJSON.
+
+    Each line is either {"index", "status": "ok", "result"} or
+    {"index", "status": "error", "status_code", "error"}; lines arrive in completion
+    order, not submission order. A final {"summary"} line reports totals and how many
+    roasts were saved. Per-item errors never fail the batch.
+    """
+    user_id = get_optional_user_id(authorization)
+    logger.info(f"Processing batch roast of {len(batch.items)} startups (user_id: {user_id or 'anonymous'})")
+
+    return StreamingResponse(
+        _stream_batch(batch.items, user_id),
+        media_type="application/x-ndjson"
+    )
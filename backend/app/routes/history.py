@@ -0,0 +1,93 @@
+"""
+Roast history routes for RoastMyStartup API
+
+/me/roasts lists the signed-in user's roasts newest first, using keyset
+pagination on (created_at, id) and a lightweight projection. /roasts/{roast_id}
+returns one of the user's roasts in full. Pages are cached per user for a short
+TTL and dropped whenever that user saves a new roast.
+"""
+
+import logging
+import uuid
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Query
+
+from app.config.settings import settings
+from app.routes.auth import get_required_user_id
+from app.schemas.roast import RoastHistoryPage, StoredRoast
+from app.services.db_service import DatabaseUnavailable, get_db_service
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.roast_history import roast_history_cache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize router
+router = APIRouter(tags=["history"])
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/me/roasts", response_model=RoastHistoryPage)
+async def list_my_roasts(
+    authorization: Optional[str] = Header(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(settings.roast_history_page_size, ge=1, le=100),
+):
+    """
+    List the authenticated user's roasts, newest first.
+
+    Items carry only summary fields; fetch GET /roasts/{id} for the full roast.
+    Follow next_cursor until it is null to walk the whole history.
+    """
+    user_id = get_required_user_id(authorization)
+
+    page = roast_history_cache.get(user_id, cursor, limit)
+    if page is not None:
+        return page
+
+    before = _decode_cursor(cursor) if cursor else None
+    generation = roast_history_cache.generation()
+    db_service = await get_db_service()
+    # One extra row tells us whether another page exists
+    rows = await db_service.list_user_roasts(user_id, limit + 1, before=before)
+    if rows is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Roast history unavailable - database connection issue"
+        )
+
+    items = rows[:limit]
+    page = {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1]) if len(rows) > limit else None,
+    }
+    roast_history_cache.set(user_id, cursor, limit, page, generation)
+    return page
+
+
+@router.get("/roasts/{roast_id}", response_model=StoredRoast)
+async def get_my_roast(roast_id: str, authorization: Optional[str] = Header(None)):
+    """Get one of the authenticated user's roasts in full"""
+    user_id = get_required_user_id(authorization)
+
+    try:
+        roast_id = str(uuid.UUID(roast_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Roast not found")
+
+    db_service = await get_db_service()
+    try:
+        roast = await db_service.get_roast(roast_id)
+    except DatabaseUnavailable:
+        raise HTTPException(status_code=503, detail="Roast unavailable - database connection issue")
+    # Other users' roasts are reported as missing rather than forbidden
+    if roast is None or roast.get("user_id") != user_id:
+        raise HTTPException(status_code=404, detail="Roast not found")
+    return roast
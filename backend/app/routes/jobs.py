@@ -0,0 +1,69 @@
+"""
+Asynchronous roast job routes for RoastMyStartup API
+
+/roast/jobs queues a roast and returns a job id immediately, so clients do not
+hold a connection open for the whole LLM generation. /roast/jobs/{job_id}
+reports the job's state and supports long-polling via the ``wait`` parameter.
+"""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse
+
+from app.config.settings import settings
+from app.routes.auth import get_optional_user_id
+from app.schemas.roast import RoastRequest
+from app.services.job_service import job_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize router
+router = APIRouter(prefix="/roast/jobs", tags=["roast"])
+
+
+def _job_view(job: dict) -> dict:
+    """Public representation of a job (payload and user linkage stay private)"""
+    view = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "expires_at": job["expires_at"],
+    }
+    if job["status"] == "succeeded":
+        view["result"] = job["result"]
+    elif job["status"] == "failed":
+        view["error"] = {"status_code": job["status_code"], "detail": job["error"]}
+    return view
+
+
+@router.post("", status_code=202)
+async def create_roast_job(request: RoastRequest, authorization: Optional[str] = Header(None)):
+    """
+    Queue a roast and return its job id immediately.
+
+    Poll GET /roast/jobs/{job_id} (optionally with ?wait=N to long-poll) for the result.
+    """
+    user_id = get_optional_user_id(authorization)
+    job_id = await job_service.submit(request, user_id)
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "status": "queued", "poll_url": f"/roast/jobs/{job_id}"},
+        headers={"Location": f"/roast/jobs/{job_id}"}
+    )
+
+
+@router.get("/{job_id}")
+async def get_roast_job(job_id: str, wait: float = Query(0, ge=0, description="Seconds to long-poll for completion")):
+    """
+    Get a roast job's status and, once finished, its result or error.
+
+    With wait > 0 the request is held until the job finishes or the wait elapses
+    (capped by the server's maximum poll time).
+    """
+    job = await job_service.wait_for_job(job_id, timeout=min(wait, settings.job_max_poll_seconds))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _job_view(job)
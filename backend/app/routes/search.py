@@ -0,0 +1,63 @@
+"""
+Roast search routes for RoastMyStartup API
+
+/roasts/search finds roasts by keyword in their startup name, idea description
+and brutal roast, best BM25 match first. Queries hit the local full-text index,
+never the roasts table. Users search their own roasts; a valid X-Admin-Key
+searches every roast.
+"""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+
+from app.config.settings import settings
+from app.routes.admin import require_admin
+from app.routes.auth import get_required_user_id
+from app.schemas.roast import RoastSearchPage
+from app.services.search_index import roast_search_index
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Relevance ranking makes deep pages meaningless; this also bounds the OFFSET scan
+MAX_SEARCH_OFFSET = 1000
+
+# Initialize router (registered before the history router so /roasts/search wins over /roasts/{roast_id})
+router = APIRouter(tags=["search"])
+
+
+@router.get("/roasts/search", response_model=RoastSearchPage)
+async def search_roasts(
+    q: str = Query(..., min_length=1, max_length=200, description='Keywords; "quoted phrases" and prefix* are supported'),
+    limit: int = Query(settings.search_page_size, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    authorization: Optional[str] = Header(None),
+    x_admin_key: Optional[str] = Header(None),
+):
+    """
+    Search roasts by keyword, best match first.
+
+    Every term must match. Follow next_offset until it is null to page through results.
+    """
+    if x_admin_key is not None:
+        require_admin(x_admin_key)
+        user_id = None
+    else:
+        user_id = get_required_user_id(authorization)
+
+    # One extra row tells us whether another page exists
+    rows = await roast_search_index.search(q, limit + 1, offset=offset, user_id=user_id)
+    if rows is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Roast search unavailable - search index issue"
+        )
+
+    items = rows[:limit]
+    has_more = len(rows) > limit and offset + limit <= MAX_SEARCH_OFFSET
+    return {
+        "items": items,
+        "next_offset": offset + limit if has_more else None,
+    }
@@ -0,0 +1,56 @@
+"""
+Public roast permalink routes for RoastMyStartup API
+
+/r/{roast_id} serves a stored roast to anyone holding the link. Responses carry
+a strong ETag and CDN-friendly Cache-Control, conditional requests get a 304,
+and hot roasts are served from an in-process LRU without touching the database.
+"""
+
+import logging
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response
+
+from app.config.settings import settings
+from app.services.db_service import DatabaseUnavailable
+from app.services.share_service import share_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize router
+router = APIRouter(tags=["share"])
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored, * matches anything"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate == "*" or candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+@router.get("/r/{roast_id}")
+async def get_shared_roast(roast_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Get a shared roast by its permalink id (no authentication required).
+
+    Send the ETag back in If-None-Match to get a 304 when the client copy is current.
+    """
+    try:
+        roast_id = str(uuid.UUID(roast_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Roast not found")
+
+    try:
+        shared = await share_service.get(roast_id)
+    except DatabaseUnavailable:
+        raise HTTPException(status_code=503, detail="Roast unavailable - database connection issue")
+    if shared is None:
+        raise HTTPException(status_code=404, detail="Roast not found")
+
+    headers = {"ETag": shared.etag, "Cache-Control": settings.share_cache_control}
+    if _etag_matches(if_none_match, shared.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=shared.body, media_type="application/json", headers=headers)
@@ -0,0 +1,87 @@
+"""
+Roast analytics routes for RoastMyStartup API
+
+/stats/timeseries serves roast volume, roast level mix, the anonymous vs
+authenticated split and failure rates per minute, hour or day. Points come from
+rollups maintained as roasts are saved, so queries never scan the roasts table.
+
+/stats/trending serves the most roasted idea terms and startup names over a
+sliding window from streaming heavy-hitter summaries.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.config.settings import settings
+from app.services.roast_rollups import roast_rollups
+from app.services.trending import trending_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize router
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+# Range returned when the client sends no `since`
+DEFAULT_WINDOWS = {
+    "minute": timedelta(hours=1),
+    "hour": timedelta(days=1),
+    "day": timedelta(days=30),
+}
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+@router.get("/timeseries")
+async def get_roast_timeseries(
+    resolution: Literal["minute", "hour", "day"] = Query("minute"),
+    since: Optional[datetime] = Query(None, description="Range start (default: 1 hour, 1 day or 30 days ago)"),
+    until: Optional[datetime] = Query(None, description="Range end (default: now)"),
+):
+    """
+    Get roast counts, level mix, auth split and failure rates over time.
+
+    Minute buckets reach back 24 hours, hour buckets 30 days and day buckets a
+    year. Counts cover roasts handled by this worker since it started.
+    """
+    until = _as_utc(until) if until else datetime.now(timezone.utc)
+    since = _as_utc(since) if since else until - DEFAULT_WINDOWS[resolution]
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be earlier than until")
+
+    # Rollups hold nothing in the future, and anything older than the ring buffer has been overwritten
+    now = datetime.now(timezone.utc)
+    oldest = now - timedelta(seconds=roast_rollups.max_range_seconds(resolution))
+    if since >= now or until <= oldest:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{resolution} resolution only covers {oldest.isoformat()} to {now.isoformat()}"
+        )
+    since, until = max(since, oldest), min(until, now)
+    points = roast_rollups.query(resolution, since.timestamp(), until.timestamp())
+
+    return {
+        "resolution": resolution,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "points": points,
+    }
+
+
+@router.get("/trending")
+async def get_trending(
+    window: Literal["1h", "24h"] = Query("1h"),
+    limit: int = Query(10, ge=1, le=settings.trending_top_k),
+):
+    """
+    Get the most roasted themes: top idea terms and startup names of the window.
+
+    Counts are Space-Saving estimates for this worker; each item reports the most
+    its count may be overstated by.
+    """
+    return {"window": window, **trending_service.trending(window, limit)}
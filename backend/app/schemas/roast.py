@@ -1,4 +1,4 @@
-from typing import List, Literal
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -29,6 +29,7 @@ class RoastResponse(BaseModel):
     competitor_reality_check: str = Field(..., description="Analysis of competitive landscape")
     survival_tips: List[str] = Field(..., description="Actionable advice for improvement")
     pitch_rewrite: str = Field(..., description="Improved version of the pitch")
+    model: Optional[str] = Field(None, description="Gemini model that generated this roast")
 
     class Config:
         json_schema_extra = {
@@ -41,6 +42,49 @@ class RoastResponse(BaseModel):
                     "Focus on real emotional wellness solutions",
                     "Consider B2B applications for stress relief"
                 ],
-                "pitch_rewrite": "We provide mindfulness and stress-relief solutions through tactile meditation tools..."
+                "pitch_rewrite": "We provide mindfulness and stress-relief solutions through tactile meditation tools...",
+                "model": "gemini-2.5-flash"
             }
-        }
\ No newline at end of file
+        }
+
+class RoastBatchRequest(BaseModel):
+    """Request schema for roasting many startups in one call (e.g. an accelerator cohort)"""
+    items: List[RoastRequest] = Field(..., min_length=1, max_length=500, description="Startups to roast (1-500)")
+
+
+class RoastSummary(BaseModel):
+    """List projection of a stored roast (the generated text is left out)"""
+    id: str
+    startup_name: str
+    roast_level: Optional[str] = None
+    model: Optional[str] = None
+    created_at: str
+
+
+class RoastHistoryPage(BaseModel):
+    """One page of a user's roasts, newest first"""
+    items: List[RoastSummary]
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= to get the next page (null on the last page)")
+
+
+class RoastSearchHit(RoastSummary):
+    """A search result: a roast summary and its relevance"""
+    score: float = Field(..., description="BM25 relevance (higher is better)")
+
+
+class RoastSearchPage(BaseModel):
+    """One page of search results, best match first"""
+    items: List[RoastSearchHit]
+    next_offset: Optional[int] = Field(None, description="Pass as ?offset= to get the next page (null on the last page)")
+
+
+class StoredRoast(RoastResponse):
+    """A persisted roast: the original request, the generated roast and its metadata"""
+    id: str
+    user_id: Optional[str] = None
+    startup_name: str
+    idea_description: str
+    target_users: Optional[str] = None
+    budget: Optional[str] = None
+    roast_level: Optional[str] = None
+    created_at: str
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from app.config.settings import settings
+from app.services.metrics_service import metrics
+
+if TYPE_CHECKING:
+    from app.services.db_service import DatabaseService
+    from app.services.roast_service import RoastService
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """Usage of one upstream connection (a pooled HTTP connection or a gRPC channel)"""
+
+    def __init__(self, connection_id: str):
+        self.connection_id = connection_id
+        self.opened = 1
+        self.requests = 0
+        self.reused = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def reuse_ratio(self) -> Optional[float]:
+        return self.reused / self.requests if self.requests else None
+
+
+class ConnectionTracker:
+    """
+    Records which connection served each upstream request and whether it was reused
+
+    A request is "reused" when it ran on a connection that was already open; the
+    reuse ratio (reused / requests) should sit close to 1 when pooling works.
+    """
+
+    def __init__(self, backend: str, max_connections: int = 64):
+        self.backend = backend
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._connections: "OrderedDict[str, ConnectionStats]" = OrderedDict()
+        self.requests = 0
+        self.reused = 0
+        self.connections_opened = 0
+
+    def record(self, connection_id: str, reused: bool) -> None:
+        """
+        Record one request on a connection
+
+        Args:
+            connection_id: Stable label of the connection that served the request
+            reused: False if the connection had to be (re)established for it
+        """
+        with self._lock:
+            stats = self._connections.get(connection_id)
+            if stats is None:
+                stats = self._connections[connection_id] = ConnectionStats(connection_id)
+                self.connections_opened += 1
+                reused = False
+            elif not reused:
+                stats.opened += 1
+                self.connections_opened += 1
+            self._connections.move_to_end(connection_id)
+            while len(self._connections) > self.max_connections:
+                self._connections.popitem(last=False)
+
+            stats.requests += 1
+            stats.last_used = time.monotonic()
+            self.requests += 1
+            if reused:
+                stats.reused += 1
+                self.reused += 1
+
+        metrics.increment(
+            "upstream_requests_total",
+            labels={"backend": self.backend, "connection": "reused" if reused else "new"}
+        )
+
+    def idle_connections(self, idle_seconds: float) -> List[str]:
+        """Connections that have not served a request for at least ``idle_seconds``"""
+        now = time.monotonic()
+        with self._lock:
+            return [conn_id for conn_id, stats in self._connections.items() if now - stats.last_used >= idle_seconds]
+
+    def forget_idle(self, idle_seconds: float) -> None:
+        """Drop connections idle long enough that the pool has certainly closed them"""
+        now = time.monotonic()
+        with self._lock:
+            for conn_id in [conn_id for conn_id, stats in self._connections.items() if now - stats.last_used >= idle_seconds]:
+                del self._connections[conn_id]
+
+    def status(self) -> Dict[str, Any]:
+        """Report pool-wide and per-connection reuse ratios"""
+        now = time.monotonic()
+        with self._lock:
+            connections = list(self._connections.values())
+            reuse_ratio = self.reused / self.requests if self.requests else None
+            report = {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "reuse_ratio": round(reuse_ratio, 3) if reuse_ratio is not None else None,
+                "connections": [],
+            }
+
+        if reuse_ratio is not None:
+            metrics.set_gauge("upstream_connection_reuse_ratio", reuse_ratio, labels={"backend": self.backend})
+        for stats in connections:
+            if stats.reuse_ratio is not None:
+                metrics.set_gauge(
+                    "upstream_connection_reuse_ratio",
+                    stats.reuse_ratio,
+                    labels={"backend": self.backend, "connection": stats.connection_id}
+                )
+            report["connections"].append({
+                "id": stats.connection_id,
+                "opened": stats.opened,
+                "requests": stats.requests,
+                "reuse_ratio": round(stats.reuse_ratio, 3) if stats.reuse_ratio is not None else None,
+                "idle_seconds": round(now - stats.last_used, 1),
+            })
+        return report
+
+
+class ConnectionWarmer:
+    """
+    Opens Gemini and Supabase connections at startup and keeps idle ones alive
+
+    Warm-up opens one gRPC channel per Gemini API key and ``pool_size`` pooled
+    Supabase connections. Afterwards, any connection idle for a keep-alive interval
+    gets a cheap ping so load balancers and NAT do not silently drop it.
+    """
+
+    def __init__(self, pool_size: int, keepalive_interval_seconds: float):
+        self.pool_size = pool_size
+        self.keepalive_interval_seconds = keepalive_interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def warm_up(self, roast_service: "RoastService", db_service: "DatabaseService") -> None:
+        """Open every pooled connection before the first request needs it"""
+        started = time.perf_counter()
+        supabase_pool = self.pool_size if db_service.remote else 0  # Embedded backends have nothing to warm
+        await asyncio.gather(
+            self._ping_gemini(roast_service, [key.label for key in roast_service.key_pool.keys]),
+            self._ping_supabase(db_service, supabase_pool),
+        )
+        logger.info(
+            f"✅ Warmed {len(roast_service.key_pool.keys)} Gemini channel(s) and {supabase_pool} "
+            f"Supabase connection(s) in {time.perf_counter() - started:.2f}s"
+        )
+
+    def start(self, roast_service: "RoastService", db_service: "DatabaseService") -> None:
+        """Start pinging idle connections in the background"""
+        if self._task is None and self.keepalive_interval_seconds > 0:
+            self._task = asyncio.create_task(self._keepalive_loop(roast_service, db_service))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _ping_gemini(self, roast_service: "RoastService", key_labels: List[str]) -> None:
+        keys = [key for key in roast_service.key_pool.keys if key.label in key_labels]
+        results = await asyncio.gather(*(roast_service.ping_connection(key) for key in keys), return_exceptions=True)
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Gemini keep-alive ping failed for key {key.label}: {str(result)}")
+
+    async def _ping_supabase(self, db_service: "DatabaseService", count: int) -> None:
+        # Concurrent pings each check out a different pooled connection
+        results = await asyncio.gather(*(db_service.health_check() for _ in range(count)))
+        if not all(results):
+            logger.warning("⚠️ Some Supabase keep-alive pings failed")
+
+    async def _keepalive_loop(self, roast_service: "RoastService", db_service: "DatabaseService") -> None:
+        interval = self.keepalive_interval_seconds
+        while True:
+            await asyncio.sleep(interval / 2)
+            try:
+                idle_keys = gemini_connections.idle_connections(interval)
+                if idle_keys:
+                    await self._ping_gemini(roast_service, idle_keys)
+
+                # Connections idle well past the interval were closed by the pool; pings reopen them
+                supabase_connections.forget_idle(interval * 3)
+                idle_count = len(supabase_connections.idle_connections(interval))
+                if idle_count:
+                    await self._ping_supabase(db_service, min(idle_count, self.pool_size))
+            except Exception as e:
+                logger.error(f"❌ Connection keep-alive failed: {str(e)}")
+
+
+# Global per-backend connection trackers
+gemini_connections = ConnectionTracker("gemini")
+supabase_connections = ConnectionTracker("supabase")
+
+# Global connection warmer instance
+connection_warmer = ConnectionWarmer(
+    pool_size=settings.connection_pool_size,
+    keepalive_interval_seconds=settings.connection_keepalive_interval_seconds
+)
@@ -1,80 +1,204 @@
-import json
+import asyncio
+import importlib
 import logging
 from datetime import datetime
-from typing import Optional
-from supabase import create_client, Client
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from app.config.settings import settings
 from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.connection_pool import supabase_connections
+from app.services.roast_history import roast_history_cache
+from app.services.roast_rollups import roast_rollups
+from app.services.search_index import roast_search_index
+from app.services.tracing import traced
+
+if TYPE_CHECKING:
+    # supabase is slow to import; it is loaded when the service is first built
+    from supabase import AsyncClient
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Lightweight projection for roast lists (the long generated text stays out)
+ROAST_LIST_COLUMNS = ["id", "startup_name", "roast_level", "model", "created_at"]
+
+
+class DatabaseUnavailable(Exception):
+    """Raised by get_roast when the lookup failed, so an outage is not mistaken for a missing roast"""
+
 
-class DatabaseService:
-    """Service for persisting roast data to Supabase"""
+class DatabaseService(ABC):
+    """
+    Storage interface for users, login events and roasts
     
-    def __init__(self):
-        """Initialize the Supabase client"""
-        try:
-            self.supabase: Client = create_client(
-                settings.supabase_url,
-                settings.supabase_key
-            )
-            logger.info("✅ Supabase client initialized successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize Supabase client: {str(e)}")
-            raise
+    Every method is fail-safe: errors are logged and reported through the return
+    value instead of raised, so a storage outage never fails a roast or a login.
+    The one exception is get_roast, whose None already means "no such roast".
+    """
+    
+    # Whether the backend sits behind network connections worth pre-warming
+    remote = True
+    
+    # db.system attribute of the backend's trace spans
+    db_system = "unknown"
+    
+    def __init_subclass__(cls, **kwargs):
+        """Wrap every storage method a backend implements in a db.<method> trace span"""
+        super().__init_subclass__(**kwargs)
+        for name in DatabaseService.__abstractmethods__:
+            method = cls.__dict__.get(name)
+            if method is not None:
+                setattr(cls, name, traced(f"db.{name}", {"db.system": cls.db_system})(method))
+    
+    @abstractmethod
+    async def upsert_user(self, email: str, name: str, provider_id: str, picture: Optional[str] = None, provider: str = "google") -> Optional[str]:
+        """Create or update a user keyed by (provider_id, provider); returns the user's ID or None"""
+    
+    @abstractmethod
+    async def log_login_event(self, user_id: str, provider: str, ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> None:
+        """Log a login event for audit trail"""
     
-    def upsert_user(self, email: str, name: str, provider_id: str, picture: Optional[str] = None, provider: str = "google") -> Optional[str]:
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        """Retrieve a user by email address (None if not found)"""
+    
+    @abstractmethod
+    async def save_roast(self, request: RoastRequest, response: RoastResponse, user_id: Optional[str] = None) -> Optional[dict]:
+        """Save a roast generation; returns the inserted record or None"""
+    
+    @abstractmethod
+    async def save_roasts_bulk(self, roasts: List[Tuple[RoastRequest, RoastResponse]], user_id: Optional[str] = None) -> int:
+        """Save many roast generations at once; returns the number of rows inserted"""
+    
+    @abstractmethod
+    async def list_user_roasts(self, user_id: str, limit: int, before: Optional[Tuple[str, str]] = None) -> Optional[List[dict]]:
         """
-        Create or update a user in the database (idempotent operation)
+        List a user's roasts newest first using keyset pagination
         
         Args:
-            email: User's email address
-            name: User's full name
-            provider_id: Provider's unique user ID (required)
-            picture: User's profile picture URL (optional)
-            provider: OAuth provider (default: "google")
+            user_id: UUID of the user
+            limit: Maximum number of rows
+            before: (created_at, id) of the last row of the previous page
             
         Returns:
-            str: The user's ID if successful, None if failed
+            list: Rows with ROAST_LIST_COLUMNS only, or None if the query failed
+        """
+    
+    @abstractmethod
+    async def list_roasts(
+        self,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        roast_level: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Optional[List[dict]]:
+        """
+        Page through all roasts oldest first using keyset pagination (for exports)
+        
+        Args:
+            limit: Maximum number of rows
+            after: (created_at, id) of the last row of the previous page
+            since: Only roasts created at or after this ISO timestamp
+            until: Only roasts created before this ISO timestamp
+            roast_level: Only roasts of this level
+            user_id: Only roasts of this user
             
-        Note:
-            Uses upsert to handle both new users and returning users.
-            Unique constraint is (provider_id, provider) composite key.
+        Returns:
+            list: Full roast records, or None if the query failed
         """
-        try:
-            user_data = {
-                "provider_id": provider_id,
-                "email": email,
-                "name": name,
-                "picture": picture,
-                "provider": provider,
-                "last_login": datetime.utcnow().isoformat(),
-            }
+    
+    @abstractmethod
+    async def get_roast(self, roast_id: str) -> Optional[dict]:
+        """Retrieve a full roast record by ID (None if not found; raises DatabaseUnavailable on failure)"""
+    
+    @abstractmethod
+    async def get_roast_stats(self) -> Optional[dict]:
+        """Get total and per-level roast counts (None if unavailable)"""
+    
+    @abstractmethod
+    async def health_check(self) -> bool:
+        """Check if the database connection is healthy"""
+    
+    def _roasts_saved(self, user_id: Optional[str], rows: List[dict]) -> None:
+        """Drop cached history pages of a user who just saved roasts, index the new rows for search and roll them up"""
+        if user_id:
+            roast_history_cache.invalidate(user_id)
+        roast_search_index.add(rows)
+        roast_rollups.record_saved(rows)
+    
+    def _roasts_failed(self, count: int) -> None:
+        """Count roasts that could not be saved in the time-series rollups"""
+        roast_rollups.record_failure("persist", count)
+    
+    def _build_roast_record(self, request: RoastRequest, response: RoastResponse, user_id: Optional[str]) -> dict:
+        """Map a roast request/response pair onto a row of the roasts table"""
+        return {
+            # Request fields
+            "startup_name": request.startup_name,
+            "idea_description": request.idea_description,
+            "target_users": request.target_users,
+            "budget": request.budget,
+            "roast_level": request.roast_level,
             
-            logger.info(f"Upserting user to database: {email} (provider: {provider}, provider_id: {provider_id})")
+            # Response fields
+            "brutal_roast": response.brutal_roast,
+            "honest_feedback": response.honest_feedback,
+            "competitor_reality_check": response.competitor_reality_check,
+            "survival_tips": response.survival_tips,  # This will be automatically converted to JSONB
+            "pitch_rewrite": response.pitch_rewrite,
+            "model": response.model,  # Serving Gemini model, for quality audits
             
-            # Upsert: insert if new, update if exists (based on provider_id + provider uniqueness)
-            result = self.supabase.table("users").upsert(
-                user_data,
-                on_conflict="provider_id,provider"
-            ).execute()
+            # User linkage (can be NULL for anonymous roasts)
+            "user_id": user_id,
             
-            if result.data:
-                user_id = result.data[0].get("id")
-                logger.info(f"✅ User {email} upserted successfully with ID: {user_id}")
-                return user_id
-            else:
-                logger.error(f"❌ No data returned from user upsert for {email}")
-                return None
-                
+            # Metadata
+            "created_at": datetime.utcnow().isoformat(),
+        }
+
+
+class SupabaseDatabaseService(DatabaseService):
+    """Service for persisting roast data to Supabase (async, on a pooled HTTP client)"""
+    
+    db_system = "supabase"
+    
+    def __init__(self, supabase: "AsyncClient"):
+        """Wrap an initialized async Supabase client (use SupabaseDatabaseService.create)"""
+        self.supabase = supabase
+    
+    @classmethod
+    async def create(cls) -> "SupabaseDatabaseService":
+        """Initialize the async Supabase client"""
+        from app.services.http_transport import create_pooled_client
+        
+        # Import off the event loop - supabase pulls in a large dependency tree
+        supabase_module = await asyncio.to_thread(importlib.import_module, "supabase")
+        
+        try:
+            # Shared keep-alive pool so requests skip DNS/TLS setup (see ConnectionWarmer)
+            http_client = create_pooled_client(
+                tracker=supabase_connections,
+                pool_size=settings.connection_pool_size,
+                keepalive_seconds=max(settings.connection_keepalive_interval_seconds * 3, 5.0),
+                timeout=settings.db_timeout_seconds
+            )
+            supabase = await supabase_module.acreate_client(
+                settings.supabase_url,
+                settings.supabase_key,
+                options=supabase_module.AsyncClientOptions(
+                    postgrest_client_timeout=settings.db_timeout_seconds,
+                    httpx_client=http_client
+                )
+            )
+            logger.info("✅ Supabase client initialized successfully")
         except Exception as e:
-            logger.error(f"❌ Failed to upsert user {email}: {str(e)}")
-            return None
+            logger.error(f"❌ Failed to initialize Supabase client: {str(e)}")
+            raise
+        return cls(supabase)
     
-    def upsert_user(self, email: str, name: str, provider_id: str, picture: Optional[str] = None, provider: str = "google") -> Optional[str]:
+    async def upsert_user(self, email: str, name: str, provider_id: str, picture: Optional[str] = None, provider: str = "google") -> Optional[str]:
         """
         Create or update a user in the database (idempotent operation)
         
@@ -105,7 +229,7 @@ class DatabaseService:
             logger.info(f"Upserting user to database: {email} (provider: {provider}, provider_id: {provider_id})")
             
             # Upsert: insert if new, update if exists (based on provider_id + provider uniqueness)
-            result = self.supabase.table("users").upsert(
+            result = await self.supabase.table("users").upsert(
                 user_data,
                 on_conflict="provider_id,provider"
             ).execute()
@@ -122,7 +246,7 @@ class DatabaseService:
             logger.error(f"❌ Failed to upsert user {email}: {str(e)}")
             return None
     
-    def log_login_event(self, user_id: str, provider: str, ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> None:
+    async def log_login_event(self, user_id: str, provider: str, ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> None:
         """
         Log a login event for audit trail
         
@@ -145,13 +269,13 @@ class DatabaseService:
                 "user_agent": user_agent,
             }
             
-            self.supabase.table("login_events").insert(event_data).execute()
+            await self.supabase.table("login_events").insert(event_data).execute()
             logger.info(f"✅ Login event logged for user {user_id}")
             
         except Exception as e:
             logger.error(f"❌ Failed to log login event for user {user_id}: {str(e)}")
     
-    def get_user_by_email(self, email: str) -> Optional[dict]:
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
         """
         Retrieve a user by email address
         
@@ -162,7 +286,7 @@ class DatabaseService:
             dict: User record if found, None otherwise
         """
         try:
-            result = self.supabase.table("users").select("*").eq("email", email).execute()
+            result = await self.supabase.table("users").select("*").eq("email", email).execute()
             
             if result.data and len(result.data) > 0:
                 return result.data[0]
@@ -173,7 +297,7 @@ class DatabaseService:
             logger.error(f"❌ Failed to get user by email {email}: {str(e)}")
             return None
     
-    def save_roast(self, request: RoastRequest, response: RoastResponse, user_id: Optional[str] = None) -> Optional[dict]:
+    async def save_roast(self, request: RoastRequest, response: RoastResponse, user_id: Optional[str] = None) -> Optional[dict]:
         """
         Save a roast generation to the database
         
@@ -194,47 +318,127 @@ class DatabaseService:
         """
         try:
             # Prepare the data for insertion
-            roast_data = {
-                # Request fields
-                "startup_name": request.startup_name,
-                "idea_description": request.idea_description,
-                "target_users": request.target_users,
-                "budget": request.budget,
-                "roast_level": request.roast_level,
-                
-                # Response fields
-                "brutal_roast": response.brutal_roast,
-                "honest_feedback": response.honest_feedback,
-                "competitor_reality_check": response.competitor_reality_check,
-                "survival_tips": response.survival_tips,  # This will be automatically converted to JSONB
-                "pitch_rewrite": response.pitch_rewrite,
-                
-                # User linkage (can be NULL for anonymous roasts)
-                "user_id": user_id,
-                
-                # Metadata
-                "created_at": datetime.utcnow().isoformat(),
-            }
+            roast_data = self._build_roast_record(request, response, user_id)
             
             logger.info(f"Saving roast to database for startup: {request.startup_name} (user_id: {user_id or 'anonymous'})")
             
             # Insert the record into the roasts table
-            result = self.supabase.table("roasts").insert(roast_data).execute()
+            result = await self.supabase.table("roasts").insert(roast_data).execute()
             
             if result.data:
+                self._roasts_saved(user_id, result.data)
                 logger.info(f"✅ Successfully saved roast for {request.startup_name} to database")
                 return result.data[0]
             else:
                 logger.error(f"❌ No data returned from database insert for {request.startup_name}")
+                self._roasts_failed(1)
                 return None
                 
         except Exception as e:
             # Log the error but don't raise - this is fail-safe behavior
+            self._roasts_failed(1)
             logger.error(f"❌ Failed to save roast for {request.startup_name} to database: {str(e)}")
             logger.error(f"   Request data: startup_name={request.startup_name}, roast_level={request.roast_level}")
             return None
     
-    def get_roast_stats(self) -> Optional[dict]:
+    async def save_roasts_bulk(self, roasts: List[Tuple[RoastRequest, RoastResponse]], user_id: Optional[str] = None) -> int:
+        """
+        Save many roast generations with a single bulk insert
+        
+        Args:
+            roasts: (request, response) pairs to persist
+            user_id: UUID of the authenticated user (optional)
+            
+        Returns:
+            int: Number of rows inserted (0 if the insert failed)
+            
+        Note:
+            Like save_roast, this method never raises.
+        """
+        if not roasts:
+            return 0
+        
+        try:
+            rows = [self._build_roast_record(request, response, user_id) for request, response in roasts]
+            logger.info(f"Bulk saving {len(rows)} roasts to database (user_id: {user_id or 'anonymous'})")
+            
+            result = await self.supabase.table("roasts").insert(rows).execute()
+            
+            inserted = len(result.data) if result.data else 0
+            if inserted:
+                self._roasts_saved(user_id, result.data)
+            if inserted < len(rows):
+                self._roasts_failed(len(rows) - inserted)
+            logger.info(f"✅ Bulk saved {inserted} roasts to database")
+            return inserted
+            
+        except Exception as e:
+            self._roasts_failed(len(roasts))
+            logger.error(f"❌ Failed to bulk save {len(roasts)} roasts to database: {str(e)}")
+            return 0
+    
+    async def list_user_roasts(self, user_id: str, limit: int, before: Optional[Tuple[str, str]] = None) -> Optional[List[dict]]:
+        try:
+            query = (
+                self.supabase.table("roasts")
+                .select(",".join(ROAST_LIST_COLUMNS))
+                .eq("user_id", user_id)
+            )
+            if before is not None:
+                # Rows strictly after the cursor in (created_at DESC, id DESC) order
+                created_at, roast_id = before
+                query = query.or_(
+                    f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{roast_id})'
+                )
+            result = await query.order("created_at", desc=True).order("id", desc=True).limit(limit).execute()
+            return result.data or []
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to list roasts for user {user_id}: {str(e)}")
+            return None
+    
+    async def list_roasts(
+        self,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        roast_level: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Optional[List[dict]]:
+        try:
+            query = self.supabase.table("roasts").select("*")
+            if since is not None:
+                query = query.gte("created_at", since)
+            if until is not None:
+                query = query.lt("created_at", until)
+            if roast_level is not None:
+                query = query.eq("roast_level", roast_level)
+            if user_id is not None:
+                query = query.eq("user_id", user_id)
+            if after is not None:
+                # Rows strictly after the cursor in (created_at, id) order
+                created_at, roast_id = after
+                query = query.or_(
+                    f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{roast_id})'
+                )
+            result = await query.order("created_at").order("id").limit(limit).execute()
+            return result.data or []
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to list roasts for export: {str(e)}")
+            return None
+    
+    async def get_roast(self, roast_id: str) -> Optional[dict]:
+        try:
+            result = await self.supabase.table("roasts").select("*").eq("id", roast_id).limit(1).execute()
+            return result.data[0] if result.data else None
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to get roast {roast_id}: {str(e)}")
+            raise DatabaseUnavailable(str(e)) from e
+    
+    async def get_roast_stats(self) -> Optional[dict]:
         """
         Get basic statistics about roasts in the database
         
@@ -242,15 +446,21 @@ class DatabaseService:
             dict: Statistics if successful, None if failed
         """
         try:
-            # Get total count
-            total_result = self.supabase.table("roasts").select("id", count="exact").execute()
-            total_count = total_result.count if total_result.count is not None else 0
+            levels = ["Soft", "Medium", "Nuclear"]
             
-            # Get count by roast level
-            level_stats = {}
-            for level in ["Soft", "Medium", "Nuclear"]:
-                level_result = self.supabase.table("roasts").select("id", count="exact").eq("roast_level", level).execute()
-                level_stats[level] = level_result.count if level_result.count is not None else 0
+            # Total count and per-level counts are independent - run them concurrently
+            total_result, *level_results = await asyncio.gather(
+                self.supabase.table("roasts").select("id", count="exact").execute(),
+                *(
+                    self.supabase.table("roasts").select("id", count="exact").eq("roast_level", level).execute()
+                    for level in levels
+                )
+            )
+            total_count = total_result.count if total_result.count is not None else 0
+            level_stats = {
+                level: result.count if result.count is not None else 0
+                for level, result in zip(levels, level_results)
+            }
             
             return {
                 "total_roasts": total_count,
@@ -262,7 +472,7 @@ class DatabaseService:
             logger.error(f"❌ Failed to get roast statistics: {str(e)}")
             return None
     
-    def health_check(self) -> bool:
+    async def health_check(self) -> bool:
         """
         Check if the database connection is healthy
         
@@ -271,12 +481,39 @@ class DatabaseService:
         """
         try:
             # Simple query to test connection
-            result = self.supabase.table("roasts").select("id").limit(1).execute()
+            result = await self.supabase.table("roasts").select("id").limit(1).execute()
             return True
         except Exception as e:
             logger.error(f"❌ Database health check failed: {str(e)}")
             return False
 
 
-# Global database service instance
-db_service = DatabaseService()
\ No newline at end of file
+async def _create_sqlite_service() -> DatabaseService:
+    from app.services.sqlite_db_service import SQLiteDatabaseService
+    return await SQLiteDatabaseService.create(settings.sqlite_database_path)
+
+
+# Storage backends selectable through settings.database_backend
+DATABASE_BACKENDS: Dict[str, Callable[[], Awaitable[DatabaseService]]] = {
+    "supabase": lambda: SupabaseDatabaseService.create(),
+    "sqlite": _create_sqlite_service,
+}
+
+# Global database service instance, created lazily so importing the app stays cheap
+_db_service: Optional[DatabaseService] = None
+_db_service_lock = asyncio.Lock()
+
+
+async def get_db_service() -> DatabaseService:
+    """
+    Get the shared DatabaseService for the configured backend, building it on first use
+    
+    Returns:
+        DatabaseService: The global instance
+    """
+    global _db_service
+    if _db_service is None:
+        async with _db_service_lock:
+            if _db_service is None:
+                _db_service = await DATABASE_BACKENDS[settings.database_backend]()
+    return _db_service
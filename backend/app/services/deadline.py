@@ -0,0 +1,106 @@
+import asyncio
+import time
+from typing import Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request-scoped deadline runs out"""
+
+    def __init__(self, stage: str, timeout_seconds: float):
+        super().__init__(f"Deadline of {timeout_seconds:.1f}s exceeded during {stage}")
+        self.stage = stage
+        self.timeout_seconds = timeout_seconds
+
+
+class Deadline:
+    """A request-scoped time budget shared by every step of the roast pipeline"""
+
+    def __init__(self, timeout_seconds: float, stages: Optional[Dict[str, float]] = None):
+        self.timeout_seconds = timeout_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + timeout_seconds
+        # Seconds spent in each pipeline stage, shared with reserved sub-deadlines
+        self.stages: Dict[str, float] = stages if stages is not None else {}
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def cap(self, timeout_seconds: Optional[float]) -> float:
+        """Clamp a per-step timeout to the remaining budget"""
+        remaining = self.remaining()
+        if timeout_seconds is None:
+            return remaining
+        return min(timeout_seconds, remaining)
+
+    def check(self, stage: str) -> None:
+        """
+        Fail fast if the budget is already spent
+
+        Args:
+            stage: Name of the pipeline step about to start
+
+        Raises:
+            DeadlineExceeded: If no time is left
+        """
+        if self.expired:
+            raise DeadlineExceeded(stage, self.timeout_seconds)
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """
+        Derive a deadline that expires ``seconds`` earlier, keeping time for later steps
+
+        Args:
+            seconds: Budget to hold back (e.g. for persisting the roast)
+
+        Returns:
+            Deadline: A sub-deadline sharing this deadline's stage timings
+        """
+        child = Deadline(self.timeout_seconds, stages=self.stages)
+        child.started_at = self.started_at
+        child.expires_at = max(self.started_at, self.expires_at - seconds)
+        return child
+
+    async def run(self, stage: str, awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Await one pipeline step using at most the remaining budget
+
+        Args:
+            stage: Name of the step, used in timings and errors
+            awaitable: The step to run; it is cancelled if the budget runs out
+            timeout: Optional per-step timeout, clamped to the remaining budget
+
+        Returns:
+            The step's result
+
+        Raises:
+            DeadlineExceeded: If the request deadline ran out during this step
+            asyncio.TimeoutError: If only the per-step timeout was hit
+        """
+        if self.expired:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()  # Never started - avoid "never awaited" warnings
+            raise DeadlineExceeded(stage, self.timeout_seconds)
+
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.cap(timeout))
+        except asyncio.TimeoutError:
+            if self.expired:
+                raise DeadlineExceeded(stage, self.timeout_seconds)
+            raise
+        finally:
+            self.stages[stage] = self.stages.get(stage, 0.0) + (time.monotonic() - started)
+
+    def server_timing(self) -> str:
+        """Render stage timings as a Server-Timing header value"""
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items())
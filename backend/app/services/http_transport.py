@@ -0,0 +1,68 @@
+import itertools
+from typing import Dict
+
+import httpx
+
+from app.services.connection_pool import ConnectionTracker
+
+
+class TrackedHTTPTransport(httpx.AsyncHTTPTransport):
+    """HTTPTransport that reports which pooled connection served each request"""
+
+    def __init__(self, tracker: ConnectionTracker, **kwargs):
+        super().__init__(**kwargs)
+        self.tracker = tracker
+        self._labels: Dict[int, str] = {}
+        self._counter = itertools.count(1)
+
+    def _label(self, stream: object, opened: bool) -> str:
+        # Network streams live as long as their connection, so id() identifies it
+        stream_id = id(stream)
+        if opened or stream_id not in self._labels:
+            self._labels.pop(stream_id, None)
+            self._labels[stream_id] = f"conn-{next(self._counter)}"
+            while len(self._labels) > self.tracker.max_connections:
+                self._labels.pop(next(iter(self._labels)))
+        return self._labels[stream_id]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        opened = []
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                opened.append(True)
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        response = await super().handle_async_request(request)
+
+        stream = response.extensions.get("network_stream")
+        if stream is not None:
+            self.tracker.record(self._label(stream, bool(opened)), reused=not opened)
+        return response
+
+
+def create_pooled_client(tracker: ConnectionTracker, pool_size: int, keepalive_seconds: float, timeout: float) -> httpx.AsyncClient:
+    """
+    Build an async httpx client with a bounded keep-alive pool
+
+    Args:
+        tracker: Records per-connection reuse
+        pool_size: Idle connections kept open to the upstream
+        keepalive_seconds: How long an idle connection may stay in the pool
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        httpx.AsyncClient: The pooled client
+    """
+    limits = httpx.Limits(
+        max_connections=max(pool_size, 100),  # Bursts may open more; only pool_size are kept
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=keepalive_seconds,
+    )
+    return httpx.AsyncClient(
+        transport=TrackedHTTPTransport(tracker, limits=limits),
+        timeout=timeout,
+    )
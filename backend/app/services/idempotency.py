@@ -0,0 +1,330 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.config.settings import settings
+from app.services.metrics_service import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# reserve() outcomes
+NEW = "new"
+PENDING = "pending"
+COMPLETED = "completed"
+
+
+class IdempotencyStore(ABC):
+    """Storage for Idempotency-Key records; reserve() must be atomic across workers"""
+
+    @abstractmethod
+    def reserve(self, key: str, fingerprint: str, ttl_seconds: float, pending_ttl_seconds: float) -> Tuple[str, Optional[dict]]:
+        """
+        Claim a key for a new request, or report the existing record
+
+        Returns:
+            Tuple of (NEW | PENDING | COMPLETED, existing record or None)
+        """
+
+    @abstractmethod
+    def complete(self, key: str, response: dict, ttl_seconds: float) -> None:
+        """Store the response for a reserved key"""
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """Drop a reservation whose request failed so a retry can run again"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """Fetch the live record for a key, if any"""
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Bounded LRU store for a single worker process"""
+
+    def __init__(self, max_entries: int):
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._records: "OrderedDict[str, dict]" = OrderedDict()
+
+    def _live(self, key: str, now: float) -> Optional[dict]:
+        record = self._records.get(key)
+        if record is None:
+            return None
+        if record["expires_at"] <= now:
+            del self._records[key]
+            return None
+        self._records.move_to_end(key)
+        return record
+
+    def reserve(self, key: str, fingerprint: str, ttl_seconds: float, pending_ttl_seconds: float) -> Tuple[str, Optional[dict]]:
+        now = time.time()
+        with self._lock:
+            record = self._live(key, now)
+            if record is not None:
+                return (COMPLETED if record["status"] == COMPLETED else PENDING), dict(record)
+
+            self._records[key] = {
+                "status": PENDING,
+                "fingerprint": fingerprint,
+                "response": None,
+                "expires_at": now + pending_ttl_seconds,
+            }
+            # Evict least recently used completed records; pending ones guard requests still running
+            excess = len(self._records) - self._max_entries
+            evicted = []
+            for old_key, old_record in self._records.items():
+                if len(evicted) >= excess:
+                    break
+                if old_record["status"] == COMPLETED:
+                    evicted.append(old_key)
+            for old_key in evicted:
+                del self._records[old_key]
+            return NEW, None
+
+    def complete(self, key: str, response: dict, ttl_seconds: float) -> None:
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                record.update(status=COMPLETED, response=response, expires_at=time.time() + ttl_seconds)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            record = self._live(key, time.time())
+            return dict(record) if record is not None else None
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """SQLite-backed store shared by every worker process on the host"""
+
+    def __init__(self, path: str, max_entries: int):
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                response TEXT,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_expires ON idempotency_keys(expires_at)")
+
+    def _row_to_record(self, row: tuple) -> dict:
+        status, fingerprint, response, expires_at = row
+        return {
+            "status": status,
+            "fingerprint": fingerprint,
+            "response": json.loads(response) if response else None,
+            "expires_at": expires_at,
+        }
+
+    def _enforce_bounds(self, now: float) -> None:
+        """Drop expired keys and, if still over the limit, the soonest-expiring completed ones"""
+        self._conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM idempotency_keys WHERE key IN ("
+            "SELECT key FROM idempotency_keys WHERE status = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (COMPLETED, self._max_entries),
+        )
+
+    def reserve(self, key: str, fingerprint: str, ttl_seconds: float, pending_ttl_seconds: float) -> Tuple[str, Optional[dict]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT status, fingerprint, response, expires_at FROM idempotency_keys WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO idempotency_keys (key, status, fingerprint, response, expires_at) "
+                        "VALUES (?, ?, ?, NULL, ?)",
+                        (key, PENDING, fingerprint, now + pending_ttl_seconds),
+                    )
+                    self._writes += 1
+                    if self._writes % 100 == 0:
+                        self._enforce_bounds(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return NEW, None
+        record = self._row_to_record(row)
+        return (COMPLETED if record["status"] == COMPLETED else PENDING), record
+
+    def complete(self, key: str, response: dict, ttl_seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET status = ?, response = ?, expires_at = ? WHERE key = ?",
+                (COMPLETED, json.dumps(response), time.time() + ttl_seconds, key),
+            )
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND status = ?", (key, PENDING))
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, fingerprint, response, expires_at FROM idempotency_keys WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return self._row_to_record(row) if row is not None else None
+
+
+# Stores selectable through settings.idempotency_backend
+IDEMPOTENCY_STORES = {
+    "memory": lambda: InMemoryIdempotencyStore(settings.idempotency_max_entries),
+    "sqlite": lambda: SQLiteIdempotencyStore(settings.idempotency_path, settings.idempotency_max_entries),
+}
+
+
+class IdempotencyService:
+    """
+    Deduplicates retried requests that carry the same Idempotency-Key
+
+    The first request with a key runs; concurrent duplicates in this process attach
+    to it, duplicates in other workers poll the shared store, and later duplicates
+    within the TTL get the stored response replayed.
+    """
+
+    def __init__(self, store: IdempotencyStore, ttl_seconds: float, pending_ttl_seconds: float):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.pending_ttl_seconds = pending_ttl_seconds
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}  # Key -> (fingerprint, response future)
+
+    def _check_fingerprint(self, record: dict, fingerprint: str) -> None:
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request body"
+            )
+
+    async def _wait_for_other_worker(self, key: str, fingerprint: str, max_wait: float) -> Optional[dict]:
+        """Poll the shared store while another worker runs the request"""
+        give_up_at = time.monotonic() + max_wait
+        while time.monotonic() < give_up_at:
+            await asyncio.sleep(0.25)
+            record = await asyncio.to_thread(self.store.get, key)
+            if record is None:
+                return None  # The other worker failed and released the key
+            if record["status"] == COMPLETED:
+                self._check_fingerprint(record, fingerprint)
+                return record["response"]
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still in progress. Please retry shortly."
+        )
+
+    async def has_record(self, key: str) -> bool:
+        """Whether a key is running or stored, i.e. a duplicate would be attached or replayed"""
+        if key in self._inflight:
+            return True
+        return await asyncio.to_thread(self.store.get, key) is not None
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        execute: Callable[[], Awaitable[dict]],
+        max_wait: float,
+    ) -> Tuple[dict, bool]:
+        """
+        Execute a request at most once per Idempotency-Key
+
+        Args:
+            key: The (user-scoped) idempotency key
+            fingerprint: Hash of the request body, to reject key reuse with another body
+            execute: Runs the request and returns its JSON-serializable response
+            max_wait: Longest time to wait on a duplicate running elsewhere
+
+        Returns:
+            Tuple of (response, replayed) where replayed is True for duplicates
+        """
+        while True:
+            running = self._inflight.get(key)
+            if running is not None:
+                inflight_fingerprint, inflight = running
+                self._check_fingerprint({"fingerprint": inflight_fingerprint}, fingerprint)
+                metrics.increment("idempotency_requests_total", labels={"outcome": "attached"})
+                try:
+                    return await asyncio.shield(inflight), True
+                except asyncio.CancelledError:
+                    # Only the original was cancelled (its client went away) - this
+                    # duplicate retries, claiming the released key itself
+                    if inflight.cancelled() and not asyncio.current_task().cancelling():
+                        continue
+                    raise
+
+            state, record = await asyncio.to_thread(
+                self.store.reserve, key, fingerprint, self.ttl_seconds, self.pending_ttl_seconds
+            )
+
+            if state == COMPLETED:
+                self._check_fingerprint(record, fingerprint)
+                metrics.increment("idempotency_requests_total", labels={"outcome": "replayed"})
+                return record["response"], True
+
+            if state == PENDING:
+                self._check_fingerprint(record, fingerprint)
+                if key in self._inflight:
+                    continue  # Running in this process - attach to it instead of polling
+                response = await self._wait_for_other_worker(key, fingerprint, max_wait)
+                if response is None:
+                    continue  # Released after a failure - try to claim it ourselves
+                metrics.increment("idempotency_requests_total", labels={"outcome": "replayed"})
+                return response, True
+
+            break
+
+        # First request with this key: run it and let concurrent duplicates attach
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, future)
+        metrics.increment("idempotency_requests_total", labels={"outcome": "executed"})
+        try:
+            response = await execute()
+        except BaseException as e:
+            await asyncio.to_thread(self.store.release, key)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Retrieved here so unattached failures are not reported as unhandled
+            raise
+        else:
+            await asyncio.to_thread(self.store.complete, key, response, self.ttl_seconds)
+            future.set_result(response)
+            return response, False
+        finally:
+            self._inflight.pop(key, None)
+
+
+# Global idempotency service instance
+idempotency_service = IdempotencyService(
+    store=IDEMPOTENCY_STORES[settings.idempotency_backend](),
+    ttl_seconds=settings.idempotency_ttl_seconds,
+    pending_ttl_seconds=settings.roast_max_deadline_seconds
+)
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest
+from app.services.db_service import get_db_service
+from app.services.deadline import Deadline
+from app.services.roast_service import get_roast_service
+from app.services.structured_logging import correlation_id
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class JobQueueBackend(ABC):
+    """Storage for roast jobs; implementations must make claim() atomic"""
+
+    @abstractmethod
+    def enqueue(self, job_id: str, payload: dict, user_id: Optional[str], expires_at: float) -> None:
+        """Store a new job in the queued state"""
+
+    @abstractmethod
+    def claim(self, owner: str, lease_seconds: float) -> Optional[dict]:
+        """Atomically move the oldest queued job to running under a lease held by owner and return it"""
+
+    @abstractmethod
+    def renew_lease(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extend owner's lease on a running job (False if the lease was lost)"""
+
+    @abstractmethod
+    def complete(self, job_id: str, result: dict) -> None:
+        """Mark a job as succeeded with its result"""
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str, status_code: int) -> None:
+        """Mark a job as failed"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """Fetch a job by id (None if unknown or expired)"""
+
+    @abstractmethod
+    def requeue_expired_leases(self, now: float) -> int:
+        """Return running jobs whose lease lapsed (their worker died) to the queue"""
+
+    @abstractmethod
+    def purge_expired(self, now: float) -> int:
+        """Delete jobs whose TTL has passed"""
+
+
+class SQLiteJobQueue(JobQueueBackend):
+    """Local SQLite stand-in for a shared job queue (single host, survives restarts)"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS roast_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                user_id TEXT,
+                result TEXT,
+                error TEXT,
+                status_code INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires_at REAL
+            )
+            """
+        )
+        # Queues created before leases existed
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(roast_jobs)")}
+        for column, kind in (("lease_owner", "TEXT"), ("lease_expires_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE roast_jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_roast_jobs_status ON roast_jobs(status, created_at)")
+
+    def _row_to_job(self, row: sqlite3.Row) -> dict:
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "payload": json.loads(row["payload"]),
+            "user_id": row["user_id"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "status_code": row["status_code"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "expires_at": row["expires_at"],
+        }
+
+    def enqueue(self, job_id: str, payload: dict, user_id: Optional[str], expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO roast_jobs (id, status, payload, user_id, created_at, updated_at, expires_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), user_id, now, now, expires_at),
+            )
+
+    def claim(self, owner: str, lease_seconds: float) -> Optional[dict]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT * FROM roast_jobs WHERE status = 'queued' AND expires_at > ? ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE roast_jobs SET status = 'running', updated_at = ?, lease_owner = ?, lease_expires_at = ? "
+                        "WHERE id = ?",
+                        (now, owner, now + lease_seconds, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._row_to_job(row)
+        job["status"] = "running"
+        return job
+
+    def renew_lease(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE roast_jobs SET lease_expires_at = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (now + lease_seconds, job_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, result: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE roast_jobs SET status = 'succeeded', result = ?, updated_at = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL WHERE id = ?",
+                (json.dumps(result), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str, status_code: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE roast_jobs SET status = 'failed', error = ?, status_code = ?, updated_at = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL WHERE id = ?",
+                (error, status_code, time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM roast_jobs WHERE id = ? AND expires_at > ?", (job_id, time.time())
+            ).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def requeue_expired_leases(self, now: float) -> int:
+        with self._lock:
+            # Rows without a lease were left running by a version that predates leases
+            cursor = self._conn.execute(
+                "UPDATE roast_jobs SET status = 'queued', updated_at = ?, lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at <= ?)",
+                (now, now),
+            )
+            return cursor.rowcount
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM roast_jobs WHERE expires_at <= ?", (now,))
+            return cursor.rowcount
+
+
+# Queue backends selectable through settings.job_queue_backend
+JOB_QUEUE_BACKENDS = {
+    "sqlite": lambda: SQLiteJobQueue(settings.job_queue_path),
+}
+
+
+class JobService:
+    """
+    Runs roast jobs on an in-process worker pool fed by a pluggable queue backend
+
+    A claimed job is leased to this process and the lease is renewed while the
+    job runs, so several processes can share one queue: only jobs whose lease
+    lapsed (their worker crashed or was killed) are put back in the queue.
+    """
+
+    def __init__(self, backend_name: str, workers: int, ttl_seconds: float, lease_seconds: float):
+        self.backend_name = backend_name
+        self.backend: Optional[JobQueueBackend] = None
+        self.worker_count = workers
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._workers: List[asyncio.Task] = []
+        self._janitor: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._job_events: Dict[str, asyncio.Event] = {}
+        self._job_waiters: Dict[str, int] = {}  # Long-polls per job, so idle events can be dropped
+
+    async def start(self) -> None:
+        """Open the queue backend, resume jobs whose worker died and start the worker pool"""
+        if self.backend is None:
+            self.backend = await asyncio.to_thread(JOB_QUEUE_BACKENDS[self.backend_name])
+        self._wakeup = asyncio.Event()
+        await self._requeue_expired()
+        self._workers = [asyncio.create_task(self._worker(n)) for n in range(self.worker_count)]
+        self._janitor = asyncio.create_task(self._purge_loop())
+        self._wakeup.set()
+        logger.info(f"✅ Roast job worker pool started with {self.worker_count} worker(s)")
+
+    async def stop(self) -> None:
+        """Stop workers; their running jobs are requeued once the leases lapse"""
+        tasks = self._workers + ([self._janitor] if self._janitor else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._janitor = None
+
+    async def submit(self, request: RoastRequest, user_id: Optional[str]) -> str:
+        """
+        Queue a roast job
+
+        Args:
+            request: The startup details to roast
+            user_id: UUID of the authenticated user (optional)
+
+        Returns:
+            str: The new job id
+        """
+        job_id = str(uuid.uuid4())
+        expires_at = time.time() + self.ttl_seconds
+        await asyncio.to_thread(self.backend.enqueue, job_id, request.model_dump(), user_id, expires_at)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info(f"Queued roast job {job_id} for: {request.startup_name}")
+        return job_id
+
+    async def wait_for_job(self, job_id: str, timeout: float) -> Optional[dict]:
+        """
+        Long-poll a job until it finishes or the timeout passes
+
+        Args:
+            job_id: The job to watch
+            timeout: Longest time to wait, in seconds (0 returns immediately)
+
+        Returns:
+            dict: The job's current state, or None if it does not exist (or expired)
+        """
+        job = await asyncio.to_thread(self.backend.get, job_id)
+        if job is None or job["status"] in TERMINAL_STATUSES or timeout <= 0:
+            return job
+
+        self._job_waiters[job_id] = self._job_waiters.get(job_id, 0) + 1
+        try:
+            give_up_at = time.monotonic() + timeout
+            while True:
+                # Woken early when a worker of this process finishes the job; the store is
+                # re-checked every poll interval for jobs run by other processes
+                event = self._job_events.setdefault(job_id, asyncio.Event())
+                job = await asyncio.to_thread(self.backend.get, job_id)
+                remaining = give_up_at - time.monotonic()
+                if job is None or job["status"] in TERMINAL_STATUSES or remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, settings.job_poll_interval_seconds))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._job_waiters[job_id] -= 1
+            if not self._job_waiters[job_id]:
+                del self._job_waiters[job_id]
+                self._job_events.pop(job_id, None)
+
+    def _notify(self, job_id: str) -> None:
+        event = self._job_events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _requeue_expired(self) -> None:
+        resumed = await asyncio.to_thread(self.backend.requeue_expired_leases, time.time())
+        if resumed:
+            logger.info(f"Resuming {resumed} roast job(s) whose worker stopped renewing its lease")
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def _renew_lease(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await asyncio.to_thread(self.backend.renew_lease, job_id, self.owner, self.lease_seconds):
+                logger.warning(f"⚠️ Lost the lease on roast job {job_id}; it may run twice")
+                return
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            job = await asyncio.to_thread(self.backend.claim, self.owner, self.lease_seconds)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    # Poll occasionally too, in case another process enqueued work
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.job_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Log lines of the job carry its id as their correlation id
+            token = correlation_id.set(f"job-{job['id']}")
+            renewer = asyncio.create_task(self._renew_lease(job["id"]))
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Roast job {job['id']} crashed in worker {number}: {str(e)}")
+                await asyncio.to_thread(self.backend.fail, job["id"], "Unexpected error", 500)
+            finally:
+                renewer.cancel()
+                correlation_id.reset(token)
+                self._notify(job["id"])
+
+    async def _run_job(self, job: dict) -> None:
+        request = RoastRequest(**job["payload"])
+        deadline = Deadline(settings.roast_deadline_seconds)
+        try:
+            roast_response = await get_roast_service().analyze_startup(request, deadline=deadline, user_id=job["user_id"])
+        except HTTPException as e:
+            await asyncio.to_thread(self.backend.fail, job["id"], str(e.detail), e.status_code)
+            logger.warning(f"⚠️ Roast job {job['id']} failed: {e.detail}")
+            return
+
+        # Persist like /roast does (fail-safe - a failed save does not fail the job)
+        try:
+            db_service = await get_db_service()
+            await db_service.save_roast(request, roast_response, user_id=job["user_id"])
+        except Exception as db_error:
+            logger.error(f"❌ Database save error for roast job {job['id']}: {str(db_error)}")
+
+        await asyncio.to_thread(self.backend.complete, job["id"], roast_response.model_dump())
+        logger.info(f"✅ Roast job {job['id']} completed for: {request.startup_name}")
+
+    async def _purge_loop(self) -> None:
+        purge_every = max(1.0, min(self.ttl_seconds / 4, 300.0))
+        next_purge = 0.0
+        while True:
+            # Jobs of a worker that died after this process started are picked up here
+            await self._requeue_expired()
+            if time.monotonic() >= next_purge:
+                purged = await asyncio.to_thread(self.backend.purge_expired, time.time())
+                if purged:
+                    logger.info(f"Purged {purged} expired roast job(s)")
+                next_purge = time.monotonic() + purge_every
+            await asyncio.sleep(min(purge_every, self.lease_seconds))
+
+
+# Global job service instance (the queue backend is opened in start())
+job_service = JobService(
+    backend_name=settings.job_queue_backend,
+    workers=settings.job_workers,
+    ttl_seconds=settings.job_ttl_seconds,
+    lease_seconds=settings.job_lease_seconds
+)
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.metrics_service import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class KeyPoolExhausted(Exception):
+    """Raised when no API key has quota left within the allowed wait"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket refilled continuously to match a requests-per-minute quota"""
+
+    def __init__(self, requests_per_minute: int):
+        self.capacity = float(max(1, requests_per_minute))
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def try_acquire(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def seconds_until_token(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.refill_rate
+
+
+class ApiKey:
+    """A Gemini API key with its quota bucket, cooldown state and usage counters"""
+
+    def __init__(self, key: str, requests_per_minute: int, client: Any = None):
+        self.key = key
+        self.label = f"...{key[-4:]}" if len(key) > 4 else "..."
+        self.bucket = TokenBucket(requests_per_minute)
+        self.client = client
+        self.cooldown_until: Optional[float] = None
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def in_rotation(self, now: float) -> bool:
+        if self.cooldown_until is not None and now >= self.cooldown_until:
+            logger.info(f"✅ Gemini API key {self.label} back in rotation after cooldown")
+            self.cooldown_until = None
+        return self.cooldown_until is None
+
+
+class KeyPool:
+    """
+    Pool of Gemini API keys balanced with per-key token buckets
+
+    Each call takes a token from the in-rotation key with the most quota left. A key
+    that receives a 429 is taken out of rotation until its cooldown expires.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[Tuple[str, int, Any]],
+        cooldown_seconds: float,
+        max_wait_seconds: float,
+    ):
+        self.keys: List[ApiKey] = [ApiKey(key, rpm, client) for key, rpm, client in keys]
+        if not self.keys:
+            raise ValueError("KeyPool requires at least one API key")
+        self.cooldown_seconds = cooldown_seconds
+        self.max_wait_seconds = max_wait_seconds
+
+    def _try_acquire(self, now: float) -> Tuple[Optional[ApiKey], float]:
+        """Take a token from the least loaded key, or report how long until one frees up"""
+        candidates = [key for key in self.keys if key.in_rotation(now)]
+        candidates.sort(key=lambda key: key.bucket.available(now), reverse=True)
+        for key in candidates:
+            if key.bucket.try_acquire(now):
+                return key, 0.0
+
+        waits = [key.bucket.seconds_until_token(now) for key in candidates]
+        waits += [key.cooldown_until - now for key in self.keys if key.cooldown_until is not None]
+        return None, max(0.0, min(waits)) if waits else self.cooldown_seconds
+
+    async def acquire(self, max_wait: Optional[float] = None) -> ApiKey:
+        """
+        Reserve quota on one API key, waiting briefly if every key is exhausted
+
+        Args:
+            max_wait: Longest time to wait for quota (defaults to the pool setting)
+
+        Returns:
+            ApiKey: The key to use for the next call
+
+        Raises:
+            KeyPoolExhausted: If no key frees up within the allowed wait
+        """
+        max_wait = self.max_wait_seconds if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            now = time.monotonic()
+            key, wait = self._try_acquire(now)
+            if key is not None:
+                key.requests += 1
+                metrics.increment("gemini_key_requests_total", labels={"key": key.label})
+                return key
+
+            if now + wait > deadline:
+                metrics.increment("gemini_key_pool_exhausted_total")
+                raise KeyPoolExhausted("All Gemini API keys are out of quota", retry_after=wait)
+            await asyncio.sleep(wait)
+
+    def least_loaded(self) -> ApiKey:
+        """
+        The in-rotation key with the most quota left, without taking a token
+
+        For calls that do not use generation quota (count_tokens), so they spread
+        across keys without eating into the per-key request budget.
+        """
+        now = time.monotonic()
+        candidates = [key for key in self.keys if key.in_rotation(now)] or self.keys
+        return max(candidates, key=lambda key: key.bucket.available(now))
+
+    def mark_rate_limited(self, key: ApiKey, retry_after: Optional[float] = None) -> None:
+        """Take a key out of rotation after a 429 until it cools down"""
+        cooldown = retry_after if retry_after is not None else self.cooldown_seconds
+        now = time.monotonic()
+        key.cooldown_until = now + cooldown
+        # The server says the quota is spent, whatever the local bucket thought
+        key.bucket.available(now)
+        key.bucket.tokens = 0.0
+        key.rate_limited += 1
+        metrics.increment("gemini_key_rate_limited_total", labels={"key": key.label})
+        logger.warning(f"⚠️ Gemini API key {key.label} rate limited - out of rotation for {cooldown:.0f}s")
+
+    def record_error(self, key: ApiKey) -> None:
+        key.errors += 1
+        metrics.increment("gemini_key_errors_total", labels={"key": key.label})
+
+    def usage(self) -> List[Dict[str, Any]]:
+        """Report per-key usage (keys are masked)"""
+        now = time.monotonic()
+        report = []
+        for key in self.keys:
+            tokens = key.bucket.available(now)
+            metrics.set_gauge("gemini_key_tokens_available", tokens, labels={"key": key.label})
+            report.append({
+                "key": key.label,
+                "in_rotation": key.in_rotation(now),
+                "quota_rpm": int(key.bucket.capacity),
+                "tokens_available": round(tokens, 2),
+                "requests": key.requests,
+                "rate_limited": key.rate_limited,
+                "errors": key.errors,
+            })
+        return report
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.config.settings import settings
+from app.services.metrics_service import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Innermost frames of a blocking callback's stack included in the warning
+BLOCKED_STACK_DEPTH = 30
+
+
+class LoopLagMonitor:
+    """
+    Continuously measures event loop lag and, in debug mode, catches blocking calls
+
+    A heartbeat task sleeps for a fixed tick and records how late it woke up:
+    that delay is the time the loop spent running other callbacks instead of
+    serving ready ones, i.e. the lag every request on the worker pays. Lag is
+    exported as the event_loop_lag_seconds summary and the
+    event_loop_lag_max_seconds gauge (worst tick since startup).
+
+    With block detection on, a watchdog thread watches the heartbeat. When the
+    loop misses it by more than the block threshold, the watchdog captures the
+    loop thread's stack while the blocking call is still running (a synchronous
+    HTTP request, a blocking database client, CPU-heavy parsing...) and logs it,
+    so the offending line is named rather than inferred. The heartbeat then ticks
+    at least every quarter threshold, so a stall shorter than a tick cannot slip
+    between two beats unnoticed.
+    """
+
+    def __init__(self, tick_seconds: float, block_threshold_seconds: float, detect_blocking: bool = False):
+        if detect_blocking and tick_seconds > 0:
+            tick_seconds = min(tick_seconds, block_threshold_seconds / 4)
+        self.tick_seconds = tick_seconds
+        self.block_threshold_seconds = block_threshold_seconds
+        self.detect_blocking = detect_blocking
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._beat = 0
+
+    def start(self) -> None:
+        """Start the heartbeat (and the watchdog when block detection is on) on the running loop"""
+        if self._task is not None or self.tick_seconds <= 0:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        if self.detect_blocking:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+        logger.info(
+            f"✅ Event loop monitor started (tick {self.tick_seconds * 1000:.0f}ms, "
+            f"block detection {'on' if self.detect_blocking else 'off'})"
+        )
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(self.tick_seconds)
+            lag = max(0.0, loop.time() - scheduled - self.tick_seconds)
+            self._last_beat = time.monotonic()
+            self._beat += 1
+            self._record(lag)
+
+    def _record(self, lag: float) -> None:
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        metrics.observe("event_loop_lag_seconds", lag)
+        metrics.set_gauge("event_loop_lag_max_seconds", self.max_lag)
+        if self.detect_blocking and lag > self.block_threshold_seconds:
+            logger.warning(f"⚠️ Event loop was blocked for {lag * 1000:.0f}ms")
+
+    def _watch(self) -> None:
+        reported_beat = -1
+        poll = max(self.block_threshold_seconds / 2, 0.005)
+        while not self._stopped.wait(poll):
+            beat = self._beat
+            stalled = time.monotonic() - self._last_beat - self.tick_seconds
+            if stalled <= self.block_threshold_seconds or beat == reported_beat:
+                continue
+            reported_beat = beat  # One report per stall
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self.blocked_count += 1
+            metrics.increment("event_loop_blocked_total")
+            stack = "".join(traceback.format_stack(frame, limit=BLOCKED_STACK_DEPTH))
+            logger.warning(
+                f"⚠️ Event loop blocked for over {stalled * 1000:.0f}ms, loop thread is at:\n{stack}"
+            )
+
+    def current_lag(self) -> float:
+        """
+        Lag right now: the last measured tick, or how overdue the pending heartbeat
+        already is when the loop is too busy to run it (0 with the monitor off)
+        """
+        if self._task is None:
+            return 0.0
+        overdue = time.monotonic() - self._last_beat - self.tick_seconds
+        return max(self.last_lag, overdue)
+
+    def status(self) -> dict:
+        """Lag figures for /health"""
+        p99 = metrics.percentile("event_loop_lag_seconds", 99.0)
+        return {
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "p99_lag_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "blocked_callbacks": self.blocked_count if self.detect_blocking else "detection_off",
+        }
+
+
+# Global event loop monitor instance (started with the app)
+loop_monitor = LoopLagMonitor(
+    tick_seconds=settings.loop_monitor_tick_ms / 1000,
+    block_threshold_seconds=settings.loop_block_threshold_ms / 1000,
+    detect_blocking=settings.loop_block_detection
+)
@@ -0,0 +1,149 @@
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    """Normalize a label dict into a hashable, ordered key"""
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape a label value per the exposition format (backslash, double quote, newline)"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    """Render labels in Prometheus exposition format"""
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    rendered = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in pairs)
+    return "{" + rendered + "}"
+
+
+class LatencyWindow:
+    """Rolling window of latency samples (seconds) supporting percentile queries"""
+
+    def __init__(self, size: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self.total_count = 0
+        self.total_sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.total_count += 1
+        self.total_sum += seconds
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Nearest-rank percentile over the current window
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            float: The percentile value, or None if the window is empty
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class MetricsService:
+    """In-process registry of counters, gauges and latency windows"""
+
+    SUMMARY_QUANTILES = (50.0, 90.0, 99.0)
+
+    def __init__(self, window_size: int = 1000):
+        self._lock = threading.Lock()
+        self._window_size = window_size
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._windows: Dict[str, Dict[LabelKey, LatencyWindow]] = {}
+
+    def increment(self, name: str, value: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        """Increase a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        """Set a gauge to an absolute value"""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, seconds: float, labels: Optional[Dict[str, str]] = None) -> None:
+        """Record a latency sample"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._windows.setdefault(name, {})
+            window = series.get(key)
+            if window is None:
+                window = series[key] = LatencyWindow(self._window_size)
+            window.observe(seconds)
+
+    def get_counter(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def get_gauge(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        with self._lock:
+            return self._gauges.get(name, {}).get(_label_key(labels))
+
+    def percentile(self, name: str, pct: float, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        with self._lock:
+            window = self._windows.get(name, {}).get(_label_key(labels))
+            return window.percentile(pct) if window else None
+
+    def sample_count(self, name: str, labels: Optional[Dict[str, str]] = None) -> int:
+        with self._lock:
+            window = self._windows.get(name, {}).get(_label_key(labels))
+            return len(window) if window else 0
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text; latency windows are rendered as summaries
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._windows.items()):
+                lines.append(f"# TYPE {name} summary")
+                for key, window in series.items():
+                    for pct in self.SUMMARY_QUANTILES:
+                        value = window.percentile(pct)
+                        if value is not None:
+                            quantile = {"quantile": str(pct / 100.0)}
+                            lines.append(f"{name}{_format_labels(key, quantile)} {value}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {window.total_sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {window.total_count}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsService()
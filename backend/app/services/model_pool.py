@@ -0,0 +1,145 @@
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from app.services.metrics_service import LatencyWindow, metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ModelEntry:
+    """A Gemini model in the pool together with its rolling health statistics"""
+
+    def __init__(self, name: str, window_size: int):
+        self.name = name
+        self._window_size = window_size
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        self._latencies = LatencyWindow(window_size)
+        self.ejected_until: Optional[float] = None
+
+    def record(self, success: bool, latency: Optional[float] = None) -> None:
+        self._outcomes.append(success)
+        if success and latency is not None:
+            self._latencies.observe(latency)
+
+    def reset(self) -> None:
+        """Forget the rolling window so a recovering model is judged on fresh traffic"""
+        self._outcomes = deque(maxlen=self._window_size)
+        self._latencies = LatencyWindow(self._window_size)
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        return self._latencies.percentile(pct)
+
+
+class ModelPool:
+    """
+    Ordered pool of Gemini models with latency- and error-aware failover
+
+    Requests go to the first healthy model in configuration order. A model whose
+    rolling error rate or p90 latency crosses its threshold is taken out of
+    rotation for a cooldown period, after which it is tried again.
+    """
+
+    def __init__(
+        self,
+        model_names: Iterable[str],
+        error_rate_threshold: float,
+        latency_threshold_seconds: float,
+        cooldown_seconds: float,
+        window_size: int = 20,
+        min_samples: int = 5,
+    ):
+        self.entries: List[ModelEntry] = [ModelEntry(name, window_size) for name in model_names]
+        if not self.entries:
+            raise ValueError("ModelPool requires at least one model")
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold_seconds = latency_threshold_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.min_samples = min_samples
+
+    def _is_available(self, entry: ModelEntry, now: float) -> bool:
+        if entry.ejected_until is None:
+            return True
+        if now >= entry.ejected_until:
+            # Cooldown elapsed - put the model back into rotation with a clean window
+            logger.info(f"✅ Model {entry.name} returning to rotation after cooldown")
+            entry.ejected_until = None
+            entry.reset()
+            return True
+        return False
+
+    def select(self, exclude: Optional[Iterable[str]] = None) -> ModelEntry:
+        """
+        Pick the model that should serve the next call
+
+        Args:
+            exclude: Model names to skip if any other model is available (e.g. the
+                model whose attempt just failed)
+
+        Returns:
+            ModelEntry: The first available model in configuration order. If every
+            model is out of rotation, the one closest to recovery is returned.
+        """
+        now = time.monotonic()
+        excluded = set(exclude or ())
+        available = [entry for entry in self.entries if self._is_available(entry, now)]
+
+        for entry in available:
+            if entry.name not in excluded:
+                return entry
+        if available:
+            return available[0]
+        return min(self.entries, key=lambda entry: entry.ejected_until)
+
+    def record(self, entry: ModelEntry, success: bool, latency: Optional[float] = None) -> None:
+        """
+        Record the outcome of a call and eject the model if it crossed a threshold
+
+        Args:
+            entry: The model that served the call
+            success: Whether the call produced a valid result
+            latency: Call latency in seconds (successful calls only)
+        """
+        entry.record(success, latency)
+        outcome = "success" if success else "error"
+        metrics.increment("gemini_model_calls_total", labels={"model": entry.name, "outcome": outcome})
+
+        if entry.ejected_until is not None or entry.sample_count < self.min_samples:
+            return
+
+        p90_latency = entry.latency_percentile(90.0)
+        too_many_errors = entry.error_rate >= self.error_rate_threshold
+        too_slow = p90_latency is not None and p90_latency >= self.latency_threshold_seconds
+
+        if too_many_errors or too_slow:
+            entry.ejected_until = time.monotonic() + self.cooldown_seconds
+            metrics.increment("gemini_model_ejections_total", labels={"model": entry.name})
+            logger.warning(
+                f"⚠️ Routing away from model {entry.name} for {self.cooldown_seconds:.0f}s "
+                f"(error_rate={entry.error_rate:.2f}, p90_latency={p90_latency})"
+            )
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Report the health of every model in the pool"""
+        now = time.monotonic()
+        return [
+            {
+                "model": entry.name,
+                "available": entry.ejected_until is None or now >= entry.ejected_until,
+                "error_rate": round(entry.error_rate, 3),
+                "p90_latency_seconds": entry.latency_percentile(90.0),
+            }
+            for entry in self.entries
+        ]
@@ -0,0 +1,226 @@
+import hashlib
+from array import array
+import json
+import random
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.metrics_service import metrics
+
+# MinHash permutations per signature (estimates Jaccard similarity to about +-0.06)
+SIGNATURE_SIZE = 64
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1  # Signature values are truncated to 32 bits
+
+# How far below the Jaccard threshold the LSH candidate curve is centred
+LSH_RECALL_MARGIN = 0.1
+
+# Words too common to tell two ideas apart
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or our so that the their "
+    "them they this to we what which who will with you your".split()
+)
+
+# Roast fields that may mention the startup by name
+PERSONALIZED_FIELDS = ("brutal_roast", "honest_feedback", "competitor_reality_check", "pitch_rewrite")
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercase, strip accents and punctuation, drop stopwords and plural s"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    words = re.findall(r"[a-z0-9]+", text.encode("ascii", "ignore").decode())
+    return [word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words if word not in STOPWORDS]
+
+
+def _features(request: RoastRequest) -> Set[str]:
+    """Unigrams and bigrams of the idea and the target users (kept apart by a field prefix)"""
+    features: Set[str] = set()
+    for field, text in (("i", request.idea_description), ("u", request.target_users)):
+        words = normalize_words(text)
+        features.update(f"{field}:{word}" for word in words)
+        features.update(f"{field}:{a} {b}" for a, b in zip(words, words[1:]))
+    return features
+
+
+def _permutations(count: int) -> List[Tuple[int, int]]:
+    """Fixed (a, b) pairs of the universal hashes that stand in for random permutations"""
+    rng = random.Random(0x5EED)
+    return [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(count)]
+
+
+PERMUTATIONS = _permutations(SIGNATURE_SIZE)
+
+
+def minhash(features: Set[str]) -> array:
+    """MinHash signature: per permutation, the smallest hash over the features (packed, 4 bytes each)"""
+    hashes = [int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big") for feature in features]
+    if not hashes:
+        return array("I", [MAX_HASH] * SIGNATURE_SIZE)
+    return array("I", (
+        min((a * value + b) % MERSENNE_PRIME for value in hashes) & MAX_HASH
+        for a, b in PERMUTATIONS
+    ))
+
+
+def _rows_per_band(threshold: float) -> int:
+    """
+    Most rows per LSH band whose candidate threshold stays well under the Jaccard threshold
+
+    A pair with Jaccard similarity s becomes a candidate with probability
+    1 - (1 - s^r)^b; the curve's midpoint (1/b)^(1/r) must sit below the
+    threshold so that true near-duplicates are rarely missed.
+    """
+    best = 1
+    for rows in (1, 2, 4, 8, 16):
+        if (rows / SIGNATURE_SIZE) ** (1 / rows) <= threshold - LSH_RECALL_MARGIN:
+            best = rows
+    return best
+
+
+class _Entry(NamedTuple):
+    signature: array
+    roast_level: str
+    startup_name: str
+    response: bytes  # zlib-compressed RoastResponse JSON
+
+
+class NearDuplicateIndex:
+    """
+    Serves cached roasts for ideas that are near-copies of ones already roasted
+
+    Each idea is reduced to a MinHash signature of its normalized idea description
+    and target users (word unigrams and bigrams); two ideas are near-duplicates when
+    their estimated Jaccard similarity reaches the threshold. Signatures are split
+    into LSH bands, so a lookup only compares the entries that share a band instead
+    of scanning the index. Roast levels never mix. Only signatures and compressed
+    responses are kept, and the least recently served entries are evicted past
+    max_entries.
+    """
+
+    def __init__(self, threshold: float, max_entries: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._rows_per_band = _rows_per_band(threshold)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._bands: Dict[Tuple[str, int, int], Set[int]] = {}
+        self._next_id = 0
+        self._stored_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _band_keys(self, signature: array, roast_level: str) -> List[Tuple[str, int, int]]:
+        rows = self._rows_per_band
+        return [
+            (roast_level, start, hash(signature[start:start + rows].tobytes()))
+            for start in range(0, SIGNATURE_SIZE, rows)
+        ]
+
+    def _evict_oldest(self) -> None:
+        entry_id, entry = self._entries.popitem(last=False)
+        self._stored_bytes -= len(entry.response)
+        for key in self._band_keys(entry.signature, entry.roast_level):
+            bucket = self._bands.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._bands[key]
+
+    def _personalize(self, entry: _Entry, request: RoastRequest) -> RoastResponse:
+        """Rebuild the cached roast, swapping in the new startup's name"""
+        data = json.loads(zlib.decompress(entry.response))
+        old_name, new_name = entry.startup_name, request.startup_name
+        if old_name and old_name != new_name:
+            for field in PERSONALIZED_FIELDS:
+                data[field] = data[field].replace(old_name, new_name)
+            data["survival_tips"] = [tip.replace(old_name, new_name) for tip in data["survival_tips"]]
+        return RoastResponse(**data)
+
+    def _best_match(self, signature: array, roast_level: str) -> Optional[int]:
+        """Id of the most similar entry above the threshold (call with the lock held)"""
+        best: Optional[Tuple[float, int]] = None
+        candidates: Set[int] = set()
+        for key in self._band_keys(signature, roast_level):
+            candidates.update(self._bands.get(key, ()))
+        for entry_id in candidates:
+            other = self._entries[entry_id].signature
+            similarity = sum(x == y for x, y in zip(signature, other)) / SIGNATURE_SIZE
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = (similarity, entry_id)
+        return best[1] if best is not None else None
+
+    def contains(self, request: RoastRequest) -> bool:
+        """Whether lookup() would serve this request from cache (hit/miss stats untouched)"""
+        signature = minhash(_features(request))
+        with self._lock:
+            return self._best_match(signature, request.roast_level) is not None
+
+    def lookup(self, request: RoastRequest) -> Optional[RoastResponse]:
+        """
+        Find a cached roast for a near-identical idea at the same roast level
+
+        Args:
+            request: The incoming roast request
+
+        Returns:
+            RoastResponse: The closest cached roast, personalized, or None
+        """
+        signature = minhash(_features(request))
+        with self._lock:
+            best = self._best_match(signature, request.roast_level)
+            if best is None:
+                self.misses += 1
+                entry = None
+            else:
+                self.hits += 1
+                self._entries.move_to_end(best)
+                entry = self._entries[best]
+            hit_rate = self.hits / (self.hits + self.misses)
+
+        metrics.increment("near_duplicate_lookups_total", labels={"result": "hit" if entry else "miss"})
+        metrics.set_gauge("near_duplicate_hit_rate", hit_rate)
+        return self._personalize(entry, request) if entry is not None else None
+
+    def add(self, request: RoastRequest, response: RoastResponse) -> None:
+        """Remember a freshly generated roast for future near-duplicate requests"""
+        entry = _Entry(
+            signature=minhash(_features(request)),
+            roast_level=request.roast_level,
+            startup_name=request.startup_name,
+            response=zlib.compress(response.model_dump_json().encode()),
+        )
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._stored_bytes += len(entry.response)
+            for key in self._band_keys(entry.signature, entry.roast_level):
+                self._bands.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+
+    def status(self) -> dict:
+        """Hit rate and size of the index"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "stored_bytes": self._stored_bytes,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# Global near-duplicate index instance
+near_duplicate_index = NearDuplicateIndex(
+    threshold=settings.near_duplicate_threshold,
+    max_entries=settings.near_duplicate_max_entries
+)
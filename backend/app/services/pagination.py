@@ -0,0 +1,31 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque keyset cursor for a roast row: its (created_at, id) position"""
+    raw = json.dumps([row["created_at"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns:
+        Tuple of (created_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, roast_id = json.loads(raw)
+        # Both parts end up in a PostgREST filter string, so only re-serialized values leave here
+        return datetime.fromisoformat(str(created_at)).isoformat(), str(uuid.UUID(str(roast_id)))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
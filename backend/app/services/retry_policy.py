@@ -0,0 +1,153 @@
+import asyncio
+import json
+import random
+import re
+from enum import Enum
+from typing import Dict, NamedTuple, Optional
+
+from app.services.deadline import DeadlineExceeded
+from app.services.key_pool import KeyPoolExhausted
+
+
+class ContentBlockedError(ValueError):
+    """Raised when Gemini refuses to generate content (safety filters)"""
+
+
+class ErrorClass(str, Enum):
+    """How a failed generation attempt should be treated"""
+    TRANSIENT = "transient"  # Network blips, 5xx, timeouts - back off and retry
+    QUOTA = "quota"  # 429 / exhausted keys - wait for Retry-After, then retry
+    MALFORMED = "malformed"  # Unparseable or incomplete JSON - regenerate quickly
+    BLOCKED = "blocked"  # Safety-filter blocks - deterministic, never retry
+    FATAL = "fatal"  # Bad request, auth, deadline - never retry
+
+
+class RetryStrategy(NamedTuple):
+    """Backoff parameters for one error class"""
+    max_retries: Optional[int]  # None = bounded only by the request deadline
+    base_delay: float
+    max_delay: float
+
+
+DEFAULT_STRATEGIES: Dict[ErrorClass, RetryStrategy] = {
+    ErrorClass.TRANSIENT: RetryStrategy(max_retries=None, base_delay=0.5, max_delay=8.0),
+    ErrorClass.QUOTA: RetryStrategy(max_retries=None, base_delay=1.0, max_delay=30.0),
+    ErrorClass.MALFORMED: RetryStrategy(max_retries=2, base_delay=0.1, max_delay=0.5),
+    ErrorClass.BLOCKED: RetryStrategy(max_retries=0, base_delay=0.0, max_delay=0.0),
+    ErrorClass.FATAL: RetryStrategy(max_retries=0, base_delay=0.0, max_delay=0.0),
+}
+
+_RETRY_IN_PATTERN = re.compile(r"retry in ([0-9]+(?:\.[0-9]+)?)\s*s", re.IGNORECASE)
+
+
+def classify_error(error: BaseException) -> ErrorClass:
+    """
+    Classify a generation failure into a retry class
+
+    Args:
+        error: The exception raised by a generation attempt
+
+    Returns:
+        ErrorClass: The class that decides the retry strategy
+    """
+    from google.api_core import exceptions as google_exceptions
+
+    if isinstance(error, ContentBlockedError):
+        return ErrorClass.BLOCKED
+    if isinstance(error, (google_exceptions.ResourceExhausted, KeyPoolExhausted)):
+        return ErrorClass.QUOTA
+    if isinstance(error, DeadlineExceeded):
+        return ErrorClass.FATAL
+    if isinstance(error, (json.JSONDecodeError, ValueError)):
+        return ErrorClass.MALFORMED
+    if isinstance(error, (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+        ConnectionError,
+        TimeoutError,
+        asyncio.TimeoutError,
+    )):
+        return ErrorClass.TRANSIENT
+    if isinstance(error, google_exceptions.GoogleAPICallError):
+        return ErrorClass.FATAL  # 4xx such as InvalidArgument or PermissionDenied
+    return ErrorClass.TRANSIENT
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Extract a server-provided retry delay from an exception, if any
+
+    Looks at (in order) an explicit ``retry_after`` attribute, gRPC RetryInfo
+    details, an HTTP ``Retry-After`` header and a "retry in Ns" hint in the message.
+
+    Args:
+        error: The exception raised by a generation attempt
+
+    Returns:
+        float: Delay in seconds, or None if the server gave no hint
+    """
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+
+    for detail in getattr(error, "details", None) or []:
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        header = headers.get("retry-after") or headers.get("Retry-After")
+        try:
+            if header is not None:
+                return float(header)
+        except ValueError:
+            pass  # HTTP-date form is not used by Gemini
+
+    match = _RETRY_IN_PATTERN.search(str(error))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class RetryPolicy:
+    """Decides whether and when to retry a failed attempt within a time budget"""
+
+    def __init__(self, strategies: Optional[Dict[ErrorClass, RetryStrategy]] = None):
+        self.strategies = strategies or DEFAULT_STRATEGIES
+
+    def next_delay(
+        self,
+        error: BaseException,
+        retries_so_far: int,
+        remaining_seconds: float,
+    ) -> Optional[float]:
+        """
+        Compute the delay before the next attempt
+
+        Args:
+            error: The exception raised by the last attempt
+            retries_so_far: Retries already made for this error class
+            remaining_seconds: Time left in the request deadline
+
+        Returns:
+            float: Seconds to sleep before retrying, or None to give up
+        """
+        strategy = self.strategies[classify_error(error)]
+        if strategy.max_retries is not None and retries_so_far >= strategy.max_retries:
+            return None
+
+        server_delay = retry_after_seconds(error)
+        if server_delay is not None:
+            # Respect the server's hint, with a little jitter to avoid synchronized retries
+            delay = server_delay + random.uniform(0, 0.1 * server_delay)
+        else:
+            # Full jitter exponential backoff
+            ceiling = min(strategy.max_delay, strategy.base_delay * (2 ** retries_so_far))
+            delay = random.uniform(0, ceiling)
+
+        if delay >= remaining_seconds:
+            return None
+        return delay
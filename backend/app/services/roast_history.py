@@ -0,0 +1,60 @@
+import itertools
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.cache import TTLCache
+
+# History pages kept per user (first page plus a few cursors deep)
+MAX_PAGES_PER_USER = 16
+
+
+class RoastHistoryCache:
+    """
+    Short-TTL per-user cache of /me/roasts pages
+
+    All of a user's cached pages live under one entry, so a new save drops them in
+    one step. Invalidation is per worker; the TTL bounds staleness across workers.
+
+    A page read from the database is only stored if the user was not invalidated
+    since the read began: readers take generation() first and pass it to set(), so
+    a save landing mid-read cannot be overwritten by the stale page for a whole TTL.
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self._users = TTLCache("roast_history", max_users, ttl_seconds)
+        self._clock = itertools.count(1)
+        self._generation = 0
+        # User -> generation of their last invalidation (outlives any read in flight)
+        self._invalidated = TTLCache("roast_history_invalidations", max_users, ttl_seconds)
+
+    def generation(self) -> int:
+        """Current invalidation generation; take it before reading the database"""
+        return self._generation
+
+    def get(self, user_id: str, cursor: Optional[str], limit: int) -> Optional[dict]:
+        pages: Optional[Dict[Tuple[Optional[str], int], dict]] = self._users.get(user_id)
+        return pages.get((cursor, limit)) if pages is not None else None
+
+    def set(self, user_id: str, cursor: Optional[str], limit: int, page: dict, generation: int) -> None:
+        invalidated_at = self._invalidated.get(user_id)
+        if invalidated_at is not None and invalidated_at > generation:
+            return  # The user saved a roast after this page was read
+        pages = self._users.get(user_id)
+        if pages is None:
+            pages = {}
+            self._users.set(user_id, pages)
+        if len(pages) < MAX_PAGES_PER_USER:
+            pages[(cursor, limit)] = page
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop every cached page of a user (called once their new roast is committed)"""
+        self._generation = next(self._clock)
+        self._invalidated.set(user_id, self._generation)
+        self._users.pop(user_id)
+
+
+# Global roast history cache instance
+roast_history_cache = RoastHistoryCache(
+    max_users=settings.roast_history_cache_max_users,
+    ttl_seconds=settings.roast_history_cache_ttl_seconds
+)
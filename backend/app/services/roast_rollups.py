@@ -0,0 +1,153 @@
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+# Counters kept per bucket
+FIELDS = (
+    "roasts", "soft", "medium", "nuclear", "anonymous", "authenticated",
+    "generation_failures", "persist_failures",
+)
+FIELD_INDEX = {field: index for index, field in enumerate(FIELDS)}
+LEVEL_FIELDS = {"Soft": "soft", "Medium": "medium", "Nuclear": "nuclear"}
+
+# Resolution name -> (bucket width in seconds, buckets kept)
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    "minute": (60, 24 * 60),  # 24 hours
+    "hour": (3600, 30 * 24),  # 30 days
+    "day": (86400, 366),  # 1 year
+}
+
+
+class RingBufferSeries:
+    """
+    Fixed-size ring of time buckets, each holding one counter per FIELDS entry
+
+    Slot i holds bucket number b (b = timestamp // width) when b % slots == i.
+    Writing to a slot that still holds an older bucket resets it first, so the
+    ring always covers the most recent `slots` buckets in constant memory.
+    """
+
+    def __init__(self, width_seconds: int, slots: int):
+        self.width_seconds = width_seconds
+        self.slots = slots
+        self._bucket_ids = array("q", [-1] * slots)
+        self._counters = array("L", [0] * (slots * len(FIELDS)))
+
+    def add(self, timestamp: float, counts: Dict[str, int]) -> None:
+        bucket = int(timestamp // self.width_seconds)
+        slot = bucket % self.slots
+        base = slot * len(FIELDS)
+        if self._bucket_ids[slot] != bucket:
+            self._bucket_ids[slot] = bucket
+            for offset in range(len(FIELDS)):
+                self._counters[base + offset] = 0
+        for field, count in counts.items():
+            self._counters[base + FIELD_INDEX[field]] += count
+
+    def read(self, since: float, until: float) -> List[Tuple[int, List[int]]]:
+        """Buckets overlapping [since, until), oldest first (missing buckets read as zeros)"""
+        first = int(since // self.width_seconds)
+        last = int((until - 1e-9) // self.width_seconds)
+        newest = int(time.time() // self.width_seconds)
+        first = max(first, newest - self.slots + 1)  # Older buckets were overwritten
+        last = min(last, newest, first + self.slots - 1)  # No future buckets, never more than the ring holds
+        points = []
+        for bucket in range(first, last + 1):
+            slot = bucket % self.slots
+            if self._bucket_ids[slot] == bucket:
+                base = slot * len(FIELDS)
+                points.append((bucket, list(self._counters[base:base + len(FIELDS)])))
+            else:
+                points.append((bucket, [0] * len(FIELDS)))
+        return points
+
+
+class RoastRollups:
+    """
+    Roast volume, level mix, anonymous/authenticated split and failures over time
+
+    Counters are rolled up at write time into ring buffers at minute, hour and
+    day resolution, so a time-series query reads at most a few hundred buckets and
+    never touches the roasts table. Rollups are kept per worker process and start
+    empty on restart.
+    """
+
+    def __init__(self, resolutions: Dict[str, Tuple[int, int]]):
+        self._lock = threading.Lock()
+        self._series = {name: RingBufferSeries(width, slots) for name, (width, slots) in resolutions.items()}
+
+    def _add(self, counts: Dict[str, int]) -> None:
+        now = time.time()
+        with self._lock:
+            for series in self._series.values():
+                series.add(now, counts)
+
+    def record_saved(self, rows: Iterable[dict]) -> None:
+        """Count freshly saved roasts (called from DatabaseService after every successful save)"""
+        counts: Dict[str, int] = {}
+        for row in rows:
+            for field in (
+                "roasts",
+                LEVEL_FIELDS.get(row.get("roast_level")),
+                "authenticated" if row.get("user_id") else "anonymous",
+            ):
+                if field is not None:
+                    counts[field] = counts.get(field, 0) + 1
+        if counts:
+            self._add(counts)
+
+    def record_failure(self, stage: str, count: int = 1) -> None:
+        """
+        Count roasts that failed
+
+        Args:
+            stage: "generation" (Gemini gave up) or "persist" (the database save failed)
+            count: Number of roasts affected
+        """
+        self._add({f"{stage}_failures": count})
+
+    def query(self, resolution: str, since: float, until: float) -> List[dict]:
+        """
+        Read the buckets of one resolution overlapping a time range
+
+        Args:
+            resolution: Key of RESOLUTIONS
+            since: Range start (Unix time, inclusive)
+            until: Range end (Unix time, exclusive)
+
+        Returns:
+            list: One point per bucket, oldest first
+        """
+        series = self._series[resolution]
+        with self._lock:
+            buckets = series.read(since, until)
+
+        points = []
+        for bucket, values in buckets:
+            counts = dict(zip(FIELDS, values))
+            attempts = counts["roasts"] + counts["generation_failures"] + counts["persist_failures"]
+            failures = attempts - counts["roasts"]
+            points.append({
+                "start": datetime.fromtimestamp(bucket * series.width_seconds, tz=timezone.utc).isoformat(),
+                "roasts": counts["roasts"],
+                "roast_levels": {level: counts[field] for level, field in LEVEL_FIELDS.items()},
+                "anonymous": counts["anonymous"],
+                "authenticated": counts["authenticated"],
+                "failures": {
+                    "generation": counts["generation_failures"],
+                    "persist": counts["persist_failures"],
+                },
+                "failure_rate": round(failures / attempts, 4) if attempts else None,
+            })
+        return points
+
+    def max_range_seconds(self, resolution: str) -> int:
+        """How far back a resolution reaches"""
+        series = self._series[resolution]
+        return series.width_seconds * series.slots
+
+
+# Global roast rollups instance
+roast_rollups = RoastRollups(RESOLUTIONS)
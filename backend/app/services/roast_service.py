@@ -1,14 +1,30 @@
+import asyncio
 import json
 import logging
 import re
-from typing import Dict, Any
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Set, Tuple
 from fastapi import HTTPException
 
 from app.config.settings import settings
 from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.metrics_service import metrics
+from app.services.connection_pool import gemini_connections
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.key_pool import ApiKey, KeyPool
+from app.services.model_pool import ModelEntry, ModelPool
+from app.services.near_duplicates import near_duplicate_index
+from app.services.roast_rollups import roast_rollups
+from app.services.structured_logging import payload_dumps
+from app.services.tracing import current_span, traced, tracer
+from app.services.trending import trending_service
+from app.services.usage_ledger import GenerationUsage, usage_ledger
+from app.services.retry_policy import ContentBlockedError, ErrorClass, RetryPolicy, classify_error, retry_after_seconds
+
+if TYPE_CHECKING:
+    # google.generativeai is slow to import; it is loaded when the service is first built
+    import google.generativeai as genai
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,11 +35,13 @@ class RoastService:
     
     def __init__(self):
         """Initialize the Gemini client with refined safety settings"""
-        # Configure Gemini API
+        import google.generativeai as genai
+        
+        # Configure Gemini API (the primary key uses the default client)
         genai.configure(api_key=settings.gemini_api_key)
         
         # Initialize the model with generation configuration
-        generation_config = {
+        self.generation_config = {
             "temperature": 0.7,  # Slightly more controlled for JSON output
             "top_p": 0.9,
             "top_k": 40,
@@ -31,7 +49,7 @@ class RoastService:
         }
         
         # Refined safety settings to allow "Nuclear" roasts while blocking harmful content
-        safety_settings = [
+        self.safety_settings = [
             {
                 "category": "HARM_CATEGORY_HARASSMENT",
                 "threshold": "BLOCK_ONLY_HIGH"  # Allow roast-style mean humor
@@ -50,11 +68,98 @@ class RoastService:
             }
         ]
         
-        self.model = genai.GenerativeModel(
-            model_name=settings.gemini_model,
-            generation_config=generation_config,
-            safety_settings=safety_settings
+        # Pool of API keys balanced by per-key quota; each key gets its own client (and gRPC channel),
+        # created on first use because grpc.aio binds it to the running event loop (this may run on a thread)
+        self.key_pool = KeyPool(
+            keys=[(api_key, rpm, None) for api_key, rpm in settings.gemini_key_quotas],
+            cooldown_seconds=settings.gemini_key_cooldown_seconds,
+            max_wait_seconds=settings.gemini_key_max_wait_seconds
+        )
+        
+        # Ordered pool of models, tried in order
+        self.model_pool = ModelPool(
+            model_names=settings.gemini_models,
+            error_rate_threshold=settings.model_error_rate_threshold,
+            latency_threshold_seconds=settings.model_latency_threshold_seconds,
+            cooldown_seconds=settings.model_cooldown_seconds,
+            window_size=settings.model_health_window
         )
+        
+        # One GenerativeModel instance per (model, API key), created on first use
+        self._models: Dict[Tuple[str, str], "genai.GenerativeModel"] = {}
+        
+        # Error-class-aware retries bounded by the request deadline
+        self.retry_policy = RetryPolicy()
+        
+        # Admission limit on concurrent generations, shared by /roast and batch roasts
+        self.admission = asyncio.Semaphore(settings.max_concurrent_generations)
+        self.generations_in_flight = 0
+        self._admission_waits: Dict[object, float] = {}  # Waiter token -> perf_counter() when it started waiting
+        
+        # Fire-and-forget usage bookkeeping (referenced so it is not garbage collected mid-flight)
+        self._background_tasks: Set[asyncio.Task] = set()
+    
+    def admission_status(self) -> Tuple[int, int, float]:
+        """
+        Live load of the generation admission limit
+        
+        Returns:
+            Tuple of (generations in flight, requests queued for a slot,
+            seconds the longest-queued request has waited)
+        """
+        now = time.perf_counter()
+        oldest = min(self._admission_waits.values(), default=now)
+        return self.generations_in_flight, len(self._admission_waits), now - oldest
+    
+    def _create_client(self, api_key: str) -> Any:
+        """Create a dedicated async Gemini client bound to one API key"""
+        from google.ai import generativelanguage as glm
+        from google.api_core import client_options as client_options_lib
+        
+        return glm.GenerativeServiceAsyncClient(
+            client_options=client_options_lib.ClientOptions(api_key=api_key)
+        )
+    
+    def _client(self, key: ApiKey) -> Any:
+        """The key's async client, created on the event loop thread the first time it is needed"""
+        if key.client is None:
+            key.client = self._create_client(key.key)
+        return key.client
+    
+    def _connection_ready(self, key: ApiKey) -> bool:
+        """Whether the key's gRPC channel is already connected, i.e. the next call reuses it"""
+        import grpc
+        
+        try:
+            return key.client.transport.grpc_channel.get_state(try_to_connect=False) == grpc.ChannelConnectivity.READY
+        except Exception:
+            return False
+    
+    async def ping_connection(self, key: ApiKey) -> None:
+        """
+        Open or keep alive a key's connection with a count_tokens call
+        
+        count_tokens does not use generation quota, so this bypasses the key pool.
+        """
+        gemini_connections.record(key.label, reused=self._connection_ready(key))
+        model = self._get_model(self.model_pool.entries[0], key)
+        await asyncio.wait_for(model.count_tokens_async("ping"), timeout=10.0)
+    
+    def _get_model(self, entry: ModelEntry, key: ApiKey) -> "genai.GenerativeModel":
+        """Get the GenerativeModel for a pooled model bound to a pooled API key"""
+        import google.generativeai as genai
+        
+        cache_key = (entry.name, key.key)
+        model = self._models.get(cache_key)
+        if model is None:
+            model = genai.GenerativeModel(
+                model_name=entry.name,
+                generation_config=self.generation_config,
+                safety_settings=self.safety_settings
+            )
+            model._async_client = self._client(key)
+            self._models[cache_key] = model
+        return model
     
     def _get_roast_tone_instruction(self, roast_level: str) -> str:
         """Get the tone instruction based on roast level"""
@@ -189,64 +294,292 @@ JSON Response:
                 tips = tips[:7]
             response_data["survival_tips"] = tips
     
-    @retry(
-        stop=stop_after_attempt(2),  # Retry exactly 1 time (2 total attempts)
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((json.JSONDecodeError, ValueError, ConnectionError)),
-        reraise=True
-    )
-    async def _generate_roast_with_retry(self, prompt: str, startup_name: str) -> dict:
+    @traced("gemini.call")
+    async def _generate_once(self, entry: ModelEntry, prompt: str, startup_name: str, deadline: Deadline, usage: GenerationUsage) -> dict:
         """
-        Generate roast content with retry logic for API failures and JSON parsing errors
+        Perform a single Gemini call and parse/validate its JSON output
         
         Args:
+            entry: The pooled model to call
             prompt: The formatted prompt for Gemini
             startup_name: Name of the startup for logging
+            deadline: Request deadline bounding the wait for API key quota
+            usage: Token usage of the generation this call belongs to
             
         Returns:
             Parsed and validated response data
-            
-        Raises:
-            Various exceptions that will be caught by the retry decorator
         """
-        logger.info(f"Attempting to generate roast for: {startup_name}")
+        key = await self.key_pool.acquire(max_wait=deadline.cap(self.key_pool.max_wait_seconds))
+        gemini_connections.record(key.label, reused=self._connection_ready(key))
+        current_span().set_attributes({"gemini.model": entry.name, "gemini.api_key": key.label})
+        usage.model = entry.name
+        usage.calls += 1
+        started = time.perf_counter()
+        try:
+            response_data = await self._call_model(self._get_model(entry, key), prompt, startup_name, usage)
+        except asyncio.CancelledError:
+            raise  # A cancelled hedge loser says nothing about model health
+        except Exception as e:
+            error_class = classify_error(e)
+            if error_class == ErrorClass.QUOTA:
+                # Quota is a property of the key, not of the model
+                self.key_pool.mark_rate_limited(key, retry_after=retry_after_seconds(e))
+            elif error_class in (ErrorClass.TRANSIENT, ErrorClass.MALFORMED):
+                # Safety blocks and bad requests depend on the prompt, not on model health
+                self.key_pool.record_error(key)
+                self.model_pool.record(entry, success=False)
+            raise
         
+        latency = time.perf_counter() - started
+        self.model_pool.record(entry, success=True, latency=latency)
+        metrics.observe("gemini_call_latency_seconds", latency)
+        return response_data
+    
+    async def _call_model(self, model: "genai.GenerativeModel", prompt: str, startup_name: str, usage: GenerationUsage) -> dict:
+        """Call a Gemini model and return its parsed, validated JSON output"""
+        from google.generativeai.types import BlockedPromptException, StopCandidateException
+        
+        # Generate content using Gemini (async so the call can be cancelled when hedged)
         try:
-            # Generate content using Gemini
-            response = self.model.generate_content(prompt)
-            
-            # Check if response was blocked by safety filters
-            if not response.text:
-                logger.error(f"Gemini response was blocked for {startup_name}")
-                raise ValueError("Content generation was blocked by safety filters")
-            
-            # Clean and parse the JSON response
-            cleaned_response = self._clean_json_response(response.text)
+            response = await model.generate_content_async(prompt)
+            output_tokens = usage.output_tokens
+            usage.add_response(response)  # Blocked and malformed responses are billed too
+            current_span().set_attribute("gemini.output_tokens", usage.output_tokens - output_tokens)
+            response_text = response.text
+        except (BlockedPromptException, StopCandidateException, ValueError) as e:
+            # The prompt or the candidate was blocked - response.text raises ValueError when empty
+            logger.error(f"Gemini response was blocked for {startup_name}: {str(e)}")
+            raise ContentBlockedError("Content generation was blocked by safety filters") from e
+        
+        # Check if response was blocked by safety filters
+        if not response_text:
+            logger.error(f"Gemini response was blocked for {startup_name}")
+            raise ContentBlockedError("Content generation was blocked by safety filters")
+        
+        # Clean and parse the JSON response
+        with tracer.span("clean_json", {"response.chars": len(response_text)}):
+            cleaned_response = self._clean_json_response(response_text)
             
             try:
                 response_data = json.loads(cleaned_response)
             except json.JSONDecodeError as e:
                 logger.error(f"JSON parsing failed for {startup_name}: {e}")
-                logger.error(f"Raw response: {response.text[:500]}...")
-                logger.error(f"Cleaned response: {cleaned_response[:500]}...")
+                payload_dumps.dump(logger, "Raw response", response_text)
                 raise  # This will trigger a retry
-            
-            # Validate the response structure
+        
+        # Validate the response structure
+        with tracer.span("validate_response"):
             self._validate_response_structure(response_data)
+        
+        return response_data
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """
+        Compute how long to wait on the primary call before firing a hedge
+        
+        Returns:
+            float: Delay in seconds taken from live latency stats, or None if
+            hedging is disabled or there are not enough samples yet
+        """
+        if not settings.hedge_enabled:
+            return None
+        if metrics.sample_count("gemini_call_latency_seconds") < settings.hedge_min_samples:
+            return None
+        return metrics.percentile("gemini_call_latency_seconds", settings.hedge_percentile)
+    
+    def _hedge_budget_available(self) -> bool:
+        """Check the global hedge budget (extra calls as a fraction of primary calls)"""
+        primary_calls = metrics.get_counter("gemini_primary_calls_total")
+        hedged_calls = metrics.get_counter("gemini_hedged_calls_total")
+        return hedged_calls + 1 <= primary_calls * settings.hedge_budget_ratio
+    
+    def _record_hedge_stats(self, effective_seconds: float) -> None:
+        """Export the hedge rate and the p99 improvement over individual (unhedged) calls"""
+        metrics.observe("gemini_effective_latency_seconds", effective_seconds)
+        
+        primary_calls = metrics.get_counter("gemini_primary_calls_total")
+        hedged_calls = metrics.get_counter("gemini_hedged_calls_total")
+        if primary_calls:
+            metrics.set_gauge("gemini_hedge_rate", hedged_calls / primary_calls)
+        
+        # Cancelled slow primaries never reach the per-call window, so this is a conservative estimate
+        call_p99 = metrics.percentile("gemini_call_latency_seconds", 99.0)
+        effective_p99 = metrics.percentile("gemini_effective_latency_seconds", 99.0)
+        if call_p99 is not None and effective_p99 is not None:
+            metrics.set_gauge("gemini_hedge_p99_improvement_seconds", call_p99 - effective_p99)
+    
+    async def _first_valid(self, tasks: Set[asyncio.Task]) -> Tuple[asyncio.Task, dict]:
+        """
+        Wait for the first task that completes without raising
+        
+        Args:
+            tasks: Competing generation tasks
             
-            logger.info(f"Successfully generated and validated roast for {startup_name}")
-            return response_data
+        Returns:
+            Tuple of the winning task and its result
             
+        Raises:
+            The last exception seen if every task fails
+        """
+        pending = set(tasks)
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task, task.result()
+                last_error = task.exception()
+        raise last_error
+    
+    async def _generate_hedged(self, entry: ModelEntry, prompt: str, startup_name: str, deadline: Deadline, usage: GenerationUsage) -> dict:
+        """
+        Run a generation attempt, hedging it with a duplicate call if the primary is slow
+        
+        If the primary has not finished by the configured latency percentile and the
+        hedge budget allows it, an identical request is fired. The first valid result
+        wins and the loser is cancelled.
+        
+        Args:
+            entry: The pooled model serving this attempt
+            prompt: The formatted prompt for Gemini
+            startup_name: Name of the startup for logging
+            deadline: Request deadline shared by both calls
+            usage: Token usage of the generation, shared by both calls
+            
+        Returns:
+            Parsed and validated response data
+        """
+        started = time.perf_counter()
+        metrics.increment("gemini_primary_calls_total")
+        primary = asyncio.create_task(self._generate_once(entry, prompt, startup_name, deadline, usage))
+        tasks = {primary}
+        
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done and self._hedge_budget_available():
+                    logger.info(f"Primary call for {startup_name} exceeded {hedge_delay:.2f}s - firing hedge request")
+                    metrics.increment("gemini_hedged_calls_total")
+                    current_span().set_attribute("gemini.hedged", True)
+                    tasks.add(asyncio.create_task(self._generate_once(entry, prompt, startup_name, deadline, usage)))
+            
+            winner, result = await self._first_valid(tasks)
+            if winner is not primary:
+                metrics.increment("gemini_hedge_wins_total")
+                logger.info(f"Hedge request won for {startup_name}")
+            
+            self._record_hedge_stats(time.perf_counter() - started)
+            return result
+        
+        finally:
+            # Cancel the losing (or abandoned) request
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Mark a failed loser's exception as retrieved
+    
+    async def _generate_roast_with_retry(self, prompt: str, startup_name: str, deadline: Deadline, usage: GenerationUsage) -> Tuple[dict, str]:
+        """
+        Generate roast content, retrying failed attempts according to their error class
+        
+        Transient and quota errors are retried with jittered backoff (honouring any
+        server Retry-After), malformed output is regenerated a couple of times, and
+        safety-filter blocks fail immediately. Every attempt and every sleep is bounded
+        by the request deadline rather than a fixed attempt count.
+        
+        Each attempt is routed to the healthiest model in the pool; a retry prefers a
+        different model from the one whose attempt just failed.
+        
+        Args:
+            prompt: The formatted prompt for Gemini
+            startup_name: Name of the startup for logging
+            deadline: Request deadline bounding all attempts and retry sleeps
+            usage: Token usage summed over every attempt
+            
+        Returns:
+            Tuple of the parsed and validated response data and the serving model name
+            
+        Raises:
+            The last attempt's exception once the policy gives up, or DeadlineExceeded
+        """
+        failed_models: List[str] = []
+        retries: Dict[ErrorClass, int] = {}
+        
+        while True:
+            deadline.check("llm_generation")
+            entry = self.model_pool.select(exclude=failed_models)
+            logger.info(f"Attempting to generate roast for: {startup_name} (model: {entry.name})")
+            
+            try:
+                with tracer.span("gemini.attempt", {"gemini.model": entry.name, "retry.number": len(failed_models)}):
+                    response_data = await deadline.run(
+                        "llm_generation",
+                        self._generate_hedged(entry, prompt, startup_name, deadline, usage)
+                    )
+                
+                logger.info(f"Successfully generated and validated roast for {startup_name}")
+                return response_data, entry.name
+            
+            except DeadlineExceeded:
+                logger.error(f"Roast generation for {startup_name} on {entry.name} ran out of time")
+                raise
+                
+            except Exception as e:
+                error_class = classify_error(e)
+                logger.error(f"Error in roast generation attempt for {startup_name} on {entry.name} ({error_class.value}): {str(e)}")
+                failed_models.append(entry.name)
+                
+                delay = self.retry_policy.next_delay(e, retries.get(error_class, 0), deadline.remaining())
+                if delay is None:
+                    raise
+                
+                retries[error_class] = retries.get(error_class, 0) + 1
+                usage.retries += 1
+                metrics.increment("gemini_retries_total", labels={"error_class": error_class.value})
+                logger.info(f"Retrying roast for {startup_name} in {delay:.2f}s ({error_class.value} error)")
+                with tracer.span("retry_backoff", {"retry.delay_seconds": round(delay, 3), "retry.error_class": error_class.value}):
+                    await deadline.run("retry_backoff", asyncio.sleep(delay))
+    
+    async def _count_prompt_and_record(self, prompt: str, usage: GenerationUsage, record: Dict[str, Any]) -> None:
+        """Count the prompt tokens an older SDK response left out, then write the ledger row"""
+        try:
+            entry = next((entry for entry in self.model_pool.entries if entry.name == usage.model), self.model_pool.entries[0])
+            # count_tokens does not use generation quota, so it takes no token from the key pool
+            key = self.key_pool.least_loaded()
+            result = await asyncio.wait_for(self._get_model(entry, key).count_tokens_async(prompt), timeout=10.0)
+            usage.add_prompt_tokens(result.total_tokens)
         except Exception as e:
-            logger.error(f"Error in roast generation attempt for {startup_name}: {str(e)}")
-            raise  # Re-raise to trigger retry logic
+            logger.warning(f"⚠️ Could not count prompt tokens for the usage ledger: {str(e)}")
+        usage_ledger.record(usage, **record)
     
-    async def analyze_startup(self, request: RoastRequest) -> RoastResponse:
+    def _record_usage(self, request: RoastRequest, prompt: str, usage: GenerationUsage, latency: float, success: bool, user_id: Optional[str]) -> None:
+        """Record a generation's tokens, latency and retries in the usage ledger and metrics"""
+        record = {"roast_level": request.roast_level, "latency": latency, "success": success, "user_id": user_id}
+        current_span().set_attributes({
+            "gemini.model": usage.model,
+            "gemini.calls": usage.calls,
+            "gemini.retries": usage.retries,
+            "gemini.prompt_tokens": usage.prompt_tokens if not usage.uncounted_prompts else None,  # Counted after the span ends
+            "gemini.output_tokens": usage.output_tokens,
+        })
+        if not usage.uncounted_prompts or not settings.usage_ledger_count_prompt_tokens:
+            usage_ledger.record(usage, **record)
+            return
+        task = asyncio.create_task(self._count_prompt_and_record(prompt, usage, record))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    @traced("analyze_startup")
+    async def analyze_startup(self, request: RoastRequest, deadline: Optional[Deadline] = None, user_id: Optional[str] = None) -> RoastResponse:
         """
         Analyze a startup and generate a comprehensive roast with robust error handling
         
         Args:
             request: The startup details to analyze
+            deadline: Request deadline (defaults to ROAST_DEADLINE_SECONDS from now)
+            user_id: UUID of the authenticated user, for the usage ledger (optional)
             
         Returns:
             RoastResponse: The generated roast and feedback
@@ -254,15 +587,56 @@ JSON Response:
         Raises:
             HTTPException: If all retry attempts fail
         """
+        if deadline is None:
+            deadline = Deadline(settings.roast_deadline_seconds)
+        
+        trending_service.record(request)
+        current_span().set_attribute("roast_level", request.roast_level)
+        
+        # A near-copy of an idea we already roasted gets that roast, addressed to the new name
+        if settings.near_duplicate_enabled:
+            cached = near_duplicate_index.lookup(request)
+            current_span().set_attribute("near_duplicate.hit", cached is not None)
+            if cached is not None:
+                logger.info(f"Serving cached roast of a near-duplicate idea for {request.startup_name}")
+                return cached
+        
+        usage = GenerationUsage()
+        usage_recorded = False
+        prompt = ""
+        generation_started: Optional[float] = None
         try:
             # Build the prompt
             prompt = self._build_prompt(request)
             
-            # Generate roast with retry logic
-            response_data = await self._generate_roast_with_retry(prompt, request.startup_name)
+            # Wait for an admission slot, then generate roast with retry logic
+            wait_started = time.perf_counter()
+            waiter = object()
+            self._admission_waits[waiter] = wait_started
+            try:
+                with tracer.span("admission_wait", {"admission.queued": len(self._admission_waits)}):
+                    await deadline.run("admission", self.admission.acquire())
+            finally:
+                del self._admission_waits[waiter]
+            generation_started = time.perf_counter()
+            metrics.observe("roast_admission_wait_seconds", generation_started - wait_started)
+            self.generations_in_flight += 1
+            try:
+                response_data, model_name = await self._generate_roast_with_retry(prompt, request.startup_name, deadline, usage)
+            finally:
+                self.generations_in_flight -= 1
+                self.admission.release()
+            
+            generation_seconds = time.perf_counter() - generation_started
             
-            # Create and validate the final response object
-            roast_response = RoastResponse(**response_data)
+            # Create and validate the final response object, tagged with the serving model
+            with tracer.span("validate_response", {"schema": "RoastResponse"}):
+                roast_response = RoastResponse(**{**response_data, "model": model_name})
+            if settings.near_duplicate_enabled:
+                near_duplicate_index.add(request, roast_response)
+            
+            usage_recorded = True
+            self._record_usage(request, prompt, usage, generation_seconds, True, user_id)
             
             logger.info(f"Successfully completed roast analysis for {request.startup_name}")
             return roast_response
@@ -270,6 +644,23 @@ JSON Response:
         except Exception as e:
             # After all retries have failed, raise a user-friendly HTTP exception
             logger.error(f"All retry attempts failed for {request.startup_name}: {str(e)}")
+            roast_rollups.record_failure("generation")
+            if usage.calls and not usage_recorded:
+                self._record_usage(request, prompt, usage, time.perf_counter() - generation_started, False, user_id)
+            
+            if isinstance(e, DeadlineExceeded):
+                raise HTTPException(
+                    status_code=504,
+                    detail=f"Failed to generate startup roast: Our roasting AI took too long to respond (deadline exceeded during {e.stage}). Please try again."
+                )
+            
+            if classify_error(e) == ErrorClass.QUOTA:
+                retry_after = retry_after_seconds(e)
+                raise HTTPException(
+                    status_code=503,
+                    detail="Failed to generate startup roast: Our roasting AI is at capacity. Please try again shortly.",
+                    headers={"Retry-After": str(int(retry_after) + 1)} if retry_after is not None else None
+                )
             
             # Determine the appropriate error message based on the exception type
             if "safety filters" in str(e).lower():
@@ -287,5 +678,31 @@ JSON Response:
             )
 
 
-# Global service instance
-roast_service = RoastService()
\ No newline at end of file
+# Global service instance, created lazily so importing the app stays cheap
+_roast_service: Optional[RoastService] = None
+_roast_service_lock = threading.Lock()
+
+
+def get_roast_service(create: bool = True) -> Optional[RoastService]:
+    """
+    Get the shared RoastService, building it on first use
+    
+    Args:
+        create: If False, return None instead of building a missing instance
+        
+    Returns:
+        RoastService: The global instance (None only when create is False)
+    """
+    global _roast_service
+    if _roast_service is None and create:
+        with _roast_service_lock:
+            if _roast_service is None:
+                _roast_service = RoastService()
+    return _roast_service
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps `from app.services.roast_service import roast_service` working (lazily)
+    if name == "roast_service":
+        return get_roast_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,290 @@
+import asyncio
+import gzip
+import json
+import logging
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, List, Optional
+
+from app.config.settings import settings
+from app.services.metrics_service import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rows written per transaction when backfilling the index
+BACKFILL_BATCH_SIZE = 5000
+
+# Column weights for bm25(): a hit in the name counts most, the generated roast least
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+# FTS5 documents plus a rowid -> roast mapping; the UNIQUE roast id keeps indexing idempotent
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS roast_docs (
+    rowid INTEGER PRIMARY KEY,
+    roast_id TEXT UNIQUE NOT NULL,
+    user_id TEXT,
+    startup_name TEXT NOT NULL,
+    roast_level TEXT,
+    model TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_roast_docs_user_id ON roast_docs(user_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS roast_fts USING fts5(
+    startup_name, idea_description, brutal_roast,
+    content='',
+    tokenize='porter unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+INSERT OR IGNORE INTO roast_fts(roast_fts, rank) VALUES ('rank', 'bm25({", ".join(map(str, BM25_WEIGHTS))})');
+"""
+
+INSERT_DOC_SQL = (
+    "INSERT OR IGNORE INTO roast_docs (roast_id, user_id, startup_name, roast_level, model, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+INSERT_FTS_SQL = "INSERT INTO roast_fts (rowid, startup_name, idea_description, brutal_roast) VALUES (?, ?, ?, ?)"
+# Matches scored per query. FTS5 yields matches in rowid order, so the newest ones are
+# collected without touching the rest; a term found in most roasts then costs about as
+# much as a rare one, at the price of ranking only its most recent matches.
+MAX_RANKED_MATCHES = 5000
+
+SEARCH_SQL = (
+    "SELECT d.roast_id AS id, d.startup_name, d.roast_level, d.model, d.created_at, -m.rank AS score FROM ("
+    "SELECT rowid, rank FROM roast_fts WHERE roast_fts MATCH ? "
+    f"ORDER BY rowid DESC LIMIT {MAX_RANKED_MATCHES}"
+    ") m JOIN roast_docs d ON d.rowid = m.rowid ORDER BY m.rank LIMIT ? OFFSET ?"
+)
+SEARCH_USER_SQL = (
+    "SELECT d.roast_id AS id, d.startup_name, d.roast_level, d.model, d.created_at, -m.rank AS score FROM ("
+    "SELECT roast_fts.rowid AS rowid, rank FROM roast_fts JOIN roast_docs u ON u.rowid = roast_fts.rowid "
+    f"WHERE roast_fts MATCH ? AND u.user_id = ? ORDER BY roast_fts.rowid DESC LIMIT {MAX_RANKED_MATCHES}"
+    ") m JOIN roast_docs d ON d.rowid = m.rowid ORDER BY m.rank LIMIT ? OFFSET ?"
+)
+
+# Words (optionally ending in * for a prefix search) and "quoted phrases"
+QUERY_TOKEN_PATTERN = re.compile(r'"([^"]+)"|(\w+\*?)', re.UNICODE)
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression
+
+    Every word or "phrase" must match (implicit AND). Terms are quoted, so user
+    input can never be parsed as FTS5 operators or column filters.
+
+    Returns:
+        str: The MATCH expression, or None if the query has no searchable terms
+    """
+    terms = []
+    for phrase, word in QUERY_TOKEN_PATTERN.findall(query):
+        if phrase:
+            words = re.findall(r"\w+", phrase, re.UNICODE)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        elif word.endswith("*"):
+            terms.append(f'"{word[:-1]}"*')
+        else:
+            terms.append(f'"{word}"')
+    return " ".join(terms) or None
+
+
+class RoastSearchIndex:
+    """
+    Local full-text index over stored roasts (SQLite FTS5, ranked by BM25)
+
+    The index lives in its own file next to the app, whichever storage backend is
+    in use, so searching never scans the roasts table. Saved roasts are indexed
+    incrementally on a background thread; a host that missed saves (another
+    replica, an outage) is brought up to date by backfilling from an export.
+    The FTS table is contentless: it stores only the inverted index, and result
+    rows come from the small roast_docs table.
+    """
+
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        # One thread owns the connection, so index writes never block the event loop and stay ordered
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, cached_statements=64)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            try:
+                conn.executescript(SCHEMA)
+            except sqlite3.OperationalError as e:
+                conn.close()
+                self.enabled = False
+                logger.warning(f"⚠️ Roast search disabled - SQLite build lacks FTS5: {str(e)}")
+                raise
+            self._conn = conn
+            logger.info(f"✅ Roast search index opened at {self.path}")
+        return self._conn
+
+    def _index_rows(self, rows: Iterable[dict]) -> int:
+        """Add roasts to the index in one transaction (on the index thread); returns rows added"""
+        conn = self._connection()
+        added = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                cursor = conn.execute(INSERT_DOC_SQL, (
+                    str(row["id"]), row.get("user_id"), row["startup_name"],
+                    row.get("roast_level"), row.get("model"), str(row["created_at"]),
+                ))
+                if cursor.rowcount:  # Already indexed otherwise
+                    conn.execute(INSERT_FTS_SQL, (
+                        cursor.lastrowid, row["startup_name"],
+                        row.get("idea_description") or "", row.get("brutal_roast") or "",
+                    ))
+                    added += 1
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def _index_in_background(self, rows: List[dict]) -> None:
+        try:
+            added = self._index_rows(rows)
+            metrics.increment("search_index_rows_total", added)
+        except Exception as e:
+            logger.error(f"❌ Failed to index {len(rows)} roasts for search: {str(e)}")
+
+    def add(self, rows: List[dict]) -> None:
+        """
+        Queue freshly saved roasts for indexing without waiting for the write
+
+        Args:
+            rows: Saved roast records (id, user_id, created_at and the text fields)
+        """
+        if self.enabled and rows:
+            self._executor.submit(self._index_in_background, rows)
+
+    def _reset(self) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM roast_docs")
+        conn.execute("INSERT INTO roast_fts(roast_fts) VALUES ('delete-all')")
+        conn.execute("COMMIT")
+
+    def _optimize(self) -> None:
+        # Merge the b-tree segments written by many batches so queries touch as few as possible
+        self._connection().execute("INSERT INTO roast_fts(roast_fts) VALUES ('optimize')")
+
+    def _backfill(self, rows: Iterable[dict], reset: bool) -> int:
+        if reset:
+            self._reset()
+        added, batch = 0, []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BACKFILL_BATCH_SIZE:
+                added += self._index_rows(batch)
+                batch = []
+        if batch:
+            added += self._index_rows(batch)
+        self._optimize()
+        metrics.increment("search_index_rows_total", added)
+        return added
+
+    def backfill(self, rows: Iterable[dict], reset: bool = False) -> int:
+        """
+        Index many roasts, skipping ones already indexed (blocking; for scripts)
+
+        Args:
+            rows: Roast records, e.g. the lines of an /admin/export NDJSON file
+            reset: Empty the index first (a full rebuild)
+
+        Returns:
+            int: Number of roasts added
+        """
+        return self._executor.submit(self._backfill, rows, reset).result()
+
+    async def reindex(self, pages: AsyncIterator[List[dict]], reset: bool = False) -> int:
+        """
+        Async counterpart of backfill, fed page by page (e.g. straight from the database)
+
+        Returns:
+            int: Number of roasts added
+        """
+        loop = asyncio.get_running_loop()
+        if reset:
+            await loop.run_in_executor(self._executor, self._reset)
+        added = 0
+        async for rows in pages:
+            added += await loop.run_in_executor(self._executor, self._index_rows, rows)
+        await loop.run_in_executor(self._executor, self._optimize)
+        metrics.increment("search_index_rows_total", added)
+        return added
+
+    def _search(self, match: str, user_id: Optional[str], limit: int, offset: int) -> List[dict]:
+        conn = self._connection()
+        if user_id is None:
+            rows = conn.execute(SEARCH_SQL, (match, limit, offset)).fetchall()
+        else:
+            rows = conn.execute(SEARCH_USER_SQL, (match, user_id, limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    async def search(self, query: str, limit: int, offset: int = 0, user_id: Optional[str] = None) -> Optional[List[dict]]:
+        """
+        Find roasts matching every term of a query, best BM25 score first
+
+        Args:
+            query: Free text; "quoted phrases" match exactly and word* matches prefixes
+            limit: Maximum number of results
+            offset: Results to skip (for pagination)
+            user_id: Only search this user's roasts (None searches every roast)
+
+        Returns:
+            list: Summary rows with their score, or None if the index is unavailable
+        """
+        if not self.enabled:
+            return None
+        match = build_match_query(query)
+        if match is None:
+            return []
+
+        started = time.perf_counter()
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._search, match, user_id, limit, offset
+            )
+            metrics.observe("search_query_latency_seconds", time.perf_counter() - started)
+            return results
+        except Exception as e:
+            logger.error(f"❌ Roast search failed for query {query!r}: {str(e)}")
+            return None
+
+
+def _read_export(path: str) -> Iterable[dict]:
+    """Yield the rows of an /admin/export NDJSON file (plain or .gz)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as export:
+        for line in export:
+            if line.strip():
+                yield json.loads(line)
+
+
+# Global roast search index instance (the file is opened on first use)
+roast_search_index = RoastSearchIndex(settings.search_index_path, enabled=settings.search_index_enabled)
+
+
+if __name__ == "__main__":
+    # Rebuild the index from an export:
+    #   python -m app.services.search_index roasts-export.ndjson[.gz] [--reset]
+    logging.basicConfig(level=logging.INFO)
+    args = [arg for arg in sys.argv[1:] if arg != "--reset"]
+    if len(args) != 1:
+        sys.exit("usage: python -m app.services.search_index EXPORT.ndjson[.gz] [--reset]")
+    count = roast_search_index.backfill(_read_export(args[0]), reset="--reset" in sys.argv)
+    logger.info(f"✅ Indexed {count} roasts from {args[0]}")
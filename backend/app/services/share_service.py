@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Dict, NamedTuple, Optional
+
+from app.config.settings import settings
+from app.schemas.roast import StoredRoast
+from app.services.cache import TTLCache
+from app.services.db_service import get_db_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SharedRoast(NamedTuple):
+    """A public roast rendered once: its JSON body and the strong ETag of that body"""
+    etag: str
+    body: bytes
+
+
+def render_shared_roast(record: dict) -> SharedRoast:
+    """Render the public view of a stored roast (the owner's user_id stays private)"""
+    public = StoredRoast(**record).model_dump(exclude={"user_id"})
+    body = json.dumps(public, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    return SharedRoast(etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"', body=body)
+
+
+class ShareService:
+    """
+    Serves public roast permalinks from a size-bounded in-process LRU
+
+    Stored roasts never change, so a hot share link costs one database read per
+    worker per TTL. Concurrent misses for the same roast share a single read, and
+    ids that do not exist are remembered briefly so a dead link (or a scan of
+    made-up ids) does not hit the database on every request. Database errors are
+    not cached: they raise DatabaseUnavailable to the caller.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, missing_ttl_seconds: float):
+        self._cache = TTLCache("shared_roasts", max_entries, ttl_seconds)
+        self._missing = TTLCache("shared_roasts_missing", max_entries, missing_ttl_seconds)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _load(self, roast_id: str) -> Optional[SharedRoast]:
+        db_service = await get_db_service()
+        record = await db_service.get_roast(roast_id)
+        if record is None:
+            self._missing.set(roast_id, True)
+            return None
+        shared = render_shared_roast(record)
+        self._cache.set(roast_id, shared)
+        return shared
+
+    async def get(self, roast_id: str) -> Optional[SharedRoast]:
+        """
+        Get the rendered public view of a roast
+
+        Args:
+            roast_id: UUID of the roast
+
+        Returns:
+            SharedRoast: The cached rendering, or None if the roast does not exist
+
+        Raises:
+            DatabaseUnavailable: If the roast could not be read
+        """
+        shared = self._cache.get(roast_id)
+        if shared is not None:
+            return shared
+        if self._missing.get(roast_id):
+            return None
+
+        inflight = self._inflight.get(roast_id)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load(roast_id))
+            self._inflight[roast_id] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(roast_id, None))
+        return await asyncio.shield(inflight)
+
+
+# Global share service instance
+share_service = ShareService(
+    max_entries=settings.share_cache_max_entries,
+    ttl_seconds=settings.share_cache_ttl_seconds,
+    missing_ttl_seconds=settings.share_missing_ttl_seconds
+)
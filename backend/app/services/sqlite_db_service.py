@@ -0,0 +1,397 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.db_service import ROAST_LIST_COLUMNS, DatabaseService, DatabaseUnavailable
+from app.services.metrics_service import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Same tables as the Supabase schema (UUIDs and timestamps as TEXT, JSONB as JSON TEXT)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    provider_id TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    name TEXT,
+    picture TEXT,
+    provider TEXT NOT NULL DEFAULT 'google',
+    last_login TEXT,
+    created_at TEXT NOT NULL,
+    UNIQUE (provider_id, provider)
+);
+
+CREATE TABLE IF NOT EXISTS roasts (
+    id TEXT PRIMARY KEY,
+    user_id TEXT REFERENCES users(id) ON DELETE SET NULL,
+    startup_name TEXT NOT NULL,
+    idea_description TEXT NOT NULL,
+    target_users TEXT,
+    budget TEXT,
+    roast_level TEXT,
+    brutal_roast TEXT,
+    honest_feedback TEXT,
+    competitor_reality_check TEXT,
+    survival_tips TEXT,
+    pitch_rewrite TEXT,
+    model TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_roasts_user_id ON roasts(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_roasts_created_at ON roasts(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_roasts_roast_level ON roasts(roast_level);
+
+CREATE TABLE IF NOT EXISTS login_events (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    provider TEXT NOT NULL,
+    success INTEGER,
+    timestamp TEXT,
+    ip_address TEXT,
+    user_agent TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_login_events_user_id ON login_events(user_id);
+CREATE INDEX IF NOT EXISTS idx_login_events_timestamp ON login_events(timestamp DESC);
+"""
+
+# Statements are constant strings so sqlite3's per-connection statement cache prepares each once
+UPSERT_USER_SQL = (
+    "INSERT INTO users (id, provider_id, email, name, picture, provider, last_login, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (provider_id, provider) DO UPDATE SET "
+    "email = excluded.email, name = excluded.name, picture = excluded.picture, last_login = excluded.last_login"
+)
+SELECT_USER_ID_SQL = "SELECT id FROM users WHERE provider_id = ? AND provider = ?"
+SELECT_USER_BY_EMAIL_SQL = "SELECT * FROM users WHERE email = ?"
+INSERT_LOGIN_EVENT_SQL = (
+    "INSERT INTO login_events (id, user_id, provider, success, timestamp, ip_address, user_agent) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_ROAST_SQL = (
+    "INSERT INTO roasts (id, user_id, startup_name, idea_description, target_users, budget, roast_level, "
+    "brutal_roast, honest_feedback, competitor_reality_check, survival_tips, pitch_rewrite, model, created_at) "
+    "VALUES (:id, :user_id, :startup_name, :idea_description, :target_users, :budget, :roast_level, "
+    ":brutal_roast, :honest_feedback, :competitor_reality_check, :survival_tips, :pitch_rewrite, :model, :created_at)"
+)
+LIST_USER_ROASTS_SQL = (
+    f"SELECT {', '.join(ROAST_LIST_COLUMNS)} FROM roasts WHERE user_id = ? "
+    "ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+LIST_USER_ROASTS_AFTER_SQL = (
+    f"SELECT {', '.join(ROAST_LIST_COLUMNS)} FROM roasts WHERE user_id = ? AND (created_at, id) < (?, ?) "
+    "ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+SELECT_ROAST_SQL = "SELECT * FROM roasts WHERE id = ?"
+ROAST_LEVEL_COUNTS_SQL = "SELECT roast_level, COUNT(*) AS count FROM roasts GROUP BY roast_level"
+
+
+class PendingWrite(NamedTuple):
+    """A write queued for the next group commit"""
+    operation: Callable[[sqlite3.Connection], Any]
+    future: asyncio.Future
+    on_commit: Optional[Callable[[], None]]
+    on_failure: Optional[Callable[[], None]]
+
+
+class SQLiteDatabaseService(DatabaseService):
+    """
+    Embedded SQLite storage for local development, benchmarks and single-node installs
+
+    The database runs in WAL mode with one writer and one reader connection, each on
+    its own thread so the event loop never blocks on disk I/O. Writes issued while a
+    transaction is in flight are queued and committed together in the next one
+    (group commit), each isolated by a savepoint so one failure does not sink the batch.
+
+    ":memory:" (tests) uses a single connection on the writer thread for reads and
+    writes: an in-memory database cannot use WAL, and a shared-cache one would
+    take table locks that fail concurrent readers with SQLITE_LOCKED.
+    """
+
+    remote = False
+    db_system = "sqlite"
+
+    def __init__(self, path: str, max_batch_size: int = 256):
+        self.path = path
+        self.max_batch_size = max_batch_size
+        self._write_conn = self._connect(path)
+        self._write_conn.executescript(SCHEMA)
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        if path == ":memory:":
+            self._read_conn = self._write_conn
+            self._read_executor = self._write_executor
+        else:
+            self._read_conn = self._connect(path)
+            self._read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-reader")
+        self._pending_writes: List[PendingWrite] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def create(cls, path: str) -> "SQLiteDatabaseService":
+        """Open (and if needed create) the database without blocking the event loop"""
+        try:
+            service = await asyncio.to_thread(cls, path)
+            logger.info(f"✅ SQLite database initialized at {path}")
+            return service
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize SQLite database at {path}: {str(e)}")
+            raise
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            path,
+            check_same_thread=False,  # Each connection is only used from its own executor thread
+            isolation_level=None,  # Transactions are managed explicitly
+            cached_statements=256,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; safe with WAL
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _run_write_batch(self, operations: List[Callable[[sqlite3.Connection], Any]]) -> List[Tuple[bool, Any]]:
+        """Run queued write operations in one transaction (on the writer thread)"""
+        conn = self._write_conn
+        results: List[Tuple[bool, Any]] = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for operation in operations:
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    value = operation(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_op")
+                    conn.execute("RELEASE write_op")
+                    results.append((False, e))
+                else:
+                    conn.execute("RELEASE write_op")
+                    results.append((True, value))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return results
+
+    async def _flush_writes(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending_writes:
+            batch = self._pending_writes[:self.max_batch_size]
+            del self._pending_writes[:len(batch)]
+            try:
+                results = await loop.run_in_executor(
+                    self._write_executor, self._run_write_batch, [write.operation for write in batch]
+                )
+            except Exception as e:
+                results = [(False, e)] * len(batch)
+            metrics.observe("sqlite_write_batch_size", len(batch))
+
+            for write, (ok, value) in zip(batch, results):
+                # Side effects follow the commit even when the caller stopped waiting
+                callback = write.on_commit if ok else write.on_failure
+                if callback is not None:
+                    try:
+                        callback()
+                    except Exception as e:
+                        logger.error(f"❌ SQLite post-commit hook failed: {str(e)}")
+                if write.future.done():
+                    continue  # The caller stopped waiting
+                if ok:
+                    write.future.set_result(value)
+                else:
+                    write.future.set_exception(value)
+
+    async def _write(
+        self,
+        operation: Callable[[sqlite3.Connection], Any],
+        on_commit: Optional[Callable[[], None]] = None,
+        on_failure: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """
+        Queue a write for the next group commit and wait for its result
+
+        Args:
+            operation: Runs the write on the writer connection
+            on_commit: Called on the event loop once the write is committed
+            on_failure: Called on the event loop if the write fails
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending_writes.append(PendingWrite(operation, future, on_commit, on_failure))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_writes())
+        return await future
+
+    async def _read(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run a read on the reader connection (WAL lets it proceed alongside writes)"""
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, operation, self._read_conn)
+
+    def _roast_row(self, request: RoastRequest, response: RoastResponse, user_id: Optional[str]) -> dict:
+        row = self._build_roast_record(request, response, user_id)
+        row["id"] = str(uuid.uuid4())
+        return row
+
+    def _to_db_row(self, row: dict) -> dict:
+        return {**row, "survival_tips": json.dumps(row["survival_tips"])}
+
+    def _from_db_row(self, row: sqlite3.Row) -> dict:
+        roast = dict(row)
+        roast["survival_tips"] = json.loads(roast["survival_tips"]) if roast["survival_tips"] else []
+        return roast
+
+    async def upsert_user(self, email: str, name: str, provider_id: str, picture: Optional[str] = None, provider: str = "google") -> Optional[str]:
+        now = datetime.utcnow().isoformat()
+
+        def upsert(conn: sqlite3.Connection) -> str:
+            conn.execute(UPSERT_USER_SQL, (str(uuid.uuid4()), provider_id, email, name, picture, provider, now, now))
+            return conn.execute(SELECT_USER_ID_SQL, (provider_id, provider)).fetchone()["id"]
+
+        try:
+            logger.info(f"Upserting user to database: {email} (provider: {provider}, provider_id: {provider_id})")
+            user_id = await self._write(upsert)
+            logger.info(f"✅ User {email} upserted successfully with ID: {user_id}")
+            return user_id
+        except Exception as e:
+            logger.error(f"❌ Failed to upsert user {email}: {str(e)}")
+            return None
+
+    async def log_login_event(self, user_id: str, provider: str, ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> None:
+        params = (str(uuid.uuid4()), user_id, provider, 1, datetime.utcnow().isoformat(), ip_address, user_agent)
+        try:
+            await self._write(lambda conn: conn.execute(INSERT_LOGIN_EVENT_SQL, params))
+            logger.info(f"✅ Login event logged for user {user_id}")
+        except Exception as e:
+            logger.error(f"❌ Failed to log login event for user {user_id}: {str(e)}")
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        try:
+            row = await self._read(lambda conn: conn.execute(SELECT_USER_BY_EMAIL_SQL, (email,)).fetchone())
+            return dict(row) if row is not None else None
+        except Exception as e:
+            logger.error(f"❌ Failed to get user by email {email}: {str(e)}")
+            return None
+
+    async def save_roast(self, request: RoastRequest, response: RoastResponse, user_id: Optional[str] = None) -> Optional[dict]:
+        try:
+            row = self._roast_row(request, response, user_id)
+            logger.info(f"Saving roast to database for startup: {request.startup_name} (user_id: {user_id or 'anonymous'})")
+
+            db_row = self._to_db_row(row)
+            # Indexing and rollups run at commit, even if this caller's wait times out first
+            await self._write(
+                lambda conn: conn.execute(INSERT_ROAST_SQL, db_row),
+                on_commit=lambda: self._roasts_saved(user_id, [row]),
+                on_failure=lambda: self._roasts_failed(1),
+            )
+
+            logger.info(f"✅ Successfully saved roast for {request.startup_name} to database")
+            return row
+        except Exception as e:
+            # Log the error but don't raise - this is fail-safe behavior
+            logger.error(f"❌ Failed to save roast for {request.startup_name} to database: {str(e)}")
+            return None
+
+    async def save_roasts_bulk(self, roasts: List[Tuple[RoastRequest, RoastResponse]], user_id: Optional[str] = None) -> int:
+        if not roasts:
+            return 0
+
+        try:
+            rows = [self._to_db_row(self._roast_row(request, response, user_id)) for request, response in roasts]
+            logger.info(f"Bulk saving {len(rows)} roasts to database (user_id: {user_id or 'anonymous'})")
+
+            await self._write(
+                lambda conn: conn.executemany(INSERT_ROAST_SQL, rows),
+                on_commit=lambda: self._roasts_saved(user_id, rows),
+                on_failure=lambda: self._roasts_failed(len(rows)),
+            )
+
+            logger.info(f"✅ Bulk saved {len(rows)} roasts to database")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"❌ Failed to bulk save {len(roasts)} roasts to database: {str(e)}")
+            return 0
+
+    async def list_user_roasts(self, user_id: str, limit: int, before: Optional[Tuple[str, str]] = None) -> Optional[List[dict]]:
+        if before is None:
+            sql, params = LIST_USER_ROASTS_SQL, (user_id, limit)
+        else:
+            sql, params = LIST_USER_ROASTS_AFTER_SQL, (user_id, before[0], before[1], limit)
+        try:
+            rows = await self._read(lambda conn: conn.execute(sql, params).fetchall())
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"❌ Failed to list roasts for user {user_id}: {str(e)}")
+            return None
+
+    async def list_roasts(
+        self,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        roast_level: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Optional[List[dict]]:
+        # Each combination of filters yields one statement text, so the statement cache still applies
+        clauses, params = [], []
+        for clause, value in (
+            ("created_at >= ?", since),
+            ("created_at < ?", until),
+            ("roast_level = ?", roast_level),
+            ("user_id = ?", user_id),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if after is not None:
+            clauses.append("(created_at, id) > (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        sql = f"SELECT * FROM roasts {where}ORDER BY created_at, id LIMIT ?"
+        params.append(limit)
+
+        try:
+            rows = await self._read(lambda conn: conn.execute(sql, params).fetchall())
+            return [self._from_db_row(row) for row in rows]
+        except Exception as e:
+            logger.error(f"❌ Failed to list roasts for export: {str(e)}")
+            return None
+
+    async def get_roast(self, roast_id: str) -> Optional[dict]:
+        try:
+            row = await self._read(lambda conn: conn.execute(SELECT_ROAST_SQL, (roast_id,)).fetchone())
+            return self._from_db_row(row) if row is not None else None
+        except Exception as e:
+            logger.error(f"❌ Failed to get roast {roast_id}: {str(e)}")
+            raise DatabaseUnavailable(str(e)) from e
+
+    async def get_roast_stats(self) -> Optional[dict]:
+        try:
+            # One grouped scan gives both the total and the per-level counts
+            rows = await self._read(lambda conn: conn.execute(ROAST_LEVEL_COUNTS_SQL).fetchall())
+            counts = {row["roast_level"]: row["count"] for row in rows}
+            return {
+                "total_roasts": sum(counts.values()),
+                "roast_levels": {level: counts.get(level, 0) for level in ["Soft", "Medium", "Nuclear"]},
+                "last_updated": datetime.utcnow().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"❌ Failed to get roast statistics: {str(e)}")
+            return None
+
+    async def health_check(self) -> bool:
+        try:
+            await self._read(lambda conn: conn.execute("SELECT 1").fetchone())
+            return True
+        except Exception as e:
+            logger.error(f"❌ Database health check failed: {str(e)}")
+            return False
@@ -0,0 +1,207 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.metrics_service import metrics
+from app.services.tracing import current_span
+
+# Request correlation id of the current task (set by CorrelationIdMiddleware and the job workers)
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "correlation_id", "trace_id", "sampled_1_in"}
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Stamps every record with the correlation id (and trace id) of the task that logged it"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        span = current_span()
+        record.trace_id = span.trace_id if span.sampled else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per-message-type sampling of INFO and DEBUG records
+
+    A message type is a logging call site (logger name and line number). Each one
+    keeps its first record and then one in every N, where N = 1 / rate for its
+    logger, so a chatty line is thinned without losing rare ones. Warnings and
+    errors are never sampled. Kept records carry `sampled_1_in` to scale counts.
+    """
+
+    def __init__(self, default_rate: float, rates: Dict[str, float]):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rates = rates
+        self._seen: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def _every(self, logger_name: str) -> int:
+        rate = self.default_rate
+        best = ""
+        for prefix, prefix_rate in self.rates.items():
+            if (logger_name == prefix or logger_name.startswith(prefix + ".")) and len(prefix) > len(best):
+                rate, best = prefix_rate, prefix
+        return 0 if rate <= 0 else max(1, round(1 / rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        every = self._every(record.name)
+        if every == 1:
+            return True
+        if every == 0:
+            return False
+        key = (record.name, record.lineno)
+        with self._lock:
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+        if seen % every:
+            metrics.increment("log_records_sampled_out_total")
+            return False
+        record.sampled_1_in = every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, correlation id and any extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        if getattr(record, "sampled_1_in", None):
+            entry["sampled_1_in"] = record.sampled_1_in
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking or erroring"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records never leave the process, so formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment("log_records_dropped_total")
+
+
+class PayloadDumpLimiter:
+    """
+    Token bucket for logging large payloads (raw model output and the like)
+
+    Dumps beyond the budget are counted instead of logged; the next dump that gets
+    through reports how many were suppressed in between.
+    """
+
+    def __init__(self, per_minute: float, max_chars: int):
+        self.per_minute = per_minute
+        self.max_chars = max_chars
+        self._tokens = per_minute
+        self._refilled_at = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def dump(self, log: logging.Logger, label: str, payload: str) -> None:
+        """
+        Log a payload at ERROR level if the budget allows
+
+        Args:
+            log: Logger of the calling module
+            label: What the payload is (e.g. "Raw response")
+            payload: Text to log, truncated to max_chars
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.per_minute, self._tokens + (now - self._refilled_at) * self.per_minute / 60)
+            self._refilled_at = now
+            if self._tokens < 1:
+                self._suppressed += 1
+                metrics.increment("log_payloads_suppressed_total")
+                return
+            self._tokens -= 1
+            suppressed, self._suppressed = self._suppressed, 0
+        log.error(
+            f"{label}: {payload[:self.max_chars]}...",
+            extra={"payload_chars": len(payload), "payloads_suppressed": suppressed},
+        )
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through a bounded queue drained by a background thread
+
+    Callers only stamp and enqueue records; formatting and writing to stderr
+    happen on the listener thread. LOG_FORMAT picks JSON lines or plain text.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(levelname)s:%(name)s:[%(correlation_id)s] %(message)s"))
+
+    rates = {}
+    for entry in settings.log_sample_rates.split(","):
+        name, _, rate = entry.strip().partition(":")
+        if name and rate:
+            rates[name] = float(rate)
+
+    handler = _NonBlockingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+    handler.addFilter(SamplingFilter(settings.log_info_sample_rate, rates))
+    handler.addFilter(CorrelationIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.log_level.upper())
+
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# Global payload dump limiter (large error payloads, shared by every module)
+payload_dumps = PayloadDumpLimiter(
+    per_minute=settings.log_payload_dumps_per_minute,
+    max_chars=settings.log_payload_max_chars
+)
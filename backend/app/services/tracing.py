@@ -0,0 +1,359 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.config.settings import settings
+from app.services.metrics_service import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+# Spans handed to the exporter per batch, and how often a partial batch is flushed
+EXPORT_BATCH_SIZE = 256
+EXPORT_INTERVAL_SECONDS = 2.0
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class Span:
+    """One timed operation of a trace, with OpenTelemetry-style attributes and status"""
+
+    sampled = True
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], kind: int, attributes: Optional[Dict[str, Any]]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[dict] = []
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, error: BaseException) -> None:
+        """Mark the span failed and attach the exception as an OTel "exception" event"""
+        self.status_code = STATUS_ERROR
+        self.status_message = str(error)[:500]
+        self.events.append({
+            "timeUnixNano": str(time.time_ns()),
+            "name": "exception",
+            "attributes": _otlp_attributes({
+                "exception.type": type(error).__name__,
+                "exception.message": str(error)[:500],
+            }),
+        })
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+class _NonRecordingSpan(Span):
+    """Stand-in for spans of unsampled traces: every call is a no-op"""
+
+    sampled = False
+
+    def __init__(self):
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span:
+    """The active span of this task (a no-op span outside sampled traces)"""
+    return _current_span.get() or NON_RECORDING_SPAN
+
+
+class SpanExporter(ABC):
+    """Destination for finished spans; export() runs on the tracer's export thread"""
+
+    @abstractmethod
+    def export(self, payload: dict) -> None:
+        """Ship one OTLP/JSON ExportTraceServiceRequest"""
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Logs one line per span, for local debugging"""
+
+    def export(self, payload: dict) -> None:
+        for span in payload["resourceSpans"][0]["scopeSpans"][0]["spans"]:
+            duration_ms = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+            attributes = {item["key"]: next(iter(item["value"].values())) for item in span["attributes"]}
+            status = " ERROR " + span["status"]["message"] if span["status"]["code"] == STATUS_ERROR else ""
+            logger.info(
+                f"🔎 trace={span['traceId']} span={span['spanId']} parent={span.get('parentSpanId', '-')} "
+                f"{span['name']} {duration_ms:.1f}ms {attributes}{status}"
+            )
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one OTLP/JSON request per line (readable by the collector's otlpjsonfile receiver)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, payload: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """POSTs OTLP/JSON to a collector's /v1/traces endpoint"""
+
+    def __init__(self, endpoint: str):
+        import httpx
+
+        self.endpoint = endpoint
+        self._client = httpx.Client(timeout=5.0)
+
+    def export(self, payload: dict) -> None:
+        response = self._client.post(self.endpoint, json=payload)
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+# Registry of span exporters, keyed by TRACING_EXPORTER
+TRACE_EXPORTERS: Dict[str, Callable[[], SpanExporter]] = {
+    "console": ConsoleSpanExporter,
+    "file": lambda: FileSpanExporter(settings.tracing_file_path),
+    "otlp": lambda: OTLPHttpSpanExporter(settings.tracing_otlp_endpoint),
+}
+
+
+class Tracer:
+    """
+    Head-sampled request tracing with OpenTelemetry-compatible output
+
+    Only entry points (start_trace) decide whether a trace is recorded: an
+    incoming W3C traceparent's sampled flag is honoured, otherwise the trace id
+    is kept when its low 64 bits fall under the sample ratio (the same rule as
+    OpenTelemetry's TraceIdRatioBased sampler). Spans opened below an unsampled
+    or missing root are no-ops, so untraced requests pay one context variable
+    lookup per span. Finished spans are queued and exported in OTLP/JSON batches
+    from a background thread; a full queue drops spans rather than block.
+    """
+
+    def __init__(self, exporter: str, sample_ratio: float, service_name: str, max_queue_size: int = 10000):
+        self.exporter_name = exporter
+        self.sample_ratio = sample_ratio
+        self.service_name = service_name
+        self.enabled = bool(exporter) and sample_ratio > 0
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._exporter: Optional[SpanExporter] = None
+
+    def _sample(self, trace_id: str) -> bool:
+        return int(trace_id[16:], 16) < self.sample_ratio * 2 ** 64
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+        """
+        Open the root span of a request, continuing the caller's trace if it sent one
+
+        Args:
+            name: Span name
+            traceparent: Incoming W3C traceparent header, if any
+            attributes: Initial span attributes
+        """
+        if not self.enabled:
+            yield NON_RECORDING_SPAN
+            return
+
+        match = TRACEPARENT_PATTERN.match(traceparent or "")
+        if match:
+            trace_id, parent_span_id = match.group(1), match.group(2)
+            sampled = int(match.group(3), 16) & 1 == 1
+        else:
+            trace_id, parent_span_id = os.urandom(16).hex(), None
+            sampled = self._sample(trace_id)
+
+        if not sampled:
+            token = _current_span.set(NON_RECORDING_SPAN)
+            try:
+                yield NON_RECORDING_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+
+        with self._record(Span(name, trace_id, parent_span_id, SPAN_KIND_SERVER, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+        """Open a child of the current span (a no-op outside sampled traces)"""
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            yield NON_RECORDING_SPAN
+            return
+        with self._record(Span(name, parent.trace_id, parent.span_id, SPAN_KIND_INTERNAL, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def _record(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if isinstance(e, (asyncio.CancelledError, GeneratorExit)):
+                span.set_attribute("cancelled", True)
+            else:
+                span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self._enqueue(span)
+
+    def _enqueue(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span.to_otlp())
+        except queue.Full:
+            metrics.increment("trace_spans_dropped_total")
+            return
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+                    self._thread.start()
+
+    def _payload(self, spans: List[dict]) -> dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": "roastmystartup"}, "spans": spans}],
+        }]}
+
+    def _export(self, spans: List[dict]) -> None:
+        try:
+            if self._exporter is None:
+                self._exporter = TRACE_EXPORTERS[self.exporter_name]()
+            self._exporter.export(self._payload(spans))
+            metrics.increment("trace_spans_exported_total", len(spans))
+        except Exception as e:
+            metrics.increment("trace_spans_dropped_total", len(spans))
+            logger.warning(f"⚠️ Failed to export {len(spans)} span(s) via {self.exporter_name}: {str(e)}")
+
+    def _export_loop(self) -> None:
+        batch: List[dict] = []
+        flush_at = time.monotonic() + EXPORT_INTERVAL_SECONDS
+        while True:
+            try:
+                item = self._queue.get(timeout=max(flush_at - time.monotonic(), 0.01))
+            except queue.Empty:
+                item = None
+            else:
+                if item is None:  # Shutdown sentinel
+                    if batch:
+                        self._export(batch)
+                    return
+                batch.append(item)
+            if batch and (len(batch) >= EXPORT_BATCH_SIZE or time.monotonic() >= flush_at):
+                self._export(batch)
+                batch = []
+            if time.monotonic() >= flush_at:
+                flush_at = time.monotonic() + EXPORT_INTERVAL_SECONDS
+
+    def shutdown(self) -> None:
+        """Export queued spans and stop the export thread"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._thread = None
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+
+def traced(name: str, attributes: Optional[Dict[str, Any]] = None) -> Callable:
+    """Decorator wrapping an async function in a child span"""
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name, attributes):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Global tracer instance
+tracer = Tracer(
+    exporter=settings.tracing_exporter,
+    sample_ratio=settings.tracing_sample_ratio,
+    service_name=settings.tracing_service_name
+)
@@ -0,0 +1,186 @@
+import heapq
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest
+from app.services.near_duplicates import normalize_words
+
+# Window name -> (pane width in seconds, panes per window)
+WINDOWS: Dict[str, Tuple[int, int]] = {
+    "1h": (300, 12),  # 5-minute panes
+    "24h": (3600, 24),  # 1-hour panes
+}
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary over at most `capacity` counters
+
+    A new item arriving when every counter is taken replaces the item with the
+    smallest count and inherits that count (recorded as its error bound). Any
+    item occurring more than N / capacity times is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        # Lazy min-heap of (count, item); entries whose count is stale are skipped on pop
+        self._heap: List[Tuple[int, str]] = []
+
+    def _push(self, item: str) -> None:
+        heapq.heappush(self._heap, (self.counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, key) for key, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> str:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return item
+
+    def add(self, item: str) -> None:
+        if item in self.counts:
+            self.counts[item] += 1
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+        else:
+            victim = self._pop_min()
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[item] = floor + 1
+            self.errors[item] = floor
+        self._push(item)
+
+
+class _Pane:
+    """Terms and startup names seen during one slice of a window"""
+
+    def __init__(self, start: int, capacity: int):
+        self.start = start
+        self.terms = SpaceSaving(capacity)
+        self.names = SpaceSaving(capacity)
+
+
+class SlidingTopK:
+    """
+    Top-K over a sliding window made of fixed-width panes
+
+    Each pane keeps its own Space-Saving summaries; when the window slides, the
+    oldest pane is dropped whole. The top-K of the window (pane counts summed) is
+    recomputed at most every refresh_seconds, so reads return a ready snapshot.
+    """
+
+    def __init__(self, pane_seconds: int, pane_count: int, capacity: int, top_k: int, refresh_seconds: float):
+        self.pane_seconds = pane_seconds
+        self.pane_count = pane_count
+        self.capacity = capacity
+        self.top_k = top_k
+        self.refresh_seconds = refresh_seconds
+        self._panes: List[_Pane] = []
+        self._snapshot: Optional[dict] = None
+        self._snapshot_at = 0.0
+
+    def _current_pane(self, now: float) -> _Pane:
+        start = int(now // self.pane_seconds) * self.pane_seconds
+        if not self._panes or self._panes[-1].start != start:
+            self._panes.append(_Pane(start, self.capacity))
+        self._expire(now)
+        return self._panes[-1]
+
+    def _expire(self, now: float) -> None:
+        oldest = int(now // self.pane_seconds) * self.pane_seconds - (self.pane_count - 1) * self.pane_seconds
+        while self._panes and self._panes[0].start < oldest:
+            self._panes.pop(0)
+
+    def add(self, terms: Set[str], name: str, now: float) -> None:
+        pane = self._current_pane(now)
+        for term in terms:
+            pane.terms.add(term)
+        if name:
+            pane.names.add(name)
+
+    def _top(self, summaries: List[SpaceSaving]) -> List[dict]:
+        totals: Dict[str, int] = {}
+        errors: Dict[str, int] = {}
+        for summary in summaries:
+            for item, count in summary.counts.items():
+                totals[item] = totals.get(item, 0) + count
+                errors[item] = errors.get(item, 0) + summary.errors[item]
+        top = sorted(totals.items(), key=lambda pair: (-pair[1], pair[0]))[:self.top_k]
+        return [{"item": item, "count": count, "max_overcount": errors[item]} for item, count in top]
+
+    def snapshot(self, now: float) -> dict:
+        if self._snapshot is None or now - self._snapshot_at >= self.refresh_seconds:
+            self._expire(now)
+            self._snapshot = {
+                "terms": self._top([pane.terms for pane in self._panes]),
+                "startup_names": self._top([pane.names for pane in self._panes]),
+            }
+            self._snapshot_at = now
+        return self._snapshot
+
+
+class TrendingService:
+    """
+    Most roasted themes: top terms and startup names over sliding windows
+
+    Every incoming roast request is tokenized once (normalized idea words and
+    word pairs) and counted in each window. Memory is bounded by windows x panes
+    x capacity counters whatever the traffic, and reads serve a snapshot
+    refreshed every few seconds.
+    """
+
+    def __init__(self, capacity: int, top_k: int, refresh_seconds: float):
+        self._lock = threading.Lock()
+        self._windows = {
+            name: SlidingTopK(pane_seconds, pane_count, capacity, top_k, refresh_seconds)
+            for name, (pane_seconds, pane_count) in WINDOWS.items()
+        }
+
+    @staticmethod
+    def _terms(request: RoastRequest) -> Set[str]:
+        """Distinct idea words (3+ letters) and adjacent word pairs, so one request counts each once"""
+        words = [word for word in normalize_words(request.idea_description) if len(word) > 2 and not word.isdigit()]
+        return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+    @staticmethod
+    def _name(request: RoastRequest) -> str:
+        return re.sub(r"\s+", " ", request.startup_name).strip().lower()
+
+    def record(self, request: RoastRequest) -> None:
+        """Count an incoming roast request in every window"""
+        terms, name = self._terms(request), self._name(request)
+        now = time.time()
+        with self._lock:
+            for window in self._windows.values():
+                window.add(terms, name, now)
+
+    def trending(self, window: str, limit: int) -> dict:
+        """
+        Top terms and startup names of a window
+
+        Args:
+            window: Key of WINDOWS
+            limit: Maximum items per list (at most the configured top K)
+
+        Returns:
+            dict: {"terms": [...], "startup_names": [...]}, each item with its
+            estimated count and the most it may be overcounted by
+        """
+        with self._lock:
+            snapshot = self._windows[window].snapshot(time.time())
+        return {key: items[:limit] for key, items in snapshot.items()}
+
+
+# Global trending service instance
+trending_service = TrendingService(
+    capacity=settings.trending_capacity,
+    top_k=settings.trending_top_k,
+    refresh_seconds=settings.trending_refresh_seconds
+)
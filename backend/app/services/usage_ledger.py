@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+from app.config.settings import settings
+from app.services.metrics_service import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Ledger rows written between two retention sweeps
+PRUNE_EVERY_WRITES = 1000
+
+# One row per roast generation; timestamps are Unix seconds and latencies whole milliseconds
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_ledger (
+    ts REAL NOT NULL,
+    user_id TEXT,
+    roast_level TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    total_tokens INTEGER NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    calls INTEGER NOT NULL,
+    retries INTEGER NOT NULL,
+    success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_ledger_ts ON usage_ledger(ts);
+"""
+
+INSERT_USAGE_SQL = (
+    "INSERT INTO usage_ledger (ts, user_id, roast_level, model, prompt_tokens, output_tokens, total_tokens, "
+    "latency_ms, calls, retries, success) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# group_by value -> SQL expression of the group key
+USAGE_GROUPS = {
+    "user": "COALESCE(user_id, 'anonymous')",
+    "roast_level": "roast_level",
+    "model": "model",
+    "day": "date(ts, 'unixepoch')",
+}
+
+
+class GenerationUsage:
+    """
+    Token usage of one roast generation, summed over every Gemini call it made
+
+    Retries and hedged duplicates cost tokens too, so each call's usage is added
+    here as its response arrives.
+    """
+
+    def __init__(self):
+        self.model: Optional[str] = None
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_tokens = 0
+        self.calls = 0
+        self.retries = 0
+        # Responses without usage_metadata (older SDKs) whose prompt tokens are still to be counted
+        self.uncounted_prompts = 0
+
+    def add_response(self, response: Any) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and getattr(usage, "total_token_count", 0):
+            self.prompt_tokens += usage.prompt_token_count
+            self.output_tokens += usage.candidates_token_count
+            self.total_tokens += usage.total_token_count
+            return
+
+        # Older responses only report each candidate's output tokens
+        output_tokens = sum(getattr(candidate, "token_count", 0) or 0 for candidate in response.candidates)
+        self.output_tokens += output_tokens
+        self.total_tokens += output_tokens
+        self.uncounted_prompts += 1
+
+    def add_prompt_tokens(self, tokens_per_prompt: int) -> None:
+        """Fill in the prompt tokens of responses that did not report them"""
+        tokens = tokens_per_prompt * self.uncounted_prompts
+        self.prompt_tokens += tokens
+        self.total_tokens += tokens
+        self.uncounted_prompts = 0
+
+
+class UsageLedger:
+    """
+    Local SQLite ledger of Gemini token usage, latency and retries per generation
+
+    Rows are written on a background thread so recording never blocks a roast,
+    and rows older than the retention period are swept periodically. Summaries
+    aggregate the ledger per user, roast level, model or day.
+    """
+
+    def __init__(self, path: str, retention_days: float, enabled: bool = True):
+        self.path = path
+        self.retention_seconds = retention_days * 86400
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="usage-ledger")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _insert(self, row: tuple) -> None:
+        try:
+            conn = self._connection()
+            conn.execute(INSERT_USAGE_SQL, row)
+            self._writes += 1
+            if self._writes % PRUNE_EVERY_WRITES == 0:
+                conn.execute("DELETE FROM usage_ledger WHERE ts < ?", (time.time() - self.retention_seconds,))
+        except Exception as e:
+            logger.error(f"❌ Failed to write usage ledger row: {str(e)}")
+
+    def record(
+        self,
+        usage: GenerationUsage,
+        roast_level: str,
+        latency: float,
+        success: bool,
+        user_id: Optional[str] = None,
+    ) -> None:
+        """
+        Export a generation's usage as metrics and queue it for the ledger
+
+        Args:
+            usage: Tokens and calls of the generation
+            roast_level: Roast level of the request
+            latency: Generation time in seconds (retries included, admission wait excluded)
+            success: Whether a roast was produced
+            user_id: UUID of the authenticated user (None for anonymous roasts)
+        """
+        model = usage.model or "unknown"
+        for kind, tokens in (("prompt", usage.prompt_tokens), ("output", usage.output_tokens)):
+            if tokens:
+                metrics.increment("gemini_tokens_total", tokens, labels={"model": model, "kind": kind})
+        metrics.observe("roast_generation_seconds", latency, labels={"roast_level": roast_level})
+        if not self.enabled:
+            return
+
+        row = (
+            time.time(), user_id, roast_level, model, usage.prompt_tokens, usage.output_tokens,
+            usage.total_tokens, int(latency * 1000), usage.calls, usage.retries, int(success),
+        )
+        self._executor.submit(self._insert, row)
+
+    def _summarize(self, group_by: str, since: float, until: float, limit: int) -> List[dict]:
+        sql = (
+            f"SELECT {USAGE_GROUPS[group_by]} AS key, COUNT(*) AS generations, "
+            "SUM(1 - success) AS failures, SUM(calls) AS calls, SUM(retries) AS retries, "
+            "SUM(prompt_tokens) AS prompt_tokens, SUM(output_tokens) AS output_tokens, "
+            "SUM(total_tokens) AS total_tokens, CAST(AVG(total_tokens) AS INTEGER) AS avg_tokens, "
+            "CAST(AVG(latency_ms) AS INTEGER) AS avg_latency_ms, MAX(latency_ms) AS max_latency_ms "
+            "FROM usage_ledger WHERE ts >= ? AND ts < ? "
+            "GROUP BY key ORDER BY total_tokens DESC LIMIT ?"
+        )
+        rows = self._connection().execute(sql, (since, until, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    async def summary(self, group_by: str, since: float, until: float, limit: int) -> Optional[List[dict]]:
+        """
+        Aggregate the ledger, heaviest token users first
+
+        Args:
+            group_by: Key of USAGE_GROUPS
+            since: Range start (Unix time, inclusive)
+            until: Range end (Unix time, exclusive)
+            limit: Maximum number of groups
+
+        Returns:
+            list: One row per group, or None if the ledger could not be read
+        """
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._summarize, group_by, since, until, limit
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to summarize usage ledger: {str(e)}")
+            return None
+
+
+# Global usage ledger instance (the file is opened on first write)
+usage_ledger = UsageLedger(
+    settings.usage_ledger_path,
+    retention_days=settings.usage_ledger_retention_days,
+    enabled=settings.usage_ledger_enabled
+)
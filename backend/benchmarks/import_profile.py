@@ -0,0 +1,117 @@
+"""
+Cold-start benchmark for the RoastMyStartup API
+
+Profiles `import app.main` with `python -X importtime` and, optionally, times how
+long a fresh uvicorn process takes to serve its first /health request.
+
+Usage (from the backend directory):
+    python benchmarks/import_profile.py
+    python benchmarks/import_profile.py --top 30 --serve --json import_profile.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_imports(module: str = "app.main") -> dict:
+    """Run `python -X importtime -c "import <module>"` and parse its report"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - started
+
+    imports = []
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        imports.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+
+    if result.returncode != 0:
+        print(result.stderr[-2000:], file=sys.stderr)
+        raise SystemExit(f"❌ import {module} failed")
+
+    top_level = [entry for entry in imports if entry["depth"] == 0]
+    return {
+        "module": module,
+        "wall_seconds": round(wall_seconds, 3),
+        "total_import_ms": round(sum(entry["cumulative_ms"] for entry in top_level), 1),
+        "imports": imports,
+    }
+
+
+def time_first_request(port: int, timeout: float = 60.0) -> dict:
+    """Start uvicorn and measure the time until /health first answers"""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as response:
+                    response.read()
+                return {"first_request_seconds": round(time.perf_counter() - started, 3), "status": response.status}
+            except OSError:
+                time.sleep(0.05)
+        raise SystemExit(f"❌ Server did not answer /health within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile RoastMyStartup API cold start")
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=20, help="Number of slowest imports to show")
+    parser.add_argument("--serve", action="store_true", help="Also time the first served /health request")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+    parser.add_argument("--json", dest="json_path", help="Write the full report to this file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Import profile: {args.module}")
+    print("=" * 60)
+
+    report = profile_imports(args.module)
+    print(f"Interpreter + import wall time: {report['wall_seconds']:.3f}s")
+    print(f"Total import time:              {report['total_import_ms']:.1f}ms")
+    print()
+    print(f"Top {args.top} imports by cumulative time:")
+    slowest = sorted(report["imports"], key=lambda entry: entry["cumulative_ms"], reverse=True)[:args.top]
+    for entry in slowest:
+        print(f"  {entry['cumulative_ms']:9.1f}ms  (self {entry['self_ms']:7.1f}ms)  {entry['module']}")
+
+    if args.serve:
+        print()
+        report["server"] = time_first_request(args.port)
+        print(f"First /health response after:   {report['server']['first_request_seconds']:.3f}s")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Event loop lag benchmark for the RoastMyStartup API
+
+Starts uvicorn with blocking-call detection on, drives concurrent requests at a
+set of endpoints, then reads the event loop lag percentiles from /metrics and
+collects every "Event loop blocked" stack the server logged. Exits non-zero
+when the loop was blocked more often than allowed or p99 lag is over budget,
+so synchronous calls creeping into async handlers fail the benchmark run.
+
+Usage (from the backend directory):
+    python benchmarks/loop_lag.py
+    python benchmarks/loop_lag.py --path /health --path /stats --concurrency 32 --seconds 20
+    DATABASE_BACKEND=sqlite python benchmarks/loop_lag.py --max-p99-ms 20 --json loop_lag.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BLOCKED_MARKER = "Event loop blocked for over"
+
+
+def start_server(port: int, threshold_ms: float, log_file, timeout: float = 60.0) -> subprocess.Popen:
+    """Start uvicorn with block detection on and wait for /health to answer"""
+    env = dict(os.environ, LOOP_BLOCK_DETECTION="True", LOOP_BLOCK_THRESHOLD_MS=str(threshold_ms))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if server.poll() is not None:
+            raise SystemExit("❌ Server exited during startup (see its log above)")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as response:
+                response.read()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit(f"❌ Server did not answer /health within {timeout:.0f}s")
+
+
+def drive_load(port: int, paths: list, concurrency: int, seconds: float) -> dict:
+    """Hit the paths round-robin from `concurrency` threads for `seconds`"""
+    deadline = time.perf_counter() + seconds
+
+    def worker(offset: int) -> tuple:
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            path = paths[(offset + done + errors) % len(paths)]
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=30) as response:
+                    response.read()
+                done += 1
+            except OSError:
+                errors += 1
+        return done, errors
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    requests_done = sum(done for done, _ in results)
+    return {
+        "requests": requests_done,
+        "errors": sum(errors for _, errors in results),
+        "requests_per_second": round(requests_done / seconds, 1),
+    }
+
+
+def read_lag_metrics(port: int) -> dict:
+    """Parse the event loop series out of the Prometheus exposition"""
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=10) as response:
+        text = response.read().decode()
+    report = {"blocked": 0}
+    for line in text.splitlines():
+        match = re.match(r'^event_loop_lag_seconds\{quantile="([0-9.]+)"\} (\S+)$', line)
+        if match:
+            report[f"p{float(match.group(1)) * 100:g}_lag_ms"] = round(float(match.group(2)) * 1000, 2)
+        elif line.startswith("event_loop_lag_max_seconds "):
+            report["max_lag_ms"] = round(float(line.split()[1]) * 1000, 2)
+        elif line.startswith("event_loop_blocked_total "):
+            report["blocked"] = int(float(line.split()[1]))
+    return report
+
+
+def blocked_stacks(log_text: str) -> list:
+    """Every blocking-call warning in the server log, with the stack that followed it"""
+    stacks, current = [], None
+    for line in log_text.splitlines():
+        # LOG_FORMAT=json: the whole warning, stack included, is one record's message
+        if line.startswith("{"):
+            try:
+                message = json.loads(line).get("message", "")
+            except ValueError:
+                message = ""
+            if BLOCKED_MARKER in message:
+                stacks.append(message.rstrip().splitlines())
+            current = None
+        elif BLOCKED_MARKER in line:
+            current = [line.strip()]
+            stacks.append(current)
+        elif current is not None and (line.startswith("  ") or not line.strip()):
+            current.append(line)
+        else:
+            current = None
+    return ["\n".join(stack).rstrip() for stack in stacks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event loop lag and catch blocking calls under load")
+    parser.add_argument("--path", dest="paths", action="append", help="Endpoint to load (repeatable, default: / /health /stats)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Load duration")
+    parser.add_argument("--threshold-ms", type=float, default=50.0, help="Loop stall reported as blocking")
+    parser.add_argument("--max-blocked", type=int, default=0, help="Blocking stalls tolerated before failing")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Fail if p99 loop lag exceeds this")
+    parser.add_argument("--port", type=int, default=8766, help="Port for the benchmarked server")
+    parser.add_argument("--json", dest="json_path", help="Write the full report to this file")
+    args = parser.parse_args()
+    paths = args.paths or ["/", "/health", "/stats"]
+
+    print("=" * 60)
+    print(f"Event loop lag: {', '.join(paths)} x{args.concurrency} for {args.seconds:.0f}s")
+    print("=" * 60)
+
+    with tempfile.TemporaryFile(mode="w+") as log_file:
+        server = start_server(args.port, args.threshold_ms, log_file)
+        try:
+            report = {"load": drive_load(args.port, paths, args.concurrency, args.seconds)}
+            report["loop"] = read_lag_metrics(args.port)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+        log_file.seek(0)
+        report["blocked_stacks"] = blocked_stacks(log_file.read())
+
+    load, loop = report["load"], report["loop"]
+    print(f"Requests:        {load['requests']} ({load['requests_per_second']}/s, {load['errors']} errors)")
+    for key in ("p50_lag_ms", "p90_lag_ms", "p99_lag_ms", "max_lag_ms"):
+        if key in loop:
+            print(f"{key:16} {loop[key]:.2f}")
+    print(f"Blocking stalls: {loop['blocked']} (over {args.threshold_ms:.0f}ms)")
+    for stack in report["blocked_stacks"][:5]:
+        print()
+        print(stack)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.json_path}")
+
+    failures = []
+    if loop["blocked"] > args.max_blocked:
+        failures.append(f"{loop['blocked']} blocking stall(s), {args.max_blocked} allowed")
+    if args.max_p99_ms is not None and loop.get("p99_lag_ms", 0.0) > args.max_p99_ms:
+        failures.append(f"p99 lag {loop['p99_lag_ms']:.2f}ms over {args.max_p99_ms:.2f}ms budget")
+    if failures:
+        raise SystemExit("❌ " + "; ".join(failures))
+    print("\n✅ No blocking calls detected")
+
+
+if __name__ == "__main__":
+    main()
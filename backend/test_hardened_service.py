@@ -172,7 +172,7 @@ async def main():
         
         print("\n🎉 All tests completed!")
         print("\n📊 Test Summary:")
-        print("- ✅ Retry logic implemented with tenacity")
+        print("- ✅ Error-class-aware retry policy bounded by the request deadline")
         print("- ✅ Safety settings allow Nuclear roasts")
         print("- ✅ JSON parsing is robust")
         print("- ✅ Error handling provides user-friendly messages")